@@ -0,0 +1,142 @@
+import os
+import warnings
+
+import numpy as np
+
+from detection import cluster_bins
+
+# Scales the median absolute deviation to the standard deviation of Gaussian noise.
+MAD_TO_SIGMA = 1.4826
+
+def regrid(axis, frequencies, power_dbm):
+    """
+    Map one sweep onto axis (evenly spaced, ascending). Sweeps at least as fine as the axis
+    are folded with a per-cell max; coarser ones (one peak per tuning step) hold each point
+    across its own step. Cells the sweep does not cover are NaN.
+    """
+    resolution = axis[1] - axis[0]
+    row = np.full(len(axis), np.nan, dtype=np.float32)
+    spacing = float(np.median(np.diff(frequencies))) if len(frequencies) > 1 else 0.0
+    if spacing <= resolution:
+        cells = np.rint((frequencies - axis[0]) / resolution).astype(np.int64)
+        inside = (cells >= 0) & (cells < len(axis))
+        np.fmax.at(row, cells[inside], power_dbm[inside])
+        return row
+    lo, hi = np.searchsorted(axis, [frequencies[0] - spacing / 2, frequencies[-1] + spacing / 2])
+    nearest = np.clip(np.searchsorted(frequencies, axis[lo:hi]), 1, len(frequencies) - 1)
+    left_closer = axis[lo:hi] - frequencies[nearest - 1] < frequencies[nearest] - axis[lo:hi]
+    row[lo:hi] = power_dbm[nearest - left_closer.astype(np.int64)]
+    return row
+
+class NoiseBaseline:
+    def __init__(self, start_freq, end_freq, resolution=1000):
+        """
+        Per-bin noise-floor model on a fixed frequency grid (default 1 kHz, like MaxHold):
+        the median dBm of each cell over past sweeps and its spread (scaled MAD, robust to
+        the occasional carrier). Cells seen in too few sweeps hold NaN: they are unknown, not
+        changed (see unknown() and coverage()).
+        """
+        self.start_freq = float(start_freq)
+        self.resolution = float(resolution)
+        self.frequencies = np.arange(self.start_freq, end_freq + resolution, self.resolution)
+        self.median = np.full(len(self.frequencies), np.nan, dtype=np.float32)
+        self.spread = np.full(len(self.frequencies), np.nan, dtype=np.float32)
+        self.count = np.zeros(len(self.frequencies), dtype=np.int32)
+
+    def indices(self, frequencies):
+        """Grid cell of each frequency and whether it falls inside the grid."""
+        indices = np.rint((np.asarray(frequencies, dtype=np.float64) - self.start_freq) / self.resolution).astype(np.int64)
+        return indices, (indices >= 0) & (indices < len(self.frequencies))
+
+    def learn(self, sweeps, min_count=3):
+        """
+        Replace the model with the statistics of sweeps, an iterable of (frequencies, dBm).
+        Every sweep is regridded onto the model's grid (coarse sweeps, one point per tuning
+        step, hold each point across its step) and becomes one row of a (sweeps x cells)
+        float32 matrix, so memory is 4 bytes x sweeps x cells; cap the number of sweeps on
+        wide, fine grids. Returns the number of sweeps used.
+        """
+        rows = []
+        for frequencies, power_dbm in sweeps:
+            rows.append(regrid(self.frequencies, np.asarray(frequencies, dtype=np.float64),
+                               np.asarray(power_dbm, dtype=np.float32)))
+        if not rows:
+            return 0
+
+        matrix = np.vstack(rows)
+        self.count = np.count_nonzero(~np.isnan(matrix), axis=0).astype(np.int32)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # never-observed cells are all-NaN columns
+            self.median = np.nanmedian(matrix, axis=0).astype(np.float32)
+            self.spread = (MAD_TO_SIGMA * np.nanmedian(np.abs(matrix - self.median), axis=0)).astype(np.float32)
+        unknown = self.count < min_count
+        self.median[unknown] = np.nan
+        self.spread[unknown] = np.nan
+        return len(rows)
+
+    def lookup(self, frequencies):
+        """(median, spread) at each frequency's grid cell; NaN outside the grid or where unknown."""
+        indices, inside = self.indices(frequencies)
+        median = np.full(len(indices), np.nan, dtype=np.float32)
+        spread = np.full(len(indices), np.nan, dtype=np.float32)
+        median[inside] = self.median[indices[inside]]
+        spread[inside] = self.spread[indices[inside]]
+        return median, spread
+
+    def coverage(self, start_freq=None, end_freq=None):
+        """Fraction of start_freq..end_freq (default: the whole grid) that has a known baseline."""
+        start_freq = self.frequencies[0] if start_freq is None else start_freq
+        end_freq = self.frequencies[-1] if end_freq is None else end_freq
+        return 1.0 - float(self.unknown(np.arange(start_freq, end_freq + self.resolution / 2, self.resolution)).mean())
+
+    def unknown(self, frequencies):
+        """Boolean mask of the points the baseline knows nothing about (off the grid or too rarely seen)."""
+        return np.isnan(self.lookup(frequencies)[0])
+
+    def deviations(self, frequencies, power_dbm, threshold_sigma=4.0, min_db=6.0):
+        """
+        Boolean mask of the points that differ from the baseline by more than
+        max(threshold_sigma x spread, min_db) in either direction (a carrier appearing or
+        going away). Unknown points are never flagged; see unknown().
+        """
+        median, spread = self.lookup(frequencies)
+        with np.errstate(invalid="ignore"):
+            return np.abs(np.asarray(power_dbm, dtype=np.float32) - median) > np.maximum(threshold_sigma * spread, min_db)
+
+    def regions(self, frequencies, power_dbm, mask):
+        """Runs of adjacent deviating points, each with its frequency span and power levels."""
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        power_dbm = np.asarray(power_dbm, dtype=np.float64)
+        median, _ = self.lookup(frequencies)
+        regions = []
+        for run in cluster_bins(frequencies, power_dbm, mask):
+            a, b = run["start"], run["stop"]
+            offset = power_dbm[a:b] - median[a:b]
+            regions.append({"start_frequency": float(frequencies[a]), "end_frequency": float(frequencies[b - 1]),
+                            "peak_dbm": run["power_db"],
+                            "max_deviation_db": round(float(np.nanmax(np.abs(offset))), 3) if np.isfinite(offset).any() else None,
+                            "frequencies": frequencies[a:b].tolist(), "power_levels": np.round(power_dbm[a:b], 3).tolist()})
+        return regions
+
+    def observed(self):
+        """(frequencies, median dBm) of every cell with a known baseline."""
+        known = ~np.isnan(self.median)
+        return self.frequencies[known], self.median[known]
+
+    def save(self, path):
+        """Persist atomically (write to a temp file, then rename over the old one)."""
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, start_freq=self.start_freq, resolution=self.resolution,
+                 median=self.median, spread=self.spread, count=self.count)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """A baseline saved by save()."""
+        with np.load(path) as saved:
+            baseline = cls(float(saved["start_freq"]),
+                           float(saved["start_freq"] + (len(saved["median"]) - 1) * saved["resolution"]),
+                           float(saved["resolution"]))
+            baseline.frequencies = baseline.start_freq + np.arange(len(saved["median"])) * baseline.resolution
+            baseline.median, baseline.spread, baseline.count = saved["median"], saved["spread"], saved["count"]
+        return baseline
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the scan pipeline.
+
+    python src/benchmark.py                          # run, write benchmarks/results.json, compare to baseline
+    python src/benchmark.py --save-baseline          # run and store the results as the new baseline
+    python src/benchmark.py --quick --tolerance 0.5  # fewer repeats, allow 50% slowdown
+    python src/benchmark.py --suite recording --recording captures/iq_20250320_145048_00000001.sigmf-data
+
+Every benchmark reports the median seconds per operation. A result slower than the baseline by
+more than --tolerance is a regression and makes the script exit with status 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RESULTS_PATH = os.path.join("benchmarks", "results.json")
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+
+# Small simulated range shared by the sweep, logger and UI benchmarks.
+BENCH_CONFIG = {
+    "start_frequency": 470000000,
+    "end_frequency": 490000000,
+    "frequency_step": 200000,
+    "sample_rate": 1024000,
+    "samples_per_scan": 4096,
+    "gain": 20,
+    "freq_correction": 0,
+    "sdr_backend": "simulator",
+    "selected_band": "BENCH",
+}
+
+def median_time(function, repeats, warmup=1):
+    """Median wall time of one call to function over repeats runs."""
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return float(np.median(times))
+
+def bench_signal_processing(repeats):
+    from signal_processing import SignalProcessing
+
+    results = {}
+    rng = np.random.default_rng(0)
+    for fft_size in (1024, 4096, 16384):
+        config = {"sample_rate": 1024000, "samples_per_scan": fft_size, "fft_size": fft_size}
+        sp = SignalProcessing(config)
+        samples = (rng.standard_normal(fft_size) + 1j * rng.standard_normal(fft_size)).astype(np.complex64)
+        batch = np.repeat(samples[None, :], 100, axis=0)
+        results[f"sp_process_{fft_size}"] = {"seconds": median_time(lambda: sp.process(samples), repeats * 20)}
+        seconds = median_time(lambda: sp.process_batch(batch), repeats)
+        results[f"sp_process_batch_100x{fft_size}"] = {"seconds": seconds, "captures_per_second": 100 / seconds}
+    return results
+
+def bench_sweep(repeats):
+    from data_acquisition import DataAcquisition
+    from scanner import Scanner
+
+    results = {}
+    for name, overrides in (("serial", {}), ("pipeline", {"pipeline_workers": 2}),
+                            ("stitched", {"stitch_spectrum": True})):
+        config = {**BENCH_CONFIG, **overrides}
+        scanner = Scanner(config, DataAcquisition(config))
+        seconds = median_time(scanner.run_pass, repeats)
+        results[f"sweep_simulated_{name}"] = {"seconds": seconds, "steps": len(scanner.daq.frequency_list())}
+    return results
+
+def bench_logger(repeats, passes=200):
+    from logger import Logger
+
+    results = {}
+    rng = np.random.default_rng(0)
+    frequencies = np.arange(BENCH_CONFIG["start_frequency"], BENCH_CONFIG["end_frequency"], 25000).tolist()
+    with tempfile.TemporaryDirectory() as directory:
+        for log_format in ("json", "store"):
+            logger = Logger({**BENCH_CONFIG, "log_format": log_format, "wwb_export_interval": 60,
+                             "history_db": os.path.join(directory, f"{log_format}.db"),
+                             "log_directory": os.path.join(directory, f"logs_{log_format}"),
+                             "data_directory": os.path.join(directory, f"data_{log_format}")})
+            per_pass = []
+            for n in range(passes):
+                scan_data = {"timestamp": time.strftime("%Y%m%d_%H%M%S", time.gmtime(1.7e9 + n)),
+                             "frequencies": frequencies, "units": "dBFS",
+                             "power_levels": rng.normal(-80, 3, len(frequencies)).tolist()}
+                started = time.perf_counter()
+                logger.save_log(scan_data)
+                logger.update_recent_scan(scan_data)
+                per_pass.append(time.perf_counter() - started)
+            window = max(min(repeats, passes // 4), 1)
+            results[f"logger_{log_format}_first_passes"] = {"seconds": float(np.median(per_pass[:window]))}
+            results[f"logger_{log_format}_after_{passes}_passes"] = {"seconds": float(np.median(per_pass[-window:]))}
+            logger.history.close()
+    return results
+
+def bench_visualization(repeats):
+    import matplotlib
+    matplotlib.use("Agg")
+    warnings.filterwarnings("ignore", message="Glyph")  # emoji labels without an emoji font
+    from visualization import Visualization
+
+    results = {}
+    bands = [{"band": "BENCH", "frequency_range_hz": {"start": BENCH_CONFIG["start_frequency"],
+                                                       "end": BENCH_CONFIG["end_frequency"]},
+              "regions_allowed": [], "rf_output_power_options": []}]
+    rng = np.random.default_rng(0)
+    for points in (100, 6000, 60000):
+        vis = Visualization(BENCH_CONFIG, bands)
+        spectrum = rng.normal(-80, 3, points)
+        results[f"vis_update_spectrum_{points}"] = {
+            "seconds": median_time(lambda: vis.update_spectrum(spectrum), repeats)}
+    # A full pass of status updates: this is where a per-step redraw or plt.pause shows up.
+    vis.ui_fps = 10
+    steps = np.arange(BENCH_CONFIG["start_frequency"], BENCH_CONFIG["end_frequency"], BENCH_CONFIG["frequency_step"])
+    def status_pass():
+        for i, freq in enumerate(steps):
+            vis.update_status(freq, (i + 1) / len(steps) * 100)
+    results[f"vis_update_status_{len(steps)}_steps"] = {"seconds": median_time(status_pass, repeats)}
+    return results
+
+def bench_recording(repeats, path=None):
+    """SignalProcessing on recorded IQ: a recording given with --recording, else a simulated sweep recorded here."""
+    from data_acquisition import DataAcquisition
+    from iq_recorder import IQRecording
+    from signal_processing import SignalProcessing
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if path is None:
+            daq = DataAcquisition({**BENCH_CONFIG, "iq_record_directory": directory})
+            results["record_sweep"] = {"seconds": median_time(lambda: list(daq.scan_range()), repeats)}
+            daq.close()
+            path = daq.recorder.path
+        recording = IQRecording(path)
+        batch = recording.stack()
+        sp = SignalProcessing({**BENCH_CONFIG, "sample_rate": recording.sample_rate or BENCH_CONFIG["sample_rate"],
+                               "samples_per_scan": batch.shape[1]})
+        seconds = median_time(lambda: sp.process_batch(batch), repeats)
+        results[f"replay_process_batch_{batch.shape[0]}x{batch.shape[1]}"] = {
+            "seconds": seconds, "captures_per_second": batch.shape[0] / seconds}
+        recording.close()
+    return results
+
+SUITES = {
+    "signal_processing": bench_signal_processing,
+    "sweep": bench_sweep,
+    "logger": bench_logger,
+    "visualization": bench_visualization,
+    "recording": bench_recording,
+}
+
+def run(suites, repeats, recording=None):
+    results = {}
+    for name in suites:
+        print(f"⏱️ Running {name} benchmarks...")
+        with contextlib.redirect_stdout(io.StringIO()):  # modules print per step; keep the report readable
+            if name == "recording":
+                results.update(bench_recording(repeats, recording))
+            else:
+                results.update(SUITES[name](repeats))
+    return {"timestamp": time.strftime("%Y%m%d_%H%M%S"), "python": platform.python_version(),
+            "numpy": np.__version__, "machine": platform.machine(), "results": results}
+
+def compare(results, baseline, tolerance):
+    """Rows of (name, baseline seconds, current seconds, ratio, regressed) for benchmarks in both runs."""
+    rows = []
+    for name, current in sorted(results["results"].items()):
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = current["seconds"] / previous["seconds"] if previous["seconds"] > 0 else float("inf")
+        rows.append((name, previous["seconds"], current["seconds"], ratio, ratio > 1 + tolerance))
+    return rows
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the RF scanner pipeline.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="run only these suites")
+    parser.add_argument("--output", default=RESULTS_PATH, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. baseline (0.25 = 25%%)")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats (noisier)")
+    parser.add_argument("--recording", help="IQ recording (.sigmf-data) for the recording suite")
+    args = parser.parse_args(argv)
+
+    results = run(args.suite or list(SUITES), repeats=3 if args.quick else 7, recording=args.recording)
+    write_json(args.output, results)
+    for name, result in sorted(results["results"].items()):
+        print(f"  {name:<40} {result['seconds'] * 1e3:10.3f} ms")
+    print(f"✅ Results written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline, "r") as f:
+        rows = compare(results, json.load(f), args.tolerance)
+    for name, before, after, ratio, regressed in rows:
+        flag = "❌ REGRESSION" if regressed else "✅"
+        print(f"  {flag} {name:<40} {before * 1e3:10.3f} -> {after * 1e3:10.3f} ms ({ratio:.2f}x)")
+    return 1 if any(row[4] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from scan_store import config_hash
+
+# Settings that change a device's settle time, gain or imbalance; a calibration is only reused
+# for the same device with the same values of these.
+CALIBRATION_KEYS = ("sample_rate", "gain", "freq_correction")
+# Bumped when the measurement changes, so calibrations cached by an older version are remeasured.
+CALIBRATION_VERSION = 3
+# Scales the median absolute deviation to the standard deviation of Gaussian noise.
+MAD_TO_SIGMA = 1.4826
+
+def calibration_key(serial, config):
+    """Cache key for a device serial under the calibration-relevant settings of config."""
+    settings = {k: config.get(k) for k in CALIBRATION_KEYS}
+    return f"{serial}:{config_hash({**settings, 'calibration_version': CALIBRATION_VERSION})}"
+
+def device_serial(sdr, config):
+    """Best identifier for the opened device: its serial if the backend exposes one, else the config's choice."""
+    serial = getattr(sdr, "serial", None) or config.get("sdr_serial")
+    return serial or f"index{config.get('sdr_device_index', 0)}"
+
+def measure_settle(samples, block_size=256, tolerance=1.5):
+    """
+    Samples to discard after a retune: the DC level of each block_size block is compared with the
+    steady state (second half of the capture); everything up to the last block further than
+    tolerance times the steady-state spread is transient.
+    """
+    num_blocks = len(samples) // block_size
+    levels = np.asarray(samples[:num_blocks * block_size]).reshape(num_blocks, block_size).mean(axis=1)
+    steady = levels[num_blocks // 2:]
+    center = steady.mean()
+    threshold = tolerance * np.abs(steady - center).max()
+    unsettled = np.flatnonzero(np.abs(levels - center) > threshold)
+    return int((unsettled[-1] + 1) * block_size) if len(unsettled) else 0
+
+def noise_floor_db(samples, fft_size=1024):
+    """
+    Noise floor of a capture in dB: the median bin of its averaged (Hann-windowed) power
+    spectrum. A carrier fills a handful of bins and leaves the median where it was, whereas
+    time-domain power would read the carrier as gain.
+    """
+    samples = np.asarray(samples)
+    num_segments = max(len(samples) // fft_size, 1)
+    segments = samples[:num_segments * fft_size].reshape(num_segments, -1)
+    power = (np.abs(np.fft.fft(segments * np.hanning(segments.shape[1]), axis=1)) ** 2).mean(axis=0)
+    return 10 * np.log10(np.median(power) + 1e-20)
+
+def reject_outliers(frequencies, offsets_db, threshold_sigma=4.0, min_db=1.0):
+    """
+    Gain offsets with outliers replaced: points further than max(threshold_sigma x scaled MAD,
+    min_db) from the median are taken to be a signal on the air (a wideband carrier raises the
+    noise floor of its calibration capture), not the tuner's gain, and are interpolated from
+    the remaining points. Returns (offsets_db, rejected mask).
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    offsets_db = np.asarray(offsets_db, dtype=np.float64)
+    median = np.median(offsets_db)
+    spread = MAD_TO_SIGMA * np.median(np.abs(offsets_db - median))
+    rejected = np.abs(offsets_db - median) > max(threshold_sigma * spread, min_db)
+    if rejected.any() and not rejected.all():
+        offsets_db = offsets_db.copy()
+        offsets_db[rejected] = np.interp(frequencies[rejected], frequencies[~rejected], offsets_db[~rejected])
+    return offsets_db, rejected
+
+def iq_correction(samples):
+    """
+    Estimate (dc_offset, phase, gain) so that, after removing dc_offset, Q' = gain * (Q - phase * I)
+    is orthogonal to I with the same power (blind Gram-Schmidt IQ imbalance correction).
+    """
+    dc_offset = complex(np.mean(samples))
+    centered = np.asarray(samples) - dc_offset
+    i, q = centered.real.astype(np.float64), centered.imag.astype(np.float64)
+    phase = np.dot(i, q) / np.dot(i, i)
+    q = q - phase * i
+    return dc_offset, float(phase), float(np.sqrt(np.dot(i, i) / np.dot(q, q)))
+
+class DeviceCalibration:
+    def __init__(self, frequencies, settle_samples, gain_offset_db, dc_offset, iq_phase, iq_gain):
+        """
+        Per-frequency calibration of one device, measured at a set of calibration frequencies.
+        A scan at any frequency uses the nearest calibration point:
+          - settle_samples: samples to discard after tuning
+          - gain_offset_db: noise floor relative to the median over all points (gain flatness,
+            see noise_floor_db), with outliers interpolated over (see reject_outliers)
+          - dc_offset, iq_phase, iq_gain: DC and IQ imbalance correction (see iq_correction)
+        """
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.settle_samples = np.asarray(settle_samples, dtype=np.int64)
+        self.gain_offset_db = np.asarray(gain_offset_db, dtype=np.float64)
+        self.dc_offset = np.asarray(dc_offset, dtype=np.complex128)
+        self.iq_phase = np.asarray(iq_phase, dtype=np.float64)
+        self.iq_gain = np.asarray(iq_gain, dtype=np.float64)
+
+    @classmethod
+    def measure(cls, sdr, config, frequencies):
+        """
+        Tune to each frequency, read "calibration_samples" samples (default 65536) and measure it.
+        Gain offsets further than "calibration_outlier_sigma" (default 4) scaled MADs, and at
+        least "calibration_outlier_min_db" (default 1 dB), from the median are rejected.
+        """
+        num_samples = config.get("calibration_samples", 65536)
+        settle, power_db, dc, phase, gain = [], [], [], [], []
+        for frequency in frequencies:
+            sdr.center_freq = frequency
+            samples = np.asarray(sdr.read_samples(num_samples), dtype=np.complex64)
+            settle.append(measure_settle(samples))
+            steady = samples[settle[-1]:]
+            offset, p, g = iq_correction(steady)
+            dc.append(offset)
+            phase.append(p)
+            gain.append(g)
+            power_db.append(noise_floor_db(steady - offset))
+        power_db = np.array(power_db)
+        offsets, rejected = reject_outliers(frequencies, power_db - np.median(power_db),
+                                            config.get("calibration_outlier_sigma", 4.0),
+                                            config.get("calibration_outlier_min_db", 1.0))
+        if rejected.any():
+            print(f"⚠️ Calibration: {int(rejected.sum())} gain point(s) look like signals on the air and were "
+                  f"interpolated over: " + ", ".join(f"{f / 1e6:.3f}" for f in np.asarray(frequencies)[rejected]) + " MHz")
+        return cls(frequencies, settle, offsets, dc, phase, gain)
+
+    def index(self, frequency):
+        """Index of the calibration point nearest to frequency."""
+        i = int(np.searchsorted(self.frequencies, frequency))
+        if i == 0 or i == len(self.frequencies):
+            return min(i, len(self.frequencies) - 1)
+        return i - 1 if abs(frequency - self.frequencies[i - 1]) <= abs(self.frequencies[i] - frequency) else i
+
+    def settle(self, frequency):
+        return int(self.settle_samples[self.index(frequency)]) if len(self.frequencies) else 0
+
+    def correct(self, samples, frequency):
+        """Remove DC and IQ imbalance and flatten the gain of complex64 samples in place."""
+        if not len(self.frequencies):
+            return samples
+        k = self.index(frequency)
+        samples -= np.complex64(self.dc_offset[k])
+        iq = samples.view(np.float32).reshape(-1, 2)
+        iq[:, 1] -= np.float32(self.iq_phase[k]) * iq[:, 0]
+        iq[:, 1] *= np.float32(self.iq_gain[k])
+        samples *= np.float32(10 ** (-self.gain_offset_db[k] / 20))
+        return samples
+
+    def to_dict(self):
+        return {"frequencies": self.frequencies.tolist(), "settle_samples": self.settle_samples.tolist(),
+                "gain_offset_db": self.gain_offset_db.tolist(),
+                "dc_offset": np.column_stack([self.dc_offset.real, self.dc_offset.imag]).tolist(),
+                "iq_phase": self.iq_phase.tolist(), "iq_gain": self.iq_gain.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        dc = np.array(data["dc_offset"], dtype=np.float64).reshape(-1, 2)
+        return cls(data["frequencies"], data["settle_samples"], data["gain_offset_db"],
+                   dc[:, 0] + 1j * dc[:, 1], data["iq_phase"], data["iq_gain"])
+
+class CalibrationCache:
+    def __init__(self, path="data/calibration.json"):
+        """JSON file of DeviceCalibrations keyed by calibration_key (device serial + settings)."""
+        self.path = path
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def get(self, serial, config):
+        """The cached calibration for this device and settings, or None."""
+        entry = self._load().get(calibration_key(serial, config))
+        return DeviceCalibration.from_dict(entry) if entry else None
+
+    def put(self, serial, config, calibration):
+        entries = self._load()
+        entries[calibration_key(serial, config)] = {**calibration.to_dict(), "serial": serial, "created": time.time()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
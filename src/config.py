@@ -1,6 +1,9 @@
+import functools
 import json
 import os
 
+import numpy as np
+
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "../config.json")
 BANDS_PATH = os.path.join(os.path.dirname(__file__), "data/psm1000_bands.json")
 
@@ -8,7 +11,7 @@ def load_config():
     """Load configuration from config.json in the project root."""
     with open(CONFIG_PATH, "r") as f:
         config_data = json.load(f)
-    
+
     # Ensure test_mode exists in the config
     if "test_mode" not in config_data:
         config_data["test_mode"] = False  # Default to False if not specified
@@ -23,20 +26,60 @@ def load_bands():
         return bands_data["bands"]
     return bands_data
 
-CONFIG = load_config()
-BANDS = load_bands()
+class BandRegistry:
+    def __init__(self, bands):
+        """
+        PSM 1000 bands indexed by name and by frequency range.
+        covering(freq) answers "which bands cover this frequency" with a binary search over the
+        band start frequencies instead of scanning every band.
+        """
+        self.bands = list(bands)
+        self.by_name = {b["band"]: b for b in self.bands}
+        order = sorted(range(len(self.bands)), key=lambda i: self.bands[i]["frequency_range_hz"]["start"])
+        self._sorted = [self.bands[i] for i in order]
+        self.starts = np.array([b["frequency_range_hz"]["start"] for b in self._sorted], dtype=np.float64)
+        self.ends = np.array([b["frequency_range_hz"]["end"] for b in self._sorted], dtype=np.float64)
+        # Running max of end frequencies: bands left of the first index whose max end reaches freq can't cover it.
+        self.max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def __iter__(self):
+        return iter(self.bands)
+
+    def __len__(self):
+        return len(self.bands)
 
-# Band override
-if "selected_band" in CONFIG:
-    selected_band_name = CONFIG["selected_band"]
-    print(f"🔍 Looking for band: {selected_band_name}")
-    band = next((b for b in BANDS if b["band"] == selected_band_name), None)
+    def get(self, name):
+        """The band named name, or None."""
+        return self.by_name.get(name)
+
+    def covering(self, frequency):
+        """Bands whose frequency range contains frequency (Hz), lowest start first."""
+        hi = int(np.searchsorted(self.starts, frequency, side="right"))
+        lo = int(np.searchsorted(self.max_ends, frequency, side="left"))
+        return [self._sorted[i] for i in range(lo, hi) if self.ends[i] >= frequency]
+
+@functools.lru_cache(maxsize=None)
+def get_bands():
+    """The band registry, loaded from psm1000_bands.json on first use."""
+    return BandRegistry(load_bands())
+
+@functools.lru_cache(maxsize=None)
+def get_config():
+    """
+    The configuration, loaded once on first use. If "selected_band" names a known band, its
+    range overrides start_frequency/end_frequency (the bands file is only read in that case).
+    """
+    config = load_config()
+    band = get_bands().get(config["selected_band"]) if "selected_band" in config else None
     if band:
-        print(f"✅ Band found: {band}")
-        CONFIG["start_frequency"] = band["frequency_range_hz"]["start"]
-        CONFIG["end_frequency"] = band["frequency_range_hz"]["end"]
-        print(f"🎯 Overridden CONFIG: {CONFIG}")
-    else:
-        print(f"⚠️ Warning: Selected band '{selected_band_name}' not found in psm1000_bands.json!")
-
-print(f"📜 FINAL CONFIG: {CONFIG}")
+        config["start_frequency"] = band["frequency_range_hz"]["start"]
+        config["end_frequency"] = band["frequency_range_hz"]["end"]
+    return config
+
+def __getattr__(name):
+    # CONFIG and BANDS are still importable, but only loaded when first accessed.
+    if name == "CONFIG":
+        return get_config()
+    if name == "BANDS":
+        return get_bands().bands
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+IEM frequency coordination against intermodulation and the measured spectrum.
+
+    python src/coordination.py --band ALL --channels 24          # uses data/max_scan.csv
+    python src/coordination.py --band G10 --channels 16 --scan data/recent_scan.csv
+
+Channels are placed on the transmitter tuning grid inside the band so that no 2-tone 3rd
+order (2f1 - f2), 2-tone 5th order (3f1 - 2f2) or 3-tone 3rd order (f1 + f2 - f3) product
+of the set lands near any channel of the set, and no channel sits on an occupied bin of the
+measured spectrum.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+COORDINATION_PATH = os.path.join("data", "coordinated_channels.csv")
+
+class IntermodCoordinator:
+    def __init__(self, config):
+        """
+        Greedy, vectorized channel coordinator. Everything lives on the integer tuning grid
+        ("coord_tuning_step_hz", default 25 kHz), so every product is a grid index and the
+        "is this near a channel" test is one lookup into a keepout mask. Each greedy step
+        evaluates all remaining candidates at once; a candidate passes when
+          - it is clear of the measured spectrum and of the products of the channels so far
+            (blocked mask, updated as channels are added), and
+          - none of the new products it would create lands near a chosen channel.
+        Spacings (Hz, a product closer than this to a channel is a hit; 0 disables a check):
+          - "coord_channel_spacing_hz": between channels (default 350 kHz)
+          - "coord_im3_spacing_hz": 2-tone 3rd order (default 100 kHz)
+          - "coord_im5_spacing_hz": 2-tone 5th order (default 50 kHz)
+          - "coord_im3_3tone_spacing_hz": 3-tone 3rd order (default 50 kHz)
+          - "coord_occupied_spacing_hz": from occupied bins (default 100 kHz), i.e. bins above
+            "coord_occupied_dbm" (default -85 dBm)
+        Several attempts ("coord_attempts") run in different candidate orders; the first goes
+        low to high, the rest are shuffled with "coord_seed".
+        """
+        self.step = float(config.get("coord_tuning_step_hz", 25000))
+        self.channel_spacing = self.cells(config.get("coord_channel_spacing_hz", 350000))
+        self.im3_spacing = self.cells(config.get("coord_im3_spacing_hz", 100000))
+        self.im5_spacing = self.cells(config.get("coord_im5_spacing_hz", 50000))
+        self.im3_3tone_spacing = self.cells(config.get("coord_im3_3tone_spacing_hz", 50000))
+        self.occupied_spacing = self.cells(config.get("coord_occupied_spacing_hz", 100000))
+        self.occupied_dbm = config.get("coord_occupied_dbm", -85.0)
+        self.attempts = config.get("coord_attempts", 8)
+        self.seed = config.get("coord_seed", 0)
+        self.chunk = 512  # candidates evaluated per vectorized check
+
+    def cells(self, hz):
+        """A spacing in Hz as a whole number of grid cells (a product this many cells away still hits); -1 if disabled."""
+        return int(np.ceil(hz / self.step)) - 1 if hz > 0 else -1
+
+    def grid(self, start_freq, end_freq):
+        """Tuning grid (Hz) covering [start_freq, end_freq]."""
+        first = np.ceil(start_freq / self.step) * self.step
+        return np.arange(first, end_freq + self.step / 2, self.step)
+
+    def dilate(self, mask, indices, width):
+        """Set mask within width cells of every index; indices off the grid are ignored."""
+        if width < 0 or not len(indices):
+            return
+        cells = (np.asarray(indices, dtype=np.int64)[:, None] + np.arange(-width, width + 1)).ravel()
+        mask[cells[(cells >= 0) & (cells < len(mask))]] = True
+
+    def occupied(self, grid, frequencies, power_dbm):
+        """Grid cells within coord_occupied_spacing_hz of a measured bin above coord_occupied_dbm."""
+        mask = np.zeros(len(grid), dtype=bool)
+        if frequencies is None or not len(frequencies):
+            return mask
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        hot = frequencies[np.asarray(power_dbm, dtype=np.float64) > self.occupied_dbm]
+        self.dilate(mask, np.rint((hot - grid[0]) / self.step).astype(np.int64), max(self.occupied_spacing, 0))
+        return mask
+
+    def products(self, candidates, chosen):
+        """
+        Products each candidate would form with the chosen channels, grouped by spacing:
+        [(width, (len(candidates), n) grid indices), ...]. 3-tone products with two chosen
+        channels are (c + a - b) and (a + b - c).
+        """
+        c = candidates[:, None]
+        groups = []
+        if self.im3_spacing >= 0:
+            groups.append((self.im3_spacing, np.hstack([2 * c - chosen, 2 * chosen - c])))
+        if self.im5_spacing >= 0:
+            groups.append((self.im5_spacing, np.hstack([3 * c - 2 * chosen, 3 * chosen - 2 * c])))
+        if self.im3_3tone_spacing >= 0 and len(chosen) >= 2:
+            a, b = np.triu_indices(len(chosen), 1)
+            differences = np.concatenate([chosen[a] - chosen[b], chosen[b] - chosen[a]])
+            sums = chosen[a] + chosen[b]
+            groups.append((self.im3_3tone_spacing, np.hstack([c + differences, sums - c])))
+        return groups
+
+    def conflicts(self, candidates, chosen, keepouts):
+        """True for candidates whose new products would land near a chosen channel (or the candidate itself)."""
+        bad = np.zeros(len(candidates), dtype=bool)
+        if not len(chosen):
+            return bad
+        for width, products in self.products(candidates, chosen):
+            size = len(keepouts[width])
+            inside = (products >= 0) & (products < size)
+            bad |= (keepouts[width][np.clip(products, 0, size - 1)] & inside).any(axis=1)
+            bad |= (np.abs(products - candidates[:, None]) <= width).any(axis=1)
+        return bad
+
+    def add(self, channel, chosen, blocked, keepouts):
+        """Block the new channel's spacing and products, and extend the keepouts around it."""
+        self.dilate(blocked, [channel], max(self.channel_spacing, 0))
+        for width, products in self.products(np.array([channel]), chosen):
+            self.dilate(blocked, products[0], width)
+        for width, mask in keepouts.items():
+            self.dilate(mask, [channel], width)
+
+    def run(self, num_channels, free, order):
+        """One greedy attempt: first candidate in order that passes, until num_channels or none left."""
+        blocked = ~free
+        keepouts = {width: np.zeros(len(free), dtype=bool)
+                    for width in {self.im3_spacing, self.im5_spacing, self.im3_3tone_spacing} if width >= 0}
+        chosen = np.empty(0, dtype=np.int64)
+        while len(chosen) < num_channels:
+            remaining = order[~blocked[order]]
+            pick = None
+            for lo in range(0, len(remaining), self.chunk):
+                candidates = remaining[lo:lo + self.chunk]
+                passing = np.flatnonzero(~self.conflicts(candidates, chosen, keepouts))
+                if len(passing):
+                    pick = int(candidates[passing[0]])
+                    break
+                blocked[candidates] = True  # only gets worse as channels are added
+            if pick is None:
+                break
+            self.add(pick, chosen, blocked, keepouts)
+            chosen = np.append(chosen, pick)
+        return np.sort(chosen)
+
+    def coordinate(self, num_channels, start_freq, end_freq, frequencies=None, power_dbm=None):
+        """
+        Candidate channel sets (Hz) for num_channels IEMs in [start_freq, end_freq], best first
+        (most channels, then earliest attempt). frequencies/power_dbm is the measured spectrum
+        in dBm (e.g. the max-hold); without it only intermod is considered.
+        """
+        grid = self.grid(start_freq, end_freq)
+        free = ~self.occupied(grid, frequencies, power_dbm)
+        rng = np.random.default_rng(self.seed)
+        sets = {}
+        for attempt in range(max(self.attempts, 1)):
+            order = np.arange(len(grid)) if attempt == 0 else rng.permutation(len(grid))
+            chosen = tuple(self.run(num_channels, free, order))
+            sets.setdefault(chosen, attempt)
+        ranked = sorted(sets.items(), key=lambda item: (-len(item[0]), item[1]))
+        return [grid[list(chosen)].tolist() for chosen, _ in ranked]
+
+    def check(self, channels):
+        """
+        Every intermod hit in a channel set (Hz), for validating a set from anywhere (WWB,
+        a previous show). Returns dicts with the kind, the product frequency and the victim.
+        """
+        channels = np.sort(np.asarray(channels, dtype=np.float64))
+        n = len(channels)
+        hits = []
+        i, j = np.nonzero(~np.eye(n, dtype=bool))
+        a, b = np.triu_indices(n, 1)
+        checks = [("spacing", self.channel_spacing, channels[a], a, b)]
+        if self.im3_spacing >= 0:
+            checks.append(("im3", self.im3_spacing, 2 * channels[i] - channels[j], i, j))
+        if self.im5_spacing >= 0:
+            checks.append(("im5", self.im5_spacing, 3 * channels[i] - 2 * channels[j], i, j))
+        if self.im3_3tone_spacing >= 0 and n >= 3:
+            p, q, r = (x.ravel() for x in np.meshgrid(np.arange(n), np.arange(n), np.arange(n), indexing="ij"))
+            keep = (p < q) & (r != p) & (r != q)
+            p, q, r = p[keep], q[keep], r[keep]
+            checks.append(("im3_3tone", self.im3_3tone_spacing, channels[p] + channels[q] - channels[r], p, r))
+        for kind, width, products, sources, others in checks:
+            if kind == "spacing":
+                close = np.abs(channels[others] - products) <= width * self.step
+                hits.extend({"kind": kind, "frequency": float(f), "victim": float(channels[v])}
+                            for f, v in zip(products[close], others[close]))
+                continue
+            distance = np.abs(products[:, None] - channels[None, :])
+            for row, victim in zip(*np.nonzero(distance <= width * self.step)):
+                hits.append({"kind": kind, "frequency": float(products[row]), "victim": float(channels[victim])})
+        return hits
+
+def write_channels(path, channels):
+    """Write a channel list as one frequency per line in MHz (3 decimals), WWB's inclusion-list format."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savetxt(path, np.round(np.asarray(channels) / 1e6, 3), fmt="%.3f")
+
+def main(argv=None):
+    from config import get_bands, get_config
+
+    parser = argparse.ArgumentParser(description="Coordinate IEM channels against intermod and a measured scan.")
+    parser.add_argument("--band", help="band from psm1000_bands.json (default: selected_band)")
+    parser.add_argument("--channels", type=int, default=None, help="number of channels (default: coord_channels)")
+    parser.add_argument("--scan", default=os.path.join("data", "max_scan.csv"), help="WWB CSV of the measured spectrum")
+    parser.add_argument("--output", default=COORDINATION_PATH, help="where to write the channel list")
+    args = parser.parse_args(argv)
+
+    config = get_config()
+    band = get_bands().get(args.band or config.get("selected_band"))
+    if band is None:
+        print(f"❌ Error: Band '{args.band or config.get('selected_band')}' not found in psm1000_bands.json.")
+        return 1
+    num_channels = args.channels or config.get("coord_channels", 16)
+    frequencies = power_dbm = None
+    if os.path.exists(args.scan):
+        scan = np.loadtxt(args.scan, delimiter=",", ndmin=2)
+        frequencies, power_dbm = scan[:, 0] * 1e6, scan[:, 1]
+    else:
+        print(f"⚠️ No scan at {args.scan}; coordinating against intermod only.")
+
+    started = time.perf_counter()
+    sets = IntermodCoordinator(config).coordinate(num_channels, band["frequency_range_hz"]["start"],
+                                                  band["frequency_range_hz"]["end"], frequencies, power_dbm)
+    print(f"🎛️ {len(sets[0])} of {num_channels} channels in band {band['band']} "
+          f"({len(sets)} candidate set(s), {time.perf_counter() - started:.2f} s)")
+    for freq in sets[0]:
+        print(f"  {freq / 1e6:.3f} MHz")
+    write_channels(args.output, sets[0])
+    print(f"✅ Channel list written to {args.output}")
+    return 0 if len(sets[0]) == num_channels else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
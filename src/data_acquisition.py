@@ -1,61 +1,209 @@
-from rtlsdr import RtlSdr
+import functools
+import os
 import numpy as np
 import time
-from rtlsdr.rtlsdr import LibUSBError
+
+from calibration import CalibrationCache, DeviceCalibration, device_serial
+from iq_recorder import IQRecorder
+from profiling import PROFILER
+from sdr_backends import create_sdr
+
+@functools.lru_cache(maxsize=None)
+def usb_error():
+    """pyrtlsdr's LibUSBError, imported on the first scan error rather than at startup."""
+    try:
+        from rtlsdr.rtlsdr import LibUSBError
+        return LibUSBError
+    except ImportError:
+        # pyrtlsdr or librtlsdr missing: only the simulator/replay backends or an injected sdr can be used.
+        return IOError
 
 class DataAcquisition:
-    def __init__(self, config):
+    def __init__(self, config, sdr=None):
+        """
+        Opens the SDR backend selected by config "sdr_backend" (see sdr_backends.create_sdr)
+        and applies the configured settings.
+        sdr: optional object exposing the pyrtlsdr interface (center_freq, read_samples, stream, ...)
+             to use instead of opening a backend, e.g. a fake that replays recorded IQ.
+        """
         self.config = config
-        self.test_mode = config.get("test_mode", False)
+        self.test_mode = config.get("test_mode", False) and sdr is None
+        self.verbose = config.get("verbose", False)  # per-step console output
 
-        if not self.test_mode:
-            self.sdr = RtlSdr()
+        if sdr is None:
+            # Test mode always runs against the deterministic simulator.
+            sdr = create_sdr({**config, "sdr_backend": "simulator"} if self.test_mode else config)
+        self.sdr = sdr
 
-            # Apply initial SDR settings
-            self.sdr.sample_rate = config["sample_rate"]
-            self.sdr.gain = config["gain"]
-            self.sdr.freq_correction = config["freq_correction"]
+        # Apply initial SDR settings
+        self.sdr.sample_rate = config["sample_rate"]
+        self.sdr.gain = config["gain"]
+        self.sdr.freq_correction = config["freq_correction"]
 
-    def scan(self, frequency):
-        """Grab IQ samples from RTL-SDR or return simulated data in test mode."""
-        if self.test_mode:
-            print(f"🧪 Test Mode: Simulating scan at {frequency / 1e6:.3f} MHz")
-            iq_samples = np.random.normal(0, 0.1, self.config["samples_per_scan"]) + \
-                         1j * np.random.normal(0, 0.1, self.config["samples_per_scan"])
-            return frequency, iq_samples.astype(np.complex64)
+        # Per-frequency settle/DC/IQ/gain corrections, measured once per device and settings.
+        self.calibration = self.load_calibration() if config.get("use_calibration", False) else None
+
+        # With "iq_record_directory", every step's IQ (after corrections) is recorded for offline reprocessing.
+        self.recorder = self.open_recorder() if config.get("iq_record_directory") else None
+
+        # Last frequency scan() asked the tuner for. The tuner reports back a rounded frequency
+        # (pyrtlsdr: to the kHz), so "already parked" is decided on the request, not the readback.
+        self.tuned_frequency = None
+
+    def open_recorder(self):
+        """A SigMF IQ recorder named after the start time and device serial, sized for one pass."""
+        serial = device_serial(self.sdr, self.config)
+        name = f"iq_{time.strftime('%Y%m%d_%H%M%S')}_{serial}.sigmf-data"
+        recorder = IQRecorder(os.path.join(self.config["iq_record_directory"], name), self.config["samples_per_scan"],
+                              self.config["sample_rate"], capacity_steps=len(self.frequency_list()),
+                              metadata={"core:hw": serial, "rfscanner:gain": self.config["gain"],
+                                        "rfscanner:freq_correction": self.config["freq_correction"],
+                                        "rfscanner:corrected": self.calibration is not None})
+        print(f"⏺️ Recording IQ to {recorder.path}")
+        return recorder
+
+    def calibration_frequencies(self):
+        """At most "calibration_points" (default 32) frequencies spread evenly over the scan range."""
+        frequencies = self.frequency_list()
+        count = min(len(frequencies), self.config.get("calibration_points", 32))
+        return frequencies[np.linspace(0, len(frequencies) - 1, count).round().astype(int)]
 
+    def load_calibration(self, recalibrate=False):
+        """
+        Load this device's calibration from "calibration_cache" (default data/calibration.json),
+        measuring and caching it first if there is none for the current settings.
+        """
+        cache = CalibrationCache(self.config.get("calibration_cache", "data/calibration.json"))
+        serial = device_serial(self.sdr, self.config)
+        calibration = None if recalibrate else cache.get(serial, self.config)
+        if calibration is None:
+            print(f"📏 Calibrating {serial} at {len(self.calibration_frequencies())} frequencies...")
+            calibration = DeviceCalibration.measure(self.sdr, self.config, self.calibration_frequencies())
+            cache.put(serial, self.config, calibration)
+        return calibration
+
+    def scan(self, frequency):
+        """Grab IQ samples from the SDR backend (the simulator in test mode)."""
         max_retries = 3  # Number of attempts before giving up
-        retry_delay = 1  # Seconds to wait before retrying
+        retry_delay = self.config.get("usb_retry_delay", 0.25)  # Seconds before the first retry, doubled each time
 
         for attempt in range(max_retries):
             try:
-                self.sdr.center_freq = frequency
-                print(f"[DataAcquisition] Scanning {self.sdr.center_freq / 1e6:.3f} MHz...")
+                # Parked on the frequency already (dwell mode): no retune, so nothing to settle either.
+                retune = frequency != self.tuned_frequency
+                if retune:
+                    with PROFILER.stage("tune"):
+                        self.sdr.center_freq = frequency
+                    self.tuned_frequency = frequency
+                if self.verbose:
+                    print(f"[DataAcquisition] Scanning {self.sdr.center_freq / 1e6:.3f} MHz...")
 
-                iq_samples = self.sdr.read_samples(self.config["samples_per_scan"])  # Get real samples
-                iq_samples = np.array(iq_samples, dtype=np.complex64)  # Ensure NumPy format
+                settle = self.calibration.settle(frequency) if self.calibration and retune else 0
+                if settle:
+                    with PROFILER.stage("settle"):
+                        self.sdr.read_samples(settle)  # Discard the retune transient
+                with PROFILER.stage("read_samples"):
+                    iq_samples = self.sdr.read_samples(self.config["samples_per_scan"])  # Get real samples
+                    iq_samples = np.array(iq_samples, dtype=np.complex64)  # Ensure NumPy format
+                if self.calibration:
+                    with PROFILER.stage("calibration"):
+                        self.calibration.correct(iq_samples, frequency)
+                if self.recorder is not None:
+                    with PROFILER.stage("record"):
+                        self.recorder.record(self.sdr.center_freq, iq_samples)
 
                 return self.sdr.center_freq, iq_samples
 
-            except LibUSBError as e:
+            except usb_error() as e:
+                self.tuned_frequency = None  # the tuner state is unknown; retune on the next attempt
                 print(f"⚠️ SDR USB Error: {e}. Attempt {attempt + 1} of {max_retries}")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)  # Wait before retrying
+                    time.sleep(retry_delay * 2 ** attempt)  # Wait before retrying
                 else:
                     print(f"❌ Failed to set frequency {frequency / 1e6:.3f} MHz after {max_retries} attempts.")
                     return frequency, np.zeros(self.config["samples_per_scan"], dtype=np.complex64)  # Return empty samples on failure
 
-    def scan_range(self):
-        """Scan from start_frequency to end_frequency in steps."""
+    def frequency_list(self):
+        """Center frequencies visited by scan_range, from start_frequency to end_frequency in steps."""
         start_freq = self.config["start_frequency"]
         end_freq = self.config["end_frequency"]
         step = self.config["frequency_step"]
+        if self.config.get("stitch_spectrum", False):
+            # Centre each capture on its step so the stitched usable bandwidths tile the whole range.
+            return np.arange(start_freq + step // 2, end_freq + step // 2, step)
+        return np.arange(start_freq, end_freq, step)
 
-        frequency_list = np.arange(start_freq, end_freq, step)
-        for freq in frequency_list:
+    def scan_range(self, frequencies=None):
+        """Scan from start_frequency to end_frequency in steps (or just the given frequencies)."""
+        for freq in (self.frequency_list() if frequencies is None else frequencies):
             yield self.scan(freq)  # Yield each scan result
 
+    @staticmethod
+    def bytes_to_iq(raw, out=None):
+        """
+        Convert RTL-SDR interleaved unsigned 8-bit I/Q to complex64 scaled to [-1, 1].
+        The raw buffer is viewed in place (no copy); the only write is the conversion into `out`
+        (allocated if not given or the wrong size).
+        """
+        raw = np.frombuffer(raw, dtype=np.uint8)
+        if out is None or len(out) * 2 != len(raw):
+            out = np.empty(len(raw) // 2, dtype=np.complex64)
+        interleaved = out.view(np.float32)
+        np.subtract(raw, 127.5, out=interleaved, casting="unsafe")
+        interleaved *= 1 / 127.5
+        return out
+
+    def _drop_queued(self, stream):
+        """Discard chunks the stream buffered before a retune; they belong to the previous frequency."""
+        pending = getattr(stream, "queue", None)
+        while pending is not None and not pending.empty():
+            pending.get_nowait()
+            pending.task_done()
+
+    async def scan_range_async(self, frequencies=None):
+        """
+        Async alternative to scan_range built on pyrtlsdr's streaming API (sdr.stream / sdr.stop).
+        One stream runs for the whole sweep; after each retune the chunks already queued plus
+        "settle_samples" (default: one capture; the calibrated settle time with "use_calibration")
+        are discarded before the capture is taken.
+        Yields (frequency, samples) where samples is a complex64 buffer that is overwritten on the
+        next step; copy it to keep it.
+        """
+        frequencies = self.frequency_list() if frequencies is None else frequencies
+        num_samples = self.config["samples_per_scan"]
+        settle_chunks = -(-self.config.get("settle_samples", num_samples) // num_samples)
+        samples = np.empty(num_samples, dtype=np.complex64)
+
+        # Each chunk is exactly one capture: two bytes (I and Q) per sample.
+        stream = self.sdr.stream(2 * num_samples, format="bytes")
+        try:
+            for freq in frequencies:
+                with PROFILER.stage("tune"):
+                    self.sdr.center_freq = freq
+                    self.tuned_frequency = None  # scan() retunes after a streamed sweep
+                    self._drop_queued(stream)
+                if self.calibration:
+                    settle_chunks = -(-self.calibration.settle(freq) // num_samples)
+                started = time.perf_counter()
+                for _ in range(settle_chunks):
+                    await stream.__anext__()
+                PROFILER.record("settle", time.perf_counter() - started)
+                started = time.perf_counter()
+                chunk = await stream.__anext__()
+                PROFILER.record("read_samples", time.perf_counter() - started)
+                self.bytes_to_iq(chunk, out=samples)
+                if self.calibration:
+                    self.calibration.correct(samples, freq)
+                if self.recorder is not None:
+                    with PROFILER.stage("record"):
+                        self.recorder.record(self.sdr.center_freq, samples)
+                yield self.sdr.center_freq, samples
+        finally:
+            await self.sdr.stop()
+
     def close(self):
-        """Clean up SDR resources if not in test mode."""
-        if not self.test_mode:
-            self.sdr.close()
+        """Clean up SDR resources and finish the IQ recording."""
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"⏺️ {len(self.recorder.captures)} IQ captures saved to {self.recorder.path}")
+        self.sdr.close()
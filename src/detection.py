@@ -0,0 +1,152 @@
+import numpy as np
+
+from signal_processing import POWER_FLOOR
+
+# How the training cells either side of a bin are combined into its noise estimate:
+# "ca" averages both sides, "so" takes the smaller side so a neighbouring carrier does not mask it.
+CFAR_MODES = ("ca", "so")
+
+def cfar_noise(power_db, guard_bins=4, training_bins=16, mode="so"):
+    """
+    Per-bin noise estimate (dB) from the training_bins bins on each side of every bin, skipping
+    guard_bins next to it. Window sums come from one cumulative sum, so this is O(bins).
+    """
+    linear = 10 ** (np.asarray(power_db, dtype=np.float64) / 10)
+    cumulative = np.concatenate(([0.0], np.cumsum(linear)))
+    n = len(linear)
+    index = np.arange(n)
+
+    def window(lo, hi):
+        lo, hi = np.clip(lo, 0, n), np.clip(hi, 0, n)
+        return cumulative[hi] - cumulative[lo], hi - lo
+
+    left_sum, left_count = window(index - guard_bins - training_bins, index - guard_bins)
+    right_sum, right_count = window(index + guard_bins + 1, index + guard_bins + training_bins + 1)
+    if mode == "so":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            left = np.where(left_count > 0, left_sum / np.maximum(left_count, 1), np.inf)
+            right = np.where(right_count > 0, right_sum / np.maximum(right_count, 1), np.inf)
+        noise = np.minimum(left, right)
+    else:
+        noise = (left_sum + right_sum) / np.maximum(left_count + right_count, 1)
+    return 10 * np.log10(np.maximum(noise, POWER_FLOOR))
+
+def cluster_bins(frequencies, power_db, mask):
+    """
+    Group runs of adjacent detected bins into carriers.
+    Returns dicts with frequency (power-weighted centre), bandwidth (Hz, at least one bin),
+    power_db (peak) and the bin range [start, stop).
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    power_db = np.asarray(power_db, dtype=np.float64)
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if not len(starts):
+        return []
+    bin_width = np.median(np.diff(frequencies)) if len(frequencies) > 1 else 0.0
+
+    linear = 10 ** (power_db / 10)
+    weighted = np.concatenate(([0.0], np.cumsum(linear * frequencies)))
+    total = np.concatenate(([0.0], np.cumsum(linear)))
+    centres = (weighted[stops] - weighted[starts]) / (total[stops] - total[starts])
+    # Runs never touch, so reducing over [start0, stop0, start1, stop1, ...] gives each run's peak at even slots.
+    bounds = np.column_stack([starts, stops]).ravel()
+    peaks = np.maximum.reduceat(np.append(power_db, -np.inf), bounds)[::2]
+    return [{"frequency": float(c), "bandwidth": float(frequencies[b - 1] - frequencies[a] + bin_width),
+             "power_db": float(p), "start": int(a), "stop": int(b)}
+            for c, a, b, p in zip(centres, starts, stops, peaks)]
+
+class CarrierDetector:
+    def __init__(self, config):
+        """
+        Finds carriers in each sweep and tracks them across sweeps, emitting appear/disappear events.
+        Uses from config:
+          - "cfar_guard_bins" (4), "cfar_training_bins" (16), "cfar_mode" ("so", default, or "ca";
+            smallest-of keeps wide carriers and adjacent channels from masking themselves)
+          - "cfar_offset_db": a bin is detected this far above its CFAR noise estimate (default 10)
+          - "detect_hysteresis_db": a carrier already being tracked stays detected down to
+            offset - hysteresis (default 3)
+          - "detect_confirm_sweeps": sweeps in a row a new carrier must be seen before it appears (2)
+          - "detect_drop_sweeps": sweeps in a row a carrier must be missing before it disappears (3)
+          - "detect_match_hz": how far a carrier may move and still be the same track (100 kHz)
+        Power must be in dB (dBFS or dBm).
+        """
+        self.guard_bins = config.get("cfar_guard_bins", 4)
+        self.training_bins = config.get("cfar_training_bins", 16)
+        self.mode = config.get("cfar_mode", "so")
+        self.offset_db = config.get("cfar_offset_db", 10.0)
+        self.hysteresis_db = config.get("detect_hysteresis_db", 3.0)
+        self.confirm_sweeps = config.get("detect_confirm_sweeps", 2)
+        self.drop_sweeps = config.get("detect_drop_sweeps", 3)
+        self.match_hz = config.get("detect_match_hz", 100000)
+        if self.mode not in CFAR_MODES:
+            raise ValueError(f"Unknown cfar_mode '{self.mode}'. Choose one of: {', '.join(CFAR_MODES)}")
+
+        self.tracks = []  # dicts: id, frequency, bandwidth, power_db, hits, misses, active
+        self.next_id = 1
+
+    def detect(self, frequencies, power_db, offset_db=None):
+        """Carriers in one sweep (see cluster_bins) at offset_db (default cfar_offset_db) above the noise."""
+        power_db = np.asarray(power_db, dtype=np.float64)
+        noise = cfar_noise(power_db, self.guard_bins, self.training_bins, self.mode)
+        offset_db = self.offset_db if offset_db is None else offset_db
+        carriers = cluster_bins(frequencies, power_db, power_db > noise + offset_db)
+        for carrier in carriers:
+            carrier["snr_db"] = float(carrier["power_db"] - noise[carrier["start"]:carrier["stop"]].min())
+        return carriers
+
+    def _event(self, kind, track, timestamp):
+        return {"type": kind, "timestamp": timestamp, "id": track["id"], "frequency": track["frequency"],
+                "bandwidth": track["bandwidth"], "power_db": track["power_db"]}
+
+    def update(self, timestamp, frequencies, power_db):
+        """Detect carriers in a sweep, update the tracks and return the events this sweep caused."""
+        # Detect at the lower (hold) threshold; only carriers above the full offset may start a track.
+        carriers = self.detect(frequencies, power_db, self.offset_db - self.hysteresis_db)
+        unmatched = list(range(len(carriers)))
+        events = []
+
+        # Nearest-first matching of existing tracks to this sweep's carriers.
+        pairs = sorted((abs(t["frequency"] - carriers[c]["frequency"]), ti, c)
+                       for ti, t in enumerate(self.tracks) for c in unmatched)
+        matched_tracks = set()
+        for distance, ti, c in pairs:
+            track = self.tracks[ti]
+            if ti in matched_tracks or c not in unmatched:
+                continue
+            if distance > max(self.match_hz, track["bandwidth"] / 2):
+                continue
+            matched_tracks.add(ti)
+            unmatched.remove(c)
+            track.update(frequency=carriers[c]["frequency"], bandwidth=carriers[c]["bandwidth"],
+                         power_db=carriers[c]["power_db"], hits=track["hits"] + 1, misses=0)
+            if not track["active"] and track["hits"] >= self.confirm_sweeps:
+                track["active"] = True
+                events.append(self._event("appear", track, timestamp))
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track["misses"] += 1
+        for track in self.tracks:
+            if track["misses"] >= self.drop_sweeps and track["active"]:
+                events.append(self._event("disappear", track, timestamp))
+        # Tentative tracks are dropped on their first miss; active ones after drop_sweeps misses.
+        self.tracks = [t for t in self.tracks
+                       if (t["active"] and t["misses"] < self.drop_sweeps) or (not t["active"] and t["misses"] == 0)]
+
+        for c in unmatched:
+            carrier = carriers[c]
+            if carrier["snr_db"] < self.offset_db:
+                continue
+            track = {"id": self.next_id, "frequency": carrier["frequency"], "bandwidth": carrier["bandwidth"],
+                     "power_db": carrier["power_db"], "hits": 1, "misses": 0, "active": self.confirm_sweeps <= 1}
+            self.next_id += 1
+            self.tracks.append(track)
+            if track["active"]:
+                events.append(self._event("appear", track, timestamp))
+        return events
+
+    def active_carriers(self):
+        """Currently confirmed carriers, lowest frequency first."""
+        return sorted((self._event("active", t, None) for t in self.tracks if t["active"]),
+                      key=lambda c: c["frequency"])
@@ -0,0 +1,113 @@
+import os
+import time
+
+import numpy as np
+
+from coordination import COORDINATION_PATH
+from profiling import PROFILER
+from signal_processing import SignalProcessing
+from stitching import SpectrumStitcher
+
+def plan_centers(targets, usable_bandwidth, margin_hz=0.0):
+    """
+    Fewest tune frequencies whose usable bandwidth covers every target ± margin_hz, filled
+    greedily from the lowest target up. A target too wide for one window gets its own.
+    Centres are rounded to 1 kHz, the resolution pyrtlsdr reports the tuned frequency in.
+    """
+    targets = np.unique(np.asarray(targets, dtype=np.float64))
+    centers = []
+    i = 0
+    while i < len(targets):
+        lo = targets[i] - margin_hz
+        j = max(int(np.searchsorted(targets, lo + usable_bandwidth - margin_hz, side="right")), i + 1)
+        centers.append((lo + targets[j - 1] + margin_hz) / 2)
+        i = j
+    return np.round(centers, -3)
+
+def dwell_targets(config):
+    """
+    Frequencies (Hz) to dwell on: "dwell_range" [start, end] sampled every
+    "dwell_resolution_hz", else "dwell_channels", else the last coordinated channel list
+    (data/coordinated_channels.csv, MHz). Empty if none is set.
+    """
+    if config.get("dwell_range"):
+        start, end = config["dwell_range"]
+        return np.arange(float(start), end + 1.0, float(config.get("dwell_resolution_hz", 1000)))
+    if config.get("dwell_channels"):
+        return np.asarray(config["dwell_channels"], dtype=np.float64)
+    if os.path.exists(COORDINATION_PATH):
+        return np.loadtxt(COORDINATION_PATH, ndmin=1) * 1e6
+    return np.empty(0)
+
+def dwell_config(config):
+    """config with the acquisition and FFT settings of dwell mode (long Welch FFT, several segments per capture)."""
+    fft_size = int(config.get("dwell_fft_size", 65536))
+    return {**config, "fft_size": fft_size, "psd_mode": "welch",
+            "samples_per_scan": fft_size * int(config.get("dwell_segments", 2))}
+
+class DwellScanner:
+    def __init__(self, config, daq, targets):
+        """
+        Zoom mode: instead of sweeping the band, parks on the few centre frequencies that cover
+        targets (e.g. the active IEM channels) and turns each visit into one high-resolution
+        spectrum of just that span, several times a second.
+          - "dwell_fft_size" (default 65536) and "dwell_segments" (default 2): every capture is
+            dwell_fft_size x dwell_segments samples, Welch-averaged (use dwell_config(config)
+            for the DataAcquisition, so it reads captures of that length)
+          - "dwell_margin_hz": span kept either side of each target (default 200 kHz)
+          - "dwell_resolution_hz": grid of the zoomed spectrum (default 1 kHz, never finer than one bin)
+          - "dwell_rate_hz": updates per second, 0 = as fast as possible (default 5)
+        With a single centre the tuner is never touched again (DataAcquisition.scan skips the
+        retune and settle when it last tuned to the same frequency), so updates are
+        back-to-back captures.
+        Has Scanner's run_pass, so the GUI loop and the daemon run it unchanged.
+        """
+        self.config = dwell_config(config)
+        self.daq = daq
+        self.sp = SignalProcessing(self.config)
+        self.rate = config.get("dwell_rate_hz", 5)
+        usable = float(config.get("stitch_usable_fraction", 0.8)) * config["sample_rate"]
+        self.centers = plan_centers(targets, usable, config.get("dwell_margin_hz", 200000))
+        if not len(self.centers):
+            raise ValueError("No dwell targets: set dwell_channels or dwell_range, or coordinate channels first.")
+
+        self.start_freq = float(self.centers[0] - usable / 2)
+        self.end_freq = float(self.centers[-1] + usable / 2)
+        self.stitcher = SpectrumStitcher({**self.config, "start_frequency": self.start_freq,
+                                          "end_frequency": self.end_freq, "frequency_step": 0, "stitch_merge": "max",
+                                          "stitch_resolution_hz": config.get("dwell_resolution_hz", 1000)})
+        self.frequencies = self.stitcher.frequencies
+        self.resolution = self.stitcher.resolution
+        # Grid cells between two non-adjacent windows are not measured; they are drawn at the floor.
+        nearest = np.abs(self.frequencies[:, None] - self.centers[None, :]).min(axis=1)
+        self.covered = nearest <= usable / 2
+        self.captures = np.empty((len(self.centers), self.config["samples_per_scan"]), dtype=np.complex64)
+        self.next_update = 0.0
+
+    @property
+    def update_seconds(self):
+        """Target time between updates (0 when unpaced)."""
+        return 1.0 / self.rate if self.rate and self.rate > 0 else 0.0
+
+    def run_pass(self, on_step=None):
+        """
+        One zoomed spectrum: visit every centre, calling on_step(freq, progress_percent), and
+        stitch the captures. Waits first if the previous update was less than 1/dwell_rate_hz ago.
+        Returns (frequencies, power) with power in dBFS.
+        """
+        wait = self.next_update - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.next_update = max(self.next_update, time.monotonic() - self.update_seconds) + self.update_seconds
+
+        tuned_freqs = np.empty(len(self.centers))
+        for i, center in enumerate(self.centers):
+            tuned_freqs[i], self.captures[i] = self.daq.scan(center)
+            if on_step is not None:
+                on_step(tuned_freqs[i], (i + 1) / len(self.centers) * 100)
+        spectra = self.sp.process_batch(self.captures)
+        with PROFILER.stage("reduce"):
+            frequencies, power = self.stitcher.stitch(tuned_freqs, spectra)
+            if not self.covered.all():
+                power[~self.covered] = power[self.covered].min()
+        return frequencies, power
@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from scan_store import config_hash, parse_timestamp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    band TEXT,
+    config_hash TEXT,
+    city TEXT,
+    venue TEXT,
+    zip_code TEXT,
+    start_frequency REAL,
+    end_frequency REAL,
+    num_points INTEGER,
+    source TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS sweeps_band_time ON sweeps (band, timestamp);
+CREATE INDEX IF NOT EXISTS sweeps_venue_time ON sweeps (venue, timestamp);
+CREATE TABLE IF NOT EXISTS channel_summary (
+    sweep_id INTEGER NOT NULL REFERENCES sweeps (id),
+    channel_hz INTEGER NOT NULL,
+    max_dbm REAL NOT NULL,
+    mean_dbm REAL NOT NULL,
+    PRIMARY KEY (sweep_id, channel_hz)
+) WITHOUT ROWID;
+"""
+
+class ScanHistory:
+    def __init__(self, db_path="scans.db", channel_width=200000):
+        """
+        SQLite index of past sweeps: one row per sweep (time, band, config fingerprint, location,
+        frequency span, source file) plus a per-channel dBm summary (max and mean over each
+        channel_width slice of the sweep). Queries touch only this index, never the raw sweep files.
+        The connection may be used from any thread (the daemon records from its sweep thread);
+        every statement runs under one lock.
+        """
+        self.db_path = db_path
+        self.channel_width = int(channel_width)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def summarize(self, frequencies, power_dbm):
+        """Collapse a sweep to (channel_hz, max_dbm, mean_dbm) arrays, vectorized over all points."""
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        power_dbm = np.asarray(power_dbm, dtype=np.float64)
+        channels = (frequencies // self.channel_width * self.channel_width).astype(np.int64)
+        order = np.argsort(channels, kind="stable")
+        channels, power_dbm = channels[order], power_dbm[order]
+        unique, starts = np.unique(channels, return_index=True)
+        counts = np.diff(np.append(starts, len(channels)))
+        return unique, np.maximum.reduceat(power_dbm, starts), np.add.reduceat(power_dbm, starts) / counts
+
+    def count(self):
+        """Number of indexed sweeps."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sweeps").fetchone()[0]
+
+    def contains(self, source):
+        """True if a sweep from this source (log file path or store reference) is already indexed."""
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM sweeps WHERE source = ?", (source,)).fetchone() is not None
+
+    def record(self, timestamp, frequencies, power_dbm, config=None, location=None, source=None, commit=True):
+        """
+        Index one sweep. power_dbm must already be in dBm (see Logger.power_to_dbm).
+        Returns the new sweep id, or None if source was already indexed.
+        """
+        config = config or {}
+        location = location or {}
+        if len(frequencies) == 0:
+            return None
+        channels, maxes, means = self.summarize(frequencies, power_dbm)
+
+        with self.lock:
+            if source is not None and self.contains(source):
+                return None
+            cursor = self.conn.execute(
+                "INSERT INTO sweeps (timestamp, band, config_hash, city, venue, zip_code, "
+                "start_frequency, end_frequency, num_points, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (parse_timestamp(timestamp), config.get("selected_band"), config_hash(config),
+                 location.get("city", "Unknown"), location.get("venue", "Unknown"), location.get("zip_code", "Unknown"),
+                 float(np.min(frequencies)), float(np.max(frequencies)), len(frequencies), source))
+            sweep_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO channel_summary (sweep_id, channel_hz, max_dbm, mean_dbm) VALUES (?, ?, ?, ?)",
+                zip([sweep_id] * len(channels), channels.tolist(), maxes.tolist(), means.tolist()))
+            if commit:
+                self.conn.commit()
+        return sweep_id
+
+    def commit(self):
+        """Commit records made with commit=False."""
+        with self.lock:
+            self.conn.commit()
+
+    def _filters(self, band, venue, since, until, hours):
+        clauses, params = [], []
+        if band is not None:
+            clauses.append("s.band = ?")
+            params.append(band)
+        if venue is not None:
+            clauses.append("s.venue = ?")
+            params.append(venue)
+        if hours is not None:
+            since = time.time() - hours * 3600
+        if since is not None:
+            clauses.append("s.timestamp >= ?")
+            params.append(parse_timestamp(since))
+        if until is not None:
+            clauses.append("s.timestamp <= ?")
+            params.append(parse_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def sweeps(self, band=None, venue=None, since=None, until=None, hours=None, limit=None):
+        """Indexed sweeps matching the filters, newest first, as dicts."""
+        where, params = self._filters(band, venue, since, until, hours)
+        query = f"SELECT * FROM sweeps s{where} ORDER BY s.timestamp DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self.lock:
+            cursor = self.conn.execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def max_power_per_channel(self, band=None, venue=None, since=None, until=None, hours=None):
+        """
+        Highest dBm seen in each channel across matching sweeps, e.g.
+        max_power_per_channel(band="G10", venue="Red Rocks", hours=6).
+        Returns (channel_hz, max_dbm) arrays sorted by frequency.
+        """
+        where, params = self._filters(band, venue, since, until, hours)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT c.channel_hz, MAX(c.max_dbm) FROM channel_summary c JOIN sweeps s ON s.id = c.sweep_id"
+                f"{where} GROUP BY c.channel_hz ORDER BY c.channel_hz", params).fetchall()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        channels, maxes = zip(*rows)
+        return np.array(channels, dtype=np.int64), np.array(maxes)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
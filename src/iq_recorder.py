@@ -0,0 +1,150 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+SIGMF_VERSION = "1.0.0"
+
+def sigmf_paths(path):
+    """(data path, meta path) for a recording given either file or the base name."""
+    base = path
+    for extension in (".sigmf-data", ".sigmf-meta"):
+        if path.endswith(extension):
+            base = path[:-len(extension)]
+    return base + ".sigmf-data", base + ".sigmf-meta"
+
+class IQRecorder:
+    def __init__(self, path, samples_per_step, sample_rate, capacity_steps=64, metadata=None, meta_interval=1.0):
+        """
+        Records each step's complex64 IQ into a preallocated memory-mapped .sigmf-data file,
+        with a SigMF .sigmf-meta sidecar. Recording a step is a single copy into the map plus
+        one capture entry (core:sample_start, core:frequency, core:datetime); the file doubles
+        in size when capacity_steps is exhausted and is trimmed on close.
+        The sidecar is written when the recording opens and rewritten at most every
+        meta_interval seconds as steps are recorded (and on close), with the number of samples
+        recorded so far, so a crash or Ctrl-C still leaves a readable recording.
+        metadata: extra "global" entries, e.g. {"rfscanner:gain": 20}.
+        The recording plays back through ReplaySDR ("sdr_replay_path") and reads back with
+        IQRecording.
+        """
+        self.path, self.meta_path = sigmf_paths(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.samples_per_step = int(samples_per_step)
+        self.sample_rate = sample_rate
+        self.metadata = metadata or {}
+        self.captures = []
+        self.used = 0
+        self.lock = threading.Lock()  # pipeline workers record from several threads
+        self.capacity = max(int(capacity_steps), 1) * self.samples_per_step
+        self.data = np.memmap(self.path, dtype=np.complex64, mode="w+", shape=(self.capacity,))
+        self.meta_interval = meta_interval
+        self.write_meta()
+
+    def _grow(self, needed):
+        self.data.flush()
+        self.data = None
+        while self.capacity < needed:
+            self.capacity *= 2
+        os.truncate(self.path, self.capacity * 8)
+        self.data = np.memmap(self.path, dtype=np.complex64, mode="r+", shape=(self.capacity,))
+
+    def record(self, frequency, samples):
+        """Append one step's samples, taken at frequency (Hz)."""
+        n = len(samples)
+        with self.lock:
+            if self.used + n > self.capacity:
+                self._grow(self.used + n)
+            self.data[self.used:self.used + n] = samples
+            self.captures.append({"core:sample_start": self.used, "core:frequency": float(frequency),
+                                  "core:datetime": datetime.datetime.now(datetime.timezone.utc).isoformat()})
+            self.used += n
+            if time.monotonic() - self.meta_written >= self.meta_interval:
+                self.data.flush()
+                self.write_meta()
+
+    def write_meta(self):
+        """Write the sidecar for everything recorded so far (atomically)."""
+        meta = {"global": {"core:datatype": "cf32_le", "core:sample_rate": self.sample_rate,
+                           "core:version": SIGMF_VERSION, "core:recorder": "rf-scanner",
+                           "rfscanner:samples_per_step": self.samples_per_step,
+                           "rfscanner:recorded_samples": self.used, **self.metadata},
+                "captures": list(self.captures), "annotations": []}
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=4)
+        os.replace(tmp_path, self.meta_path)
+        self.meta_written = time.monotonic()
+
+    def close(self):
+        """Flush the samples, trim the file to what was recorded and write the sidecar."""
+        with self.lock:
+            if self.data is None:
+                return
+            self.data.flush()
+            self.data = None
+            os.truncate(self.path, self.used * 8)
+            self.write_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class IQRecording:
+    def __init__(self, path):
+        """
+        Read-only view of a recording made by IQRecorder (or any cf32_le SigMF recording with
+        per-step captures). Samples are never copied: every step is a view into the memory map.
+        """
+        self.path, self.meta_path = sigmf_paths(path)
+        with open(self.meta_path, "r") as f:
+            self.meta = json.load(f)
+        self.sample_rate = self.meta.get("global", {}).get("core:sample_rate")
+        # Past the samples recorded so far an unclosed recording still holds its preallocated zeros.
+        recorded = self.meta.get("global", {}).get("rfscanner:recorded_samples")
+        empty = os.path.getsize(self.path) == 0 or recorded == 0  # closed (or interrupted) before its first step
+        self.data = np.empty(0, dtype=np.complex64) if empty else np.memmap(self.path, dtype=np.complex64, mode="r")
+        if recorded is not None:
+            self.data = self.data[:recorded]
+        captures = sorted(self.meta.get("captures", []), key=lambda c: c["core:sample_start"])
+        self.starts = np.array([c["core:sample_start"] for c in captures], dtype=np.int64)
+        self.lengths = np.diff(np.append(self.starts, len(self.data)))
+        self.frequencies = np.array([c.get("core:frequency", np.nan) for c in captures], dtype=np.float64)
+        self.captures = captures
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        """(frequency, samples view) of step index."""
+        start = self.starts[index]
+        return self.frequencies[index], self.data[start:start + self.lengths[index]]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def steps(self, frequency):
+        """Indices of the steps recorded at frequency (Hz), e.g. the same step over several passes."""
+        return np.flatnonzero(self.frequencies == frequency)
+
+    def stack(self):
+        """
+        All steps as one (steps, samples) array, ready for SignalProcessing.process_batch.
+        A zero-copy view when the steps are contiguous and equally long (always the case for
+        IQRecorder); otherwise a copy truncated to the shortest step.
+        """
+        if not len(self):
+            return np.empty((0, 0), dtype=np.complex64)
+        n = int(self.lengths.min())
+        if np.array_equal(self.starts, np.arange(len(self)) * n) and np.all(self.lengths == n):
+            return self.data[:len(self) * n].reshape(len(self), n)
+        return np.stack([samples[:n] for _, samples in self])
+
+    def close(self):
+        """Release the memory map."""
+        self.data = None
@@ -1,7 +1,145 @@
 import json
 import os
+import time
 import numpy as np
-import pandas as pd
+
+from baseline import NoiseBaseline
+from history import ScanHistory
+from scan_store import ScanStore
+
+def write_wwb_csv(path, frequencies_hz, power_dbm):
+    """Atomically write a headerless WWB CSV (frequency in MHz to 1 kHz, signal strength in dBm)."""
+    table = np.column_stack([np.round(np.asarray(frequencies_hz) / 1e6, 3), np.round(power_dbm, 3)])
+    tmp_path = path + ".tmp"
+    np.savetxt(tmp_path, table, fmt="%.3f", delimiter=",")
+    os.replace(tmp_path, path)
+
+def linear_to_dbm(value):
+    """Convert legacy linear FFT magnitudes (logs without a "units" key) to dBm; accepts scalars or arrays."""
+    value = np.asarray(value, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Apply calibration offset, round to 3 decimals, -120 floor for invalid values
+        dbm = np.where(value > 0, np.round(10 * np.log10(value) - 100, 3), -120.0)
+    return dbm if dbm.ndim else float(dbm)
+
+def sweep_to_dbm(scan_data, dbfs_to_dbm_offset=-45.0):
+    """dBm array for a sweep: dBFS sweeps are shifted by dbfs_to_dbm_offset, legacy ones use linear_to_dbm."""
+    power_levels = np.asarray(scan_data["power_levels"], dtype=np.float64)
+    if scan_data.get("units") == "dBFS":
+        return np.round(power_levels + dbfs_to_dbm_offset, 3)
+    if scan_data.get("units") == "dBm":
+        return power_levels
+    return linear_to_dbm(power_levels)
+
+class MaxHold:
+    def __init__(self, start_freq, end_freq, resolution=1000):
+        """
+        Peak-hold of dBm values on a fixed frequency grid (default 1 kHz, the precision WWB
+        CSVs carry). Cells never observed hold NaN and are left out of exports.
+        """
+        self.start_freq = float(start_freq)
+        self.resolution = float(resolution)
+        self.frequencies = np.arange(self.start_freq, end_freq + resolution, self.resolution)
+        self.values = np.full(len(self.frequencies), np.nan, dtype=np.float32)
+
+    def update(self, frequencies, power_dbm):
+        """Fold one sweep into the hold; points outside the grid are ignored. O(len(frequencies))."""
+        indices = np.rint((np.asarray(frequencies, dtype=np.float64) - self.start_freq) / self.resolution).astype(np.int64)
+        inside = (indices >= 0) & (indices < len(self.values))
+        np.fmax.at(self.values, indices[inside], np.asarray(power_dbm, dtype=np.float32)[inside])
+
+    def observed(self):
+        """(frequencies, dBm) of every grid cell that has been observed."""
+        seen = ~np.isnan(self.values)
+        return self.frequencies[seen], self.values[seen]
+
+    def save(self, path):
+        """Persist atomically (write to a temp file, then rename over the old one)."""
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, start_freq=self.start_freq, resolution=self.resolution, values=self.values)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Merge a hold saved by save(), even if it was recorded on a different grid."""
+        with np.load(path) as saved:
+            frequencies = saved["start_freq"] + np.arange(len(saved["values"])) * saved["resolution"]
+            values = saved["values"]
+        seen = ~np.isnan(values)
+        self.update(frequencies[seen], values[seen])
+
+class ScanAccumulator:
+    def __init__(self, start_freq, end_freq, resolution=1000, percentiles=(), floor_dbm=-140.0, step_db=1.0, levels=150):
+        """
+        Online per-cell statistics of every sweep of a run on a fixed frequency grid (like
+        MaxHold): count, Welford running mean and variance, min and max, all updated in place
+        on preallocated arrays. With percentiles, a per-cell histogram of dBm levels
+        (floor_dbm + k * step_db, k < levels, 2 bytes per level) is kept as well and
+        percentiles are read from it to step_db resolution. That is cells x levels x 2 bytes
+        (about 45 MB for 150 MHz at 1 kHz), so percentiles are off unless asked for. Memory
+        does not grow with the number of passes.
+        """
+        self.start_freq = float(start_freq)
+        self.resolution = float(resolution)
+        self.frequencies = np.arange(self.start_freq, end_freq + resolution, self.resolution)
+        self.percentiles = list(percentiles)
+        self.floor_dbm = float(floor_dbm)
+        self.step_db = float(step_db)
+        self.levels = int(levels)
+        cells = len(self.frequencies)
+        self.passes = 0
+        self.count = np.zeros(cells, dtype=np.int32)
+        self.mean = np.zeros(cells, dtype=np.float64)
+        self.m2 = np.zeros(cells, dtype=np.float64)
+        self.min = np.full(cells, np.inf, dtype=np.float32)
+        self.max = np.full(cells, -np.inf, dtype=np.float32)
+        self.histogram = np.zeros((cells, self.levels), dtype=np.uint16) if self.percentiles else None
+        self._row = np.full(cells, np.nan, dtype=np.float32)  # scratch: one sweep folded onto the grid
+
+    def update(self, frequencies, power_dbm):
+        """Fold one sweep in; points outside the grid are ignored. O(len(frequencies))."""
+        indices = np.rint((np.asarray(frequencies, dtype=np.float64) - self.start_freq) / self.resolution).astype(np.int64)
+        inside = (indices >= 0) & (indices < len(self._row))
+        np.fmax.at(self._row, indices[inside], np.asarray(power_dbm, dtype=np.float32)[inside])
+        cells = np.unique(indices[inside])
+        x = self._row[cells].astype(np.float64)
+        self._row[cells] = np.nan
+
+        n = self.count[cells] + 1
+        delta = x - self.mean[cells]
+        mean = self.mean[cells] + delta / n
+        self.m2[cells] += delta * (x - mean)
+        self.mean[cells] = mean
+        self.count[cells] = n
+        self.min[cells] = np.minimum(self.min[cells], x)
+        self.max[cells] = np.maximum(self.max[cells], x)
+        if self.histogram is not None:
+            levels = np.clip(((x - self.floor_dbm) / self.step_db).astype(np.int64), 0, self.levels - 1)
+            self.histogram[cells, levels] += 1
+        self.passes += 1
+        if self.histogram is not None and self.passes % 32768 == 0:
+            self.histogram //= 2  # stay inside uint16 on long daemon runs; percentiles only need proportions
+
+    def observed(self):
+        """Boolean mask of the grid cells seen at least once."""
+        return self.count > 0
+
+    def variance(self):
+        """Per-cell sample variance (0 where a cell was seen fewer than twice)."""
+        return np.where(self.count > 1, self.m2 / np.maximum(self.count - 1, 1), 0.0)
+
+    def percentile(self, q, chunk_cells=8192):
+        """
+        Per-cell q-th percentile (0-100) from the level histogram, to step_db resolution.
+        Cumulative counts are built chunk_cells cells at a time, never for the whole grid.
+        """
+        if self.histogram is None:
+            raise ValueError("ScanAccumulator was created without percentiles")
+        level = np.empty(len(self.histogram), dtype=np.int64)
+        for start in range(0, len(self.histogram), chunk_cells):
+            cumulative = np.cumsum(self.histogram[start:start + chunk_cells], axis=1, dtype=np.int32)
+            target = np.maximum(np.ceil(q / 100.0 * cumulative[:, -1]), 1)
+            level[start:start + chunk_cells] = np.argmax(cumulative >= target[:, None], axis=1)
+        return self.floor_dbm + (level + 0.5) * self.step_db
 
 class Logger:
     def __init__(self, config):
@@ -10,66 +148,215 @@ class Logger:
         Expects config as a dict with at least:
           - "log_directory": directory to store JSON logs.
           - "num_passes_for_average": number of scans to average (optional).
-        Assumes CSV export directory is "data/".
+          - "data_directory": CSV export directory (optional, default "data").
         """
         self.log_directory = config.get("log_directory", "logs")
-        self.data_directory = "data"
+        self.data_directory = config.get("data_directory", "data")
         self.num_passes_for_average = config.get("num_passes_for_average", None)
+        # Approximate RTL-SDR full-scale input level; used to map dBFS spectra onto WWB's dBm scale.
+        self.dbfs_to_dbm_offset = config.get("dbfs_to_dbm_offset", -45.0)
         self.config = config
+        self.verbose = config.get("verbose", False)  # report every file written
+        # "json" (one indented file per pass), "store" (binary ScanStore) or "both".
+        self.log_format = config.get("log_format", "json")
+        self.store = None
+        if self.log_format in ("store", "both"):
+            self.store = ScanStore(config.get("scan_store_directory", os.path.join(self.log_directory, "store")))
         
         os.makedirs(self.log_directory, exist_ok=True)
         os.makedirs(self.data_directory, exist_ok=True)
 
+        # In-memory max-hold, persisted every pass and exported to max_scan.csv at most every
+        # wwb_export_interval seconds (or on demand via export_max_scan).
+        self.max_csv_path = os.path.join(self.data_directory, "max_scan.csv")
+        self.max_hold_path = os.path.join(self.data_directory, "max_hold.npz")
+        self.wwb_export_interval = config.get("wwb_export_interval", 60)
+        self.last_max_export = 0.0
+        self.max_hold = None
+
+        # Running per-cell statistics of this run's sweeps, exported as average_scan.csv,
+        # p<q>_scan.csv for each of "average_percentiles" and average_spectrum.json.
+        self.average_csv_path = os.path.join(self.data_directory, "average_scan.csv")
+        self.average_json_path = os.path.join(self.data_directory, "average_spectrum.json")
+        self.last_average_export = 0.0
+        self.accumulator = None
+
+        # Noise-floor baseline for diff mode, learned from past sweeps and exported for WWB.
+        self.baseline_path = config.get("baseline_path", os.path.join(self.data_directory, "baseline.npz"))
+        self.baseline_csv_path = os.path.join(self.data_directory, "baseline_scan.csv")
+
+        # SQLite index of every saved sweep ("history_db": null disables it). A new, empty index
+        # is back-filled from the JSON logs already in log_directory.
+        self.history = None
+        if config.get("history_db", "scans.db"):
+            self.history = ScanHistory(config.get("history_db", "scans.db"), config.get("history_channel_hz", 200000))
+            if self.history.count() == 0 and not config.get("test_mode", False):
+                self.index_logs()
+
     def convert_to_dbm(self, value):
-        if value <= 0:
-            return -120  # Default floor for invalid values
-        return round(10 * np.log10(value) - 100, 3)  # Apply calibration offset and round to 1 decimal place
+        """Convert legacy linear FFT magnitudes (logs without a "units" key) to dBm; see linear_to_dbm."""
+        return linear_to_dbm(value)
+
+    def power_to_dbm(self, scan_data):
+        """dBm array for a sweep (see sweep_to_dbm), using this logger's dbfs_to_dbm_offset."""
+        return sweep_to_dbm(scan_data, self.dbfs_to_dbm_offset)
 
     def save_log(self, scan_data):
         """
-        Saves full scan data as a JSON file in the log directory.
+        Saves full scan data as a JSON file in the log directory and/or appends it to the
+        binary scan store, depending on log_format.
         Expects scan_data to include a "timestamp" key.
-        Now includes full configuration metadata for reference.
+        Includes the configuration in use for reference.
         """
         if self.config.get("test_mode", False):
             print("🧪 Test Mode: Skipping log save.")
             return
         timestamp = scan_data["timestamp"]
-        # Load full config from config.json
-        config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "config.json"))
-        try:
-            with open(config_path, "r") as f:
-                full_config = json.load(f)
-        except Exception as e:
-            print(f"⚠️ WARNING: Could not load full config: {e}")
-            full_config = {}
-
-        log_entry = {
-            "timestamp": timestamp,
-            "config": full_config,  # Store full config from file
-            "frequencies": scan_data["frequencies"],
-            "power_levels": scan_data["power_levels"],
-            "location": {
-                "city": full_config.get("city", "Unknown"),
-                "venue": full_config.get("venue", "Unknown"),
-                "zip_code": full_config.get("zip_code", "Unknown")
-            }
+        full_config = self.config
+
+        location = {
+            "city": full_config.get("city", "Unknown"),
+            "venue": full_config.get("venue", "Unknown"),
+            "zip_code": full_config.get("zip_code", "Unknown")
         }
 
-        filename = os.path.join(self.log_directory, f"scan_{timestamp}.json")
-        with open(filename, "w") as f:
-            json.dump(log_entry, f, indent=4)
+        source = None
+        if self.store is not None:
+            grid = self.store.append(scan_data, full_config, band=self.config.get("selected_band"))
+            source = f"store:{grid}:{timestamp}"
+            if self.verbose:
+                print(f"✅ Scan appended to store grid {grid}")
 
-        print(f"✅ Scan log saved: {filename}")
+        if self.log_format != "store":
+            log_entry = {
+                "timestamp": timestamp,
+                "config": full_config,  # Store the config this scan ran with
+                "frequencies": scan_data["frequencies"],
+                "power_levels": scan_data["power_levels"],
+                "units": scan_data.get("units", "linear"),
+                "location": location
+            }
+
+            source = os.path.join(self.log_directory, f"scan_{timestamp}.json")
+            with open(source, "w") as f:
+                json.dump(log_entry, f, indent=4)
+
+            if self.verbose:
+                print(f"✅ Scan log saved: {source}")
+
+        if self.history is not None:
+            self.history.record(timestamp, scan_data["frequencies"], self.power_to_dbm(scan_data),
+                                full_config, location, source)
+
+    def log_events(self, events):
+        """Append carrier appear/disappear events (see detection.py) as JSON lines to "events_path"."""
+        if not events or self.config.get("test_mode", False):
+            return
+        path = self.config.get("events_path", os.path.join(self.log_directory, "events.jsonl"))
+        with open(path, "a") as f:
+            f.writelines(json.dumps(event) + "\n" for event in events)
+
+    def log_profile(self, record):
+        """Append one pass's stage timings (see profiling.py) as a JSON line to "profile_path"."""
+        if self.config.get("test_mode", False):
+            return
+        path = self.config.get("profile_path", os.path.join(self.log_directory, "profile.jsonl"))
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def save_diff(self, scan_data, regions):
+        """
+        Diff-mode replacement for save_log: append only the regions that deviate from the
+        baseline (see NoiseBaseline.regions) as one JSON line to "diff_log_path". A quiet pass
+        costs a few bytes instead of a full sweep.
+        """
+        if self.config.get("test_mode", False):
+            print("🧪 Test Mode: Skipping diff save.")
+            return
+        path = self.config.get("diff_log_path", os.path.join(self.log_directory, "diff.jsonl"))
+        record = {"timestamp": scan_data["timestamp"], "units": "dBm", "points": len(scan_data["frequencies"]),
+                  "regions": regions}
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        if self.verbose:
+            print(f"✅ Diff of {len(regions)} region(s) appended to {path}")
+
+    def history_sweeps(self, limit=50):
+        """
+        (frequencies, dBm) of up to limit recent sweeps for learning a baseline: rows of the
+        binary scan store with "log_format": "store", otherwise the JSON logs (see load_recent_logs).
+        Only sweeps in "baseline_units" (default "dBFS", what the scanner records) are used:
+        legacy linear logs (no "units" field) land on a different dBm scale and would pull the
+        median and spread off.
+        """
+        units = self.config.get("baseline_units", "dBFS")
+        skipped = 0
+        if self.store is not None and self.log_format == "store":
+            for grid in self.store.grids(band=self.config.get("selected_band")):
+                if self.store.grid_info(grid)["units"] != units:
+                    skipped += 1
+                    continue
+                _, frequencies, power = self.store.read(grid)
+                for row in power[-limit:]:
+                    yield frequencies, self.power_to_dbm({"power_levels": row, "units": units})
+        else:
+            for data in self.load_recent_logs(limit=limit):
+                if data.get("units") != units:
+                    skipped += 1
+                    continue
+                yield data["frequencies"], self.power_to_dbm(data)
+        if skipped:
+            print(f"⚠️ Baseline: skipped {skipped} {'grid' if self.log_format == 'store' else 'sweep'}(s) "
+                  f"not recorded in {units}.")
+
+    def build_baseline(self, limit=None):
+        """Learn the noise-floor baseline from recent sweeps, save it and export baseline_scan.csv."""
+        limit = limit or self.config.get("baseline_sweeps", 50)
+        baseline = NoiseBaseline(self.config["start_frequency"], self.config["end_frequency"],
+                                 self.config.get("baseline_resolution_hz", 1000))
+        used = baseline.learn(self.history_sweeps(limit), min_count=self.config.get("baseline_min_sweeps", 3))
+        if not used:
+            print("⚠️ No past sweeps to learn a baseline from; diff mode is off and every pass is logged in full.")
+            return None
+        if self.config.get("test_mode", False):
+            print(f"🧪 Test Mode: Baseline learned from {used} sweeps, not saved.")
+            return baseline
+        baseline.save(self.baseline_path)
+        write_wwb_csv(self.baseline_csv_path, *baseline.observed())
+        print(f"✅ Baseline learned from {used} sweeps and saved to {self.baseline_path}")
+        return baseline
+
+    def load_baseline(self):
+        """
+        The saved baseline if there is one for the current range, else a freshly learned one
+        (None if there is nothing to learn from). Warns when less than "baseline_min_coverage"
+        (default 0.9) of the range is known: points there are never reported as changed.
+        """
+        baseline = None
+        if os.path.exists(self.baseline_path):
+            baseline = NoiseBaseline.load(self.baseline_path)
+            if not (baseline.start_freq <= self.config["start_frequency"] and baseline.frequencies[-1] >= self.config["end_frequency"]):
+                baseline = None
+        if baseline is None:
+            baseline = self.build_baseline()
+        if baseline is not None:
+            coverage = baseline.coverage(self.config["start_frequency"], self.config["end_frequency"])
+            if coverage < self.config.get("baseline_min_coverage", 0.9):
+                print(f"⚠️ The baseline covers only {coverage:.0%} of the scan range; unknown points are not "
+                      f"reported as changed. Delete {self.baseline_path} to relearn it from more sweeps.")
+        return baseline
 
     def format_for_wwb(self, scan_data):
         """
         Formats scan data into a DataFrame for WWB export.
         - Converts frequency from Hz to MHz (rounded to 3 decimals).
-        - Converts power levels to negative dBm.
+        - Converts power levels to negative dBm (dBFS sweeps are shifted by dbfs_to_dbm_offset,
+          legacy linear sweeps go through convert_to_dbm).
         """
+        import pandas as pd  # only needed for callers that want a DataFrame
+
         frequencies_mhz = np.round(np.array(scan_data["frequencies"]) / 1e6, 3)
-        power_levels_dbm = np.array([self.convert_to_dbm(val) for val in scan_data["power_levels"]])
+        power_levels_dbm = self.power_to_dbm(scan_data)
 
         df = pd.DataFrame({
             "Frequency (MHz)": frequencies_mhz,
@@ -85,61 +372,165 @@ class Logger:
         if self.config.get("test_mode", False):
             print("🧪 Test Mode: Skipping recent scan save.")
             return
-        df = self.format_for_wwb(scan_data)
         recent_csv_path = os.path.join(self.data_directory, "recent_scan.csv")
-        df.to_csv(recent_csv_path, index=False, header=False)
-        print(f"✅ Recent scan saved to {recent_csv_path}")
+        write_wwb_csv(recent_csv_path, scan_data["frequencies"], self.power_to_dbm(scan_data))
+        if self.verbose:
+            print(f"✅ Recent scan saved to {recent_csv_path}")
 
         # Update max scan file with new data
         self.update_max_scan(scan_data)
+        self.update_average(scan_data)
+
+    def _load_max_hold(self):
+        """Create the max-hold grid, seeded from max_hold.npz or, the first time, from an existing max_scan.csv."""
+        resolution = self.config.get("max_hold_resolution_hz", 1000)
+        self.max_hold = MaxHold(self.config["start_frequency"], self.config["end_frequency"], resolution)
+        if os.path.exists(self.max_hold_path):
+            self.max_hold.load(self.max_hold_path)
+        elif os.path.exists(self.max_csv_path):
+            old = np.loadtxt(self.max_csv_path, delimiter=",", ndmin=2)
+            self.max_hold.update(old[:, 0] * 1e6, old[:, 1])
 
     def update_max_scan(self, scan_data):
         """
-        Updates the max scan file by comparing current scan values against stored max values.
-        Keeps the highest observed signal strength for each frequency.
+        Updates the max-hold with the current scan, keeping the highest observed signal strength
+        for each frequency. The hold lives in memory on a fixed grid and is saved to
+        data/max_hold.npz every pass; max_scan.csv is rewritten at most every wwb_export_interval
+        seconds, so per-pass cost does not grow with how long the scanner has run.
         """
         if self.config.get("test_mode", False):
             print("🧪 Test Mode: Skipping max scan update.")
             return
-        max_csv_path = os.path.join(self.data_directory, "max_scan.csv")
+        if self.max_hold is None:
+            self._load_max_hold()
 
-        # Format current scan data
-        df_new = self.format_for_wwb(scan_data)
+        self.max_hold.update(scan_data["frequencies"], self.power_to_dbm(scan_data))
+        self.max_hold.save(self.max_hold_path)
 
-        # If max_scan.csv exists, compare values
-        if os.path.exists(max_csv_path):
-            df_old = pd.read_csv(max_csv_path, header=None, names=["Frequency (MHz)", "Signal Strength (dBm)"])
+        if time.monotonic() - self.last_max_export >= self.wwb_export_interval:
+            self.export_max_scan()
 
-            # Merge old and new data, keeping the maximum power level for each frequency
-            df_merged = df_old.merge(df_new, on="Frequency (MHz)", how="outer", suffixes=("_old", "_new"))
-            df_merged["Signal Strength (dBm)"] = df_merged[["Signal Strength (dBm)_old", "Signal Strength (dBm)_new"]].max(axis=1)
+    def export_max_scan(self):
+        """Write the current max-hold to max_scan.csv for WWB."""
+        if self.max_hold is None:
+            self._load_max_hold()
+        write_wwb_csv(self.max_csv_path, *self.max_hold.observed())
+        self.last_max_export = time.monotonic()
+        if self.verbose:
+            print(f"✅ Max scan exported to {self.max_csv_path}")
 
-            # Drop extra columns and sort by frequency
-            df_final = df_merged[["Frequency (MHz)", "Signal Strength (dBm)"]].sort_values("Frequency (MHz)")
-        else:
-            df_final = df_new  # No previous data, use current scan directly
+    def update_average(self, scan_data):
+        """
+        Fold the current scan into the running statistics. The averages are exported at most
+        every wwb_export_interval seconds here, and on demand via update_average_scan.
+        """
+        if self.config.get("test_mode", False):
+            print("🧪 Test Mode: Skipping average update.")
+            return
+        if self.accumulator is None:
+            self.accumulator = ScanAccumulator(self.config["start_frequency"], self.config["end_frequency"],
+                                               self.config.get("max_hold_resolution_hz", 1000),
+                                               self.config.get("average_percentiles", []))
+        self.accumulator.update(scan_data["frequencies"], self.power_to_dbm(scan_data))
 
-        # Save updated max scan data
-        df_final.to_csv(max_csv_path, index=False, header=False)
-        print(f"✅ Max scan updated. Saved to {max_csv_path}")
+        if time.monotonic() - self.last_average_export >= self.wwb_export_interval:
+            self.update_average_scan()
 
-    def load_recent_logs(self, limit=5):
-        """Loads up to 'limit' most recent scan logs and ensures valid data."""
-        log_dir = self.config.get("test_log_directory") if self.config.get("test_mode", False) else self.log_directory
-        log_files = sorted([f for f in os.listdir(log_dir) if f.endswith(".json")], reverse=True)[:limit]
-        scan_passes = []
+    def update_average_scan(self):
+        """
+        Write the statistics so far: average_scan.csv (mean dBm), one p<q>_scan.csv per
+        percentile for WWB, and average_spectrum.json with mean, std, min, max and counts.
+        """
+        if self.accumulator is None or not self.accumulator.passes:
+            print("⚠️ No scans accumulated yet; average scan not written.")
+            return
+        acc = self.accumulator
+        seen = acc.observed()
+        frequencies = acc.frequencies[seen]
+        write_wwb_csv(self.average_csv_path, frequencies, acc.mean[seen])
+        percentiles = {}
+        for q in acc.percentiles:
+            values = acc.percentile(q)[seen]
+            write_wwb_csv(os.path.join(self.data_directory, f"p{q:g}_scan.csv"), frequencies, values)
+            percentiles[f"p{q:g}"] = np.round(values, 3).tolist()
 
-        print(f"📂 DEBUG: Loading logs from {log_dir}")
-        print(f"📂 DEBUG: Found {len(log_files)} log files.")
+        backup = {"passes": acc.passes, "units": "dBm", "frequencies": frequencies.tolist(),
+                  "mean": np.round(acc.mean[seen], 3).tolist(),
+                  "std": np.round(np.sqrt(acc.variance()[seen]), 3).tolist(),
+                  "min": np.round(acc.min[seen], 3).tolist(), "max": np.round(acc.max[seen], 3).tolist(),
+                  "count": acc.count[seen].tolist(), "percentiles": percentiles}
+        tmp_path = self.average_json_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(backup, f)
+        os.replace(tmp_path, self.average_json_path)
+        self.last_average_export = time.monotonic()
+        if self.verbose:
+            print(f"✅ Average of {acc.passes} scans exported to {self.average_csv_path}")
 
-        for file in log_files:
+    def index_logs(self, log_dir=None):
+        """Add every JSON log in log_dir (default: log_directory) that is not yet in the history index."""
+        if self.history is None:
+            return 0
+        log_dir = log_dir or self.log_directory
+        added = 0
+        for file in sorted(f for f in os.listdir(log_dir) if f.endswith(".json")):
             file_path = os.path.join(log_dir, file)
+            if self.history.contains(file_path):
+                continue
             with open(file_path, "r") as f:
                 data = json.load(f)
-                if "frequencies" in data and "power_levels" in data:
-                    scan_passes.append(data)
-                    print(f"📂 DEBUG: Loaded {file} with valid data.")
-                else:
-                    print(f"⚠️ WARNING: {file} missing 'frequencies' or 'power_levels' and will be ignored.")
+            if "frequencies" not in data or "power_levels" not in data:
+                continue
+            config = data.get("config", {})
+            if self.history.record(data["timestamp"], data["frequencies"], self.power_to_dbm(data),
+                                   config, data.get("location", config), file_path, commit=False) is not None:
+                added += 1
+        self.history.commit()
+        if added or self.verbose:
+            print(f"✅ Indexed {added} scan logs from {log_dir}")
+        return added
 
+    def load_recent_logs(self, limit=5):
+        """
+        Loads up to 'limit' most recent scan logs and ensures valid data.
+        Uses the history index to pick the sweeps when available (JSON logs and scan store
+        rows alike), falling back to listing the log directory when the index has none.
+        """
+        scan_passes = []
+        if self.history is not None and not self.config.get("test_mode", False):
+            for sweep in self.history.sweeps(limit=limit):
+                source = sweep["source"] or ""
+                if source.startswith("store:"):
+                    data = self._load_store_sweep(source)
+                    if data is not None:
+                        scan_passes.append(data)
+                elif source.endswith(".json") and os.path.exists(source):
+                    self._append_log(scan_passes, source)
+            if scan_passes:
+                return scan_passes
+
+        log_dir = self.config.get("test_log_directory") if self.config.get("test_mode", False) else self.log_directory
+        for file in sorted([f for f in os.listdir(log_dir) if f.endswith(".json")], reverse=True)[:limit]:
+            self._append_log(scan_passes, os.path.join(log_dir, file))
         return scan_passes
+
+    def _append_log(self, scan_passes, file_path):
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        if "frequencies" in data and "power_levels" in data:
+            scan_passes.append(data)
+        else:
+            print(f"⚠️ WARNING: {file_path} missing 'frequencies' or 'power_levels' and will be ignored.")
+
+    def _load_store_sweep(self, source):
+        """The scan_data of a "store:<grid>:<timestamp>" history source, or None if the store does not have it."""
+        if self.store is None:
+            return None
+        grid, timestamp = source[len("store:"):].rsplit(":", 1)
+        if grid not in self.store.grids():
+            return None
+        index, frequencies, power = self.store.read(grid, start_time=timestamp, end_time=timestamp)
+        if not len(index):
+            return None
+        return {"timestamp": timestamp, "frequencies": frequencies.tolist(), "power_levels": power[-1].tolist(),
+                "units": self.store.grid_info(grid)["units"]}
@@ -3,28 +3,78 @@ import sys
 import os
 import datetime
 import numpy as np
-import matplotlib.pyplot as plt
 import time
 import json
 
 # Ensure the 'src' directory is in the module search path.
 sys.path.append(os.path.join(os.getcwd(), "src"))
 
-# Import configuration and modules.
-from config import CONFIG, BANDS
+# Import configuration and modules. matplotlib, the HTTP server and the multi-device
+# coordinator are imported only by the mode that uses them, to keep startup fast.
+from config import get_bands, get_config
 from logger import Logger
 from data_acquisition import DataAcquisition
-from signal_processing import SignalProcessing
-from visualization import Visualization
+from detection import CarrierDetector
+from profiling import PROFILER
+from scanner import Scanner
 
 def get_timestamp():
     """Return the current timestamp in YYYYMMDD_HHMMSS format."""
     return datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
+def run_dwell(config, test_mode, flask_mode):
+    """Zoom mode: watch a few channels at high resolution, several updates per second, until closed."""
+    from dwell import DwellScanner, dwell_config, dwell_targets
+    targets = dwell_targets(config)
+    try:
+        config = dwell_config(config)
+        daq = DataAcquisition(config)
+        scanner = DwellScanner(config, daq, targets)
+    except Exception as e:
+        print(f"❌ Failed to start dwell mode: {e}")
+        return
+    print(f"🔬 Dwell mode: {len(targets)} target(s) on {len(scanner.centers)} centre frequenc"
+          f"{'y' if len(scanner.centers) == 1 else 'ies'}, {scanner.start_freq / 1e6:.3f}-{scanner.end_freq / 1e6:.3f} MHz "
+          f"at {scanner.resolution:.0f} Hz, up to {scanner.rate} updates/s")
+
+    # Headless: the daemon streams every update; nothing is logged at this rate.
+    if flask_mode:
+        from server import ScanDaemon
+        ScanDaemon({**config, "start_frequency": scanner.start_freq, "end_frequency": scanner.end_freq},
+                   daq, None, scanner=scanner).serve_forever()
+        daq.close()
+        return
+
+    import matplotlib.pyplot as plt
+    from visualization import Visualization
+    vis = Visualization({**config, "start_frequency": int(scanner.start_freq), "end_frequency": int(scanner.end_freq),
+                         "frequency_step": int(scanner.resolution)}, get_bands())
+    if not config.get("dwell_range"):
+        vis.mark_frequencies(targets)
+    duration = config.get("dwell_duration", 0)  # seconds, 0 = until the window is closed
+    updates, started = 0, time.perf_counter()
+    try:
+        while plt.fignum_exists(vis.fig.number) and not (duration and time.perf_counter() - started >= duration):
+            frequencies, power = scanner.run_pass(vis.update_status)
+            with PROFILER.stage("ui_spectrum"):
+                vis.update_spectrum(power, frequencies)
+            PROFILER.end_pass()
+            updates += 1
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.perf_counter() - started
+    print(f"🔬 {updates} dwell updates in {elapsed:.1f} s ({updates / max(elapsed, 1e-9):.1f}/s)")
+    print(f"\n📊 Scan profile:\n{PROFILER.summary()}")
+    daq.close()
+    print("🔻 SDR device closed.")
+
 def main():
     """Perform multiple scan passes, log each, update visualization, and compute running average."""
-    config = CONFIG
+    config = get_config()
     test_mode = config.get("test_mode", False)
+    # Test mode scans the simulator backend through the normal pipeline; past JSON logs are
+    # replayed instead only when "test_replay_logs" is set.
+    replay_logs = test_mode and config.get("test_replay_logs", False)
     flask_mode = config.get("flask_mode", False)
 
     # Validate required configuration parameters.
@@ -37,39 +87,67 @@ def main():
         print("❌ Error: Missing required frequency configuration in config.json.")
         return
 
+    if "selected_band" in config:
+        band = get_bands().get(config["selected_band"])
+        if band:
+            print(f"🎯 Band {band['band']}: range taken from psm1000_bands.json")
+        else:
+            print(f"⚠️ Warning: Selected band '{config['selected_band']}' not found in psm1000_bands.json!")
+    if config.get("dwell_mode", False):
+        run_dwell(config, test_mode, flask_mode)
+        return
+
     print(f"📡 Starting scan from {start_freq/1e6:.3f} MHz to {end_freq/1e6:.3f} MHz")
     print(f"🔄 Will perform {num_passes} pass(es) to average.")
 
-    # Initialize modules.
+    # Initialize modules. With several "sdr_devices" each dongle runs in its own process instead.
+    multi_device = len(config.get("sdr_devices", [])) > 1 and not test_mode
+    daq = scanner = None
     try:
-        daq = DataAcquisition(config) if not test_mode else None
+        if multi_device:
+            from multi_sdr import MultiDeviceScanner
+            scanner = MultiDeviceScanner(config).start()
+        elif not replay_logs:
+            daq = DataAcquisition(config)  # falls back to the simulator backend in test mode
+            scanner = Scanner(config, daq)
     except Exception as e:
         print(f"❌ Failed to initialize DataAcquisition: {e}")
         return
 
-    sp = SignalProcessing(config)
     logger = Logger(config)
-    vis = Visualization(config, BANDS)
 
-    # If in test mode, load scan logs from test_log_directory
-    scan_logs = []
-    if test_mode:
+    # Headless mode: sweep continuously and serve results over HTTP/WebSocket instead of the GUI.
+    if flask_mode and not replay_logs:
+        from server import ScanDaemon
+        ScanDaemon(config, daq, logger, scanner=scanner).serve_forever()
+        (scanner if multi_device else daq).close()
+        return
+
+    import matplotlib.pyplot as plt
+    from visualization import Visualization
+    vis = Visualization(config, get_bands())
+    detector = CarrierDetector(config) if config.get("detect_carriers", False) else None
+    # Diff mode: compare each pass with the learned noise floor and keep only what changed.
+    baseline = logger.load_baseline() if config.get("diff_mode", False) else None
+
+    # With test_replay_logs, replay scan logs from test_log_directory (each file is loaded when its pass runs)
+    test_log_files = []
+    if replay_logs:
         log_dir = config.get("test_log_directory", "src/test_data")
-        log_files = sorted([f for f in os.listdir(log_dir) if f.endswith(".json")])
-        for log_file in log_files:
-            with open(os.path.join(log_dir, log_file), "r") as f:
-                scan_logs.append(json.load(f))
-        print(f"🧪 Test Mode Enabled: Loaded {len(scan_logs)} past scans from {log_dir}")
+        test_log_files = [os.path.join(log_dir, f) for f in sorted(os.listdir(log_dir)) if f.endswith(".json")]
+        print(f"🧪 Test Mode Enabled: Found {len(test_log_files)} past scans in {log_dir}")
 
     # Loop over the number of passes.
     for pass_num in range(num_passes):
         print(f"\n=== Running Scan Pass {pass_num + 1} of {num_passes} ===")
+        pass_started = time.perf_counter()
         freqs_collected = []
         peak_power_levels = []
 
-        # Simulate scanning
-        if test_mode:
-            scan_data = scan_logs[pass_num % len(scan_logs)]  # Loop through logs
+        # Replay a past scan instead of scanning
+        if replay_logs:
+            with open(test_log_files[pass_num % len(test_log_files)], "r") as f:  # Loop through logs
+                scan_data = json.load(f)
             freqs_collected = scan_data["frequencies"]
             peak_power_levels = scan_data["power_levels"]
             for i, freq in enumerate(freqs_collected):
@@ -77,18 +155,11 @@ def main():
                 vis.update_status(freq, progress_percent)
                 #time.sleep(0.1)  # Simulate scan delay
         else:
-            for freq, iq_samples in daq.scan_range():
-                try:
-                    spectrum = sp.process(iq_samples)
-                    peak_power = np.max(spectrum)
-                except Exception as proc_err:
-                    print(f"❌ Error processing samples at {freq/1e6:.3f} MHz: {proc_err}")
-                    continue
-
-                freqs_collected.append(freq)
-                peak_power_levels.append(peak_power)
-                progress_percent = (freq - start_freq) / (end_freq - start_freq) * 100
-                vis.update_status(freq, progress_percent)
+            try:
+                freqs_collected, peak_power_levels = scanner.run_pass(vis.update_status)
+            except Exception as proc_err:
+                print(f"❌ Error processing samples for pass {pass_num + 1}: {proc_err}")
+                continue
 
         # Convert collected data to numpy arrays.
         freqs_array = np.array(freqs_collected)
@@ -100,9 +171,24 @@ def main():
             "frequencies": freqs_array.tolist(),
             "power_levels": power_array.tolist()
         }
+        if not replay_logs:
+            scan_data["units"] = "dBFS"
+
+        regions = None
+        if baseline is not None:
+            with PROFILER.stage("baseline"):
+                power_dbm = logger.power_to_dbm(scan_data)
+                changed = baseline.deviations(freqs_array, power_dbm, config.get("baseline_threshold_sigma", 4.0),
+                                              config.get("baseline_min_db", 6.0))
+                regions = baseline.regions(freqs_array, power_dbm, changed)
+                unknown = int(baseline.unknown(freqs_array).sum())
+            print(f"🔍 Pass {pass_num + 1}: {int(changed.sum())} of {len(changed)} points in "
+                  f"{len(regions)} region(s) differ from the baseline"
+                  + (f", {unknown} not covered by it" if unknown else ""))
 
         # Log the scan data and update the recent scan CSV.
         try:
+            logging_started = time.perf_counter()
             if test_mode:
                 test_filename = f"scan_{get_timestamp()}_test.json"
                 test_log_path = os.path.join(config.get("log_directory", "logs"), test_filename)
@@ -120,36 +206,78 @@ def main():
                 print(f"🧪 Test Mode: Recent and Max scan data saved with '_test' filenames.")
             
             else:
-                logger.save_log(scan_data)
+                if regions is None:
+                    logger.save_log(scan_data)
+                else:
+                    logger.save_diff(scan_data, regions)
                 logger.update_recent_scan(scan_data)
                 print(f"✅ Pass {pass_num + 1}: Data logged and recent CSV updated.")
+            PROFILER.record("logging", time.perf_counter() - logging_started)
         except Exception as log_err:
             print(f"❌ Error logging data for pass {pass_num + 1}: {log_err}")
 
-        # Update spectrum visualization.
+        # Detect carriers and report the ones that appeared or disappeared this pass.
+        if detector is not None:
+            try:
+                with PROFILER.stage("detection"):
+                    events = detector.update(scan_data["timestamp"], freqs_array, logger.power_to_dbm(scan_data))
+                for event in events:
+                    icon = "🟢" if event["type"] == "appear" else "🔴"
+                    print(f"{icon} Carrier {event['type']}: {event['frequency'] / 1e6:.3f} MHz, "
+                          f"{event['bandwidth'] / 1e3:.0f} kHz wide, {event['power_db']:.1f} dBm")
+                logger.log_events(events)
+            except Exception as det_err:
+                print(f"❌ Error detecting carriers for pass {pass_num + 1}: {det_err}")
+
+        # Update spectrum visualization (in diff mode, only when something differs from the baseline).
         try:
-            vis.update_spectrum(power_array)
-            plt.pause(0.1)
+            if regions or regions is None or pass_num == 0:
+                with PROFILER.stage("ui_spectrum"):
+                    vis.update_spectrum(power_array)
         except Exception as vis_err:
             print(f"❌ Error updating visualization for pass {pass_num + 1}: {vis_err}")
 
+        # Per-pass stage timings: one line on the console, the full record next to the scan logs.
+        pass_seconds = time.perf_counter() - pass_started
+        stages = PROFILER.end_pass()
+        logger.log_profile({"timestamp": scan_data["timestamp"], "pass": pass_num + 1,
+                            "wall_seconds": round(pass_seconds, 6), "stages": stages})
+        slowest = sorted(stages.items(), key=lambda item: -item[1]["seconds"])[:3]
+        print(f"⏱️ Pass {pass_num + 1}: {pass_seconds:.2f} s ("
+              + ", ".join(f"{name} {s['seconds']:.2f} s" for name, s in slowest) + ")")
+
         time.sleep(0.5)  # Delay between passes
 
-    # After completing all passes, update the average scan CSV.
+    # After completing all passes, export the max-hold and update the average scan CSV.
     try:
         if not test_mode:
+            logger.export_max_scan()
             logger.update_average_scan()
         print("✅ All passes completed. Average CSV updated.")
     except Exception as avg_err:
         print(f"❌ Error updating average scan CSV: {avg_err}")
 
+    # Coordinate IEM channels against intermod and the measured max-hold.
+    if config.get("coord_channels", 0) and not test_mode:
+        try:
+            from coordination import COORDINATION_PATH, IntermodCoordinator, write_channels
+            frequencies, power_dbm = logger.max_hold.observed()
+            sets = IntermodCoordinator(config).coordinate(config["coord_channels"], start_freq, end_freq,
+                                                          frequencies, power_dbm)
+            write_channels(COORDINATION_PATH, sets[0])
+            print(f"🎛️ {len(sets[0])} of {config['coord_channels']} channels coordinated: "
+                  + ", ".join(f"{freq / 1e6:.3f}" for freq in sets[0]) + f" MHz (saved to {COORDINATION_PATH})")
+        except Exception as coord_err:
+            print(f"❌ Error coordinating channels: {coord_err}")
+
+    print(f"\n📊 Scan profile:\n{PROFILER.summary()}")
     print("✅ Final visualization. Close the window to exit.")
     plt.show()
 
     # Clean up SDR resources.
-    if not test_mode:
+    if scanner is not None:
         try:
-            daq.close()
+            (scanner if multi_device else daq).close()
             print("🔻 SDR device closed.")
         except Exception as close_err:
             print(f"❌ Error closing SDR device: {close_err}")
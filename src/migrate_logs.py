@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Bulk re-processing of legacy scan logs (logs/scan_*.json written by Logger.save_log).
+
+    python src/migrate_logs.py                                  # logs/ -> logs/migrated/
+    python src/migrate_logs.py --logs tour/logs --output tour/migrated --resolution 25000
+    python src/migrate_logs.py --band G10 --workers 4           # only the G10 range
+
+Every log is parsed, validated and converted to dBm in a process pool, one file per task,
+so each worker only ever holds a single sweep, and at most two parsed sweeps per worker wait
+for the parent at any time. The parent regrids each sweep onto a common frequency axis,
+drops duplicates (same sweep content) and streams the rows into a binary ScanStore (one
+float32 row per sweep, each distinct config stored once). max_scan.csv, average_scan.csv and
+p<q>_scan.csv for the whole set are accumulated on the way, and manifest.json records what
+was migrated and what was rejected and why.
+"""
+import argparse
+import collections
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from baseline import regrid
+from logger import ScanAccumulator, sweep_to_dbm, write_wwb_csv
+from scan_store import ScanStore, parse_timestamp
+
+LOG_NAME = re.compile(r"scan_(\d{8}_\d{6})")
+
+def log_order(path):
+    """Sort key putting logs in scan time order (the timestamp in the file name), then by name."""
+    match = LOG_NAME.search(os.path.basename(path))
+    return (match.group(1) if match else "", os.path.basename(path))
+
+def parse_log(path, dbfs_to_dbm_offset=-45.0):
+    """
+    Worker: load and validate one log. Returns (path, None, sweep) where sweep is a dict with
+    timestamp (epoch seconds), frequencies (float64, ascending), power_dbm (float32), config
+    and a digest of the sweep content; or (path, reason, None) for a rejected log.
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return path, f"unreadable: {e}", None
+    if not isinstance(data, dict) or "frequencies" not in data or "power_levels" not in data:
+        return path, "missing 'frequencies' or 'power_levels'", None
+    try:
+        timestamp = parse_timestamp(data["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return path, "missing or malformed timestamp", None
+
+    frequencies = np.asarray(data["frequencies"], dtype=np.float64)
+    power_dbm = np.asarray(sweep_to_dbm(data, dbfs_to_dbm_offset), dtype=np.float32)
+    if frequencies.ndim != 1 or frequencies.shape != power_dbm.shape or len(frequencies) < 2:
+        return path, f"{power_dbm.size} power levels for {frequencies.size} frequencies", None
+    valid = np.isfinite(frequencies) & np.isfinite(power_dbm)
+    if not valid.all():
+        frequencies, power_dbm = frequencies[valid], power_dbm[valid]
+        if len(frequencies) < 2:
+            return path, "no finite points", None
+    order = np.argsort(frequencies, kind="stable")
+    frequencies, power_dbm = frequencies[order], power_dbm[order]
+
+    digest = hashlib.sha1(frequencies.tobytes() + power_dbm.tobytes()).hexdigest()
+    return path, None, {"timestamp": timestamp, "frequencies": frequencies, "power_dbm": power_dbm,
+                        "config": data.get("config", {}), "digest": digest}
+
+def bounded_imap(pool, function, items, window):
+    """
+    Like pool.imap (results in input order), but with at most window tasks submitted and not
+    yet consumed, so parsed sweeps never pile up when the consumer is slower than the workers.
+    """
+    pending = collections.deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(function, (item,)))
+    while pending:
+        yield pending.popleft().get()
+
+def migrate(paths, output, start_freq, end_freq, resolution=25000, band="MIGRATED", workers=None,
+            percentiles=(90,), dbfs_to_dbm_offset=-45.0):
+    """
+    Migrate paths into output/ (store/, max_scan.csv, average_scan.csv, p<q>_scan.csv,
+    manifest.json). Returns the manifest dict.
+    """
+    os.makedirs(output, exist_ok=True)
+    axis = np.arange(float(start_freq), end_freq + resolution / 2, float(resolution))
+    store = ScanStore(os.path.join(output, "store"))
+    accumulator = ScanAccumulator(axis[0], axis[-1], resolution, percentiles)
+    seen = set()
+    manifest = {"axis": {"start": float(axis[0]), "end": float(axis[-1]), "resolution": float(resolution)},
+                "band": band, "files": len(paths), "migrated": 0, "duplicates": [], "rejected": {},
+                "first_timestamp": None, "last_timestamp": None, "grid": None}
+
+    worker = functools.partial(parse_log, dbfs_to_dbm_offset=dbfs_to_dbm_offset)
+    workers = workers or os.cpu_count() or 1
+    with multiprocessing.Pool(workers) as pool:
+        # Results come back in file order (time order for scan_* names), which the store's time
+        # index relies on; at most two parsed sweeps per worker are in flight at any time.
+        for path, reason, sweep in bounded_imap(pool, worker, sorted(paths, key=log_order), 2 * workers):
+            if reason is not None:
+                manifest["rejected"][path] = reason
+                continue
+            if sweep["digest"] in seen:
+                manifest["duplicates"].append(path)
+                continue
+            seen.add(sweep["digest"])
+
+            row = regrid(axis, sweep["frequencies"], sweep["power_dbm"])
+            if np.isnan(row).all():
+                manifest["rejected"][path] = "no points inside the common axis"
+                continue
+            manifest["grid"] = store.append({"timestamp": sweep["timestamp"], "frequencies": axis,
+                                             "power_levels": row, "units": "dBm"}, sweep["config"], band=band)
+            covered = ~np.isnan(row)
+            accumulator.update(axis[covered], row[covered])
+            manifest["migrated"] += 1
+            manifest["first_timestamp"] = manifest["first_timestamp"] or sweep["timestamp"]
+            manifest["last_timestamp"] = sweep["timestamp"]
+
+    if accumulator.passes:
+        covered = accumulator.observed()
+        write_wwb_csv(os.path.join(output, "max_scan.csv"), axis[covered], accumulator.max[covered])
+        write_wwb_csv(os.path.join(output, "average_scan.csv"), axis[covered], accumulator.mean[covered])
+        for q in accumulator.percentiles:
+            write_wwb_csv(os.path.join(output, f"p{q:g}_scan.csv"), axis[covered], accumulator.percentile(q)[covered])
+    with open(os.path.join(output, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=4)
+    return manifest
+
+def main(argv=None):
+    from config import get_bands, get_config
+
+    parser = argparse.ArgumentParser(description="Migrate legacy JSON scan logs into a compact scan store.")
+    parser.add_argument("--logs", default="logs", help="directory of scan_*.json logs")
+    parser.add_argument("--output", default=os.path.join("logs", "migrated"), help="output directory")
+    parser.add_argument("--band", default="ALL", help="band whose range is the common axis (default: ALL)")
+    parser.add_argument("--resolution", type=float, default=25000, help="common axis spacing in Hz")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    config = get_config()
+    band = get_bands().get(args.band)
+    if band is None:
+        print(f"❌ Error: Band '{args.band}' not found in psm1000_bands.json.")
+        return 1
+    start_freq, end_freq = band["frequency_range_hz"]["start"], band["frequency_range_hz"]["end"]
+
+    paths = [os.path.join(args.logs, f) for f in os.listdir(args.logs) if f.startswith("scan_") and f.endswith(".json")]
+    print(f"📦 Migrating {len(paths)} logs from {args.logs} onto {start_freq / 1e6:.3f}-{end_freq / 1e6:.3f} MHz "
+          f"at {args.resolution / 1e3:g} kHz")
+    started = time.perf_counter()
+    manifest = migrate(paths, args.output, start_freq, end_freq, args.resolution, args.band, args.workers,
+                       config.get("average_percentiles", []), config.get("dbfs_to_dbm_offset", -45.0))
+    print(f"✅ {manifest['migrated']} sweeps migrated, {len(manifest['duplicates'])} duplicates, "
+          f"{len(manifest['rejected'])} rejected in {time.perf_counter() - started:.1f} s -> {args.output}")
+    for path, reason in manifest["rejected"].items():
+        print(f"  ⚠️ {path}: {reason}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
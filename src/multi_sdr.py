@@ -0,0 +1,175 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from data_acquisition import DataAcquisition
+from scanner import Scanner
+from stitching import SpectrumStitcher
+
+# Keys of an "sdr_devices" entry that describe the device itself rather than config overrides.
+DEVICE_KEYS = ("serial", "index", "calibration_db")
+
+def partition_range(config, num_devices):
+    """
+    Split start_frequency..end_frequency into at most num_devices contiguous (start, end) ranges
+    on frequency_step boundaries, so each device gets an equal share of the steps.
+    """
+    start, end, step = config["start_frequency"], config["end_frequency"], config["frequency_step"]
+    num_steps = len(np.arange(start, end, step))
+    ranges = []
+    for steps in np.array_split(np.arange(num_steps), num_devices):
+        if len(steps):
+            ranges.append((start + int(steps[0]) * step, min(start + (int(steps[-1]) + 1) * step, end)))
+    return ranges
+
+def device_config(config, device, index, frequency_range):
+    """Config for one device: the shared config plus the device's overrides and its share of the range."""
+    overrides = {k: v for k, v in device.items() if k not in DEVICE_KEYS}
+    result = {**config, **overrides,
+              "start_frequency": frequency_range[0], "end_frequency": frequency_range[1],
+              "sdr_device_index": device.get("index", index), "adaptive_sweep": False}
+    if "serial" in device:
+        result["sdr_serial"] = device["serial"]
+        result.setdefault("sim_serial", device["serial"])
+    return result
+
+def sweep_points(config):
+    """Number of points one Scanner pass returns for this config."""
+    if config.get("stitch_spectrum", False):
+        return len(SpectrumStitcher(config).frequencies)
+    return len(np.arange(config["start_frequency"], config["end_frequency"], config["frequency_step"]))
+
+def merge_sweeps(sweeps, calibration_db=None):
+    """
+    Merge per-device (frequencies, power) sweeps into one spectrum sorted by frequency, adding each
+    device's calibration offset (dB). Frequencies reported by more than one device keep the maximum.
+    """
+    calibration_db = np.zeros(len(sweeps)) if calibration_db is None else np.asarray(calibration_db)
+    frequencies = np.concatenate([np.asarray(f, dtype=np.float64) for f, _ in sweeps])
+    power = np.concatenate([np.asarray(p, dtype=np.float64) + offset
+                            for (_, p), offset in zip(sweeps, calibration_db)])
+    order = np.argsort(frequencies, kind="stable")
+    unique, starts = np.unique(frequencies[order], return_index=True)
+    return unique, np.maximum.reduceat(power[order], starts).astype(np.float32)
+
+def _device_worker(device_id, config, shm_name, num_points, commands, results):
+    """Process body: open one device, then run a pass per "sweep" command into shared memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    sweep = np.ndarray((2, num_points), dtype=np.float64, buffer=shm.buf)  # rows: frequencies, power
+    daq = None
+    try:
+        daq = DataAcquisition(config)
+        scanner = Scanner(config, daq)
+        results.put((device_id, "ready", None))
+        while commands.get() == "sweep":
+            try:
+                started = time.perf_counter()
+                frequencies, power = scanner.run_pass()
+                count = min(len(frequencies), num_points)
+                sweep[0, :count] = frequencies[:count]
+                sweep[1, :count] = power[:count]
+                results.put((device_id, "done", (count, time.perf_counter() - started)))
+            except Exception as e:
+                results.put((device_id, "error", repr(e)))
+    except Exception as e:
+        results.put((device_id, "error", repr(e)))
+    finally:
+        if daq is not None:
+            daq.close()
+        del sweep
+        shm.close()
+
+class MultiDeviceScanner:
+    def __init__(self, config, devices=None):
+        """
+        Scans with several SDRs in parallel, one process per device.
+        devices (default config "sdr_devices") is a list of dicts, each with an optional
+        "serial" or "index" to pick the dongle, a "calibration_db" offset added to its sweep,
+        and any config overrides for that device (e.g. "gain", "freq_correction").
+        The configured range is partitioned evenly across devices; each process writes its
+        sweep into a shared-memory buffer and run_pass merges them into one spectrum.
+        Same run_pass interface as Scanner.
+        """
+        self.config = config
+        self.devices = devices or config.get("sdr_devices") or [{}]
+        self.ranges = partition_range(config, len(self.devices))
+        self.devices = self.devices[:len(self.ranges)]
+        self.device_configs = [device_config(config, device, i, r)
+                               for i, (device, r) in enumerate(zip(self.devices, self.ranges))]
+        self.calibration_db = np.array([d.get("calibration_db", 0.0) for d in self.devices])
+        self.num_points = [sweep_points(c) for c in self.device_configs]
+        self.sweep_times = [None] * len(self.devices)
+
+        self.processes = []
+        self.commands = []
+        self.buffers = []
+        self.results = None
+
+    def start(self):
+        """Create the shared buffers, start one process per device and wait until every device is open."""
+        context = multiprocessing.get_context(self.config.get("multi_sdr_start_method"))
+        self.results = context.Queue()
+        for device_id, (config, num_points) in enumerate(zip(self.device_configs, self.num_points)):
+            shm = shared_memory.SharedMemory(create=True, size=max(2 * num_points * 8, 1))
+            commands = context.Queue()
+            process = context.Process(target=_device_worker, name=f"sdr-{device_id}", daemon=True,
+                                      args=(device_id, config, shm.name, num_points, commands, self.results))
+            process.start()
+            self.buffers.append(shm)
+            self.commands.append(commands)
+            self.processes.append(process)
+            print(f"📡 Device {device_id}: {config['start_frequency'] / 1e6:.3f}-"
+                  f"{config['end_frequency'] / 1e6:.3f} MHz")
+
+        errors = [payload for _, status, payload in self._collect() if status == "error"]
+        if errors:
+            self.close()
+            raise RuntimeError(f"Failed to open SDR devices: {'; '.join(errors)}")
+        return self
+
+    def _collect(self):
+        timeout = self.config.get("multi_sdr_timeout", 60)
+        return [self.results.get(timeout=timeout) for _ in self.processes]
+
+    def run_pass(self, on_step=None):
+        """
+        Sweep every device's share of the range in parallel and merge the results.
+        on_step(freq, progress_percent) is called as each device finishes (freq = end of its range).
+        Returns (frequencies, power_levels) like Scanner.run_pass.
+        """
+        on_step = on_step or (lambda freq, progress: None)
+        for commands in self.commands:
+            commands.put("sweep")
+
+        counts, errors = {}, []
+        timeout = self.config.get("multi_sdr_timeout", 60)
+        for done in range(len(self.processes)):
+            device_id, status, payload = self.results.get(timeout=timeout)
+            if status == "error":
+                errors.append(f"device {device_id}: {payload}")
+                continue
+            counts[device_id], self.sweep_times[device_id] = payload
+            on_step(self.ranges[device_id][1], (done + 1) / len(self.processes) * 100)
+        if errors:
+            raise RuntimeError("; ".join(errors))
+
+        sweeps = []
+        for device_id, shm in enumerate(self.buffers):
+            sweep = np.ndarray((2, self.num_points[device_id]), dtype=np.float64, buffer=shm.buf)
+            sweeps.append((sweep[0, :counts[device_id]].copy(), sweep[1, :counts[device_id]].copy()))
+        return merge_sweeps(sweeps, self.calibration_db)
+
+    def close(self):
+        """Stop the device processes and release the shared buffers."""
+        for commands in self.commands:
+            commands.put("stop")
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        for shm in self.buffers:
+            shm.close()
+            shm.unlink()
+        self.processes, self.commands, self.buffers = [], [], []
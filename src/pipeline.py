@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from signal_processing import SignalProcessing
+
+# Queue marker telling the next stage that the pass is over.
+_END_OF_PASS = None
+
+class ScanPipeline:
+    def __init__(self, config, daq, num_workers=None, ring_size=None):
+        """
+        Runs acquisition and DSP concurrently so the SDR keeps retuning while spectra are computed.
+        - One acquisition thread tunes and reads into a bounded ring of preallocated sample buffers.
+        - num_workers DSP threads (config "pipeline_workers", default 2) FFT filled buffers and
+          return them to the ring. Each worker owns its SignalProcessing, whose scratch buffers
+          are not thread-safe.
+        - The caller of run_pass is the consumer: it receives spectra and does logging/UI.
+        When the ring is full the acquisition thread waits (an acquisition stall); when it is
+        empty the workers wait (a DSP stall). stats() reports both, plus queue depths.
+        """
+        self.config = config
+        self.daq = daq
+        self.num_workers = num_workers or config.get("pipeline_workers", 2)
+        self.ring_size = ring_size or config.get("pipeline_ring_size", 8)
+        self.samples_per_scan = config["samples_per_scan"]
+
+        self.ring = np.zeros((self.ring_size, self.samples_per_scan), dtype=np.complex64)
+        self.processors = [SignalProcessing(config) for _ in range(self.num_workers)]
+        self.fft_size = self.processors[0].fft_size
+        self.results = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the stall counters and queue high-water marks."""
+        with self._stats_lock:
+            self._stats = {
+                "steps": 0,
+                "acquisition_stalls": 0,
+                "acquisition_stall_time": 0.0,
+                "dsp_stalls": 0,
+                "dsp_stall_time": 0.0,
+                "max_ring_depth": 0,
+                "max_result_depth": 0,
+                "pass_time": 0.0,
+            }
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _get(self, q, stall_key):
+        """Take an item from q, recording a stall if the stage had to wait for it."""
+        try:
+            return q.get_nowait()
+        except queue.Empty:
+            started = time.perf_counter()
+            item = q.get()
+            with self._stats_lock:
+                self._stats[stall_key + "_stalls"] += 1
+                self._stats[stall_key + "_stall_time"] += time.perf_counter() - started
+            return item
+
+    def _acquire(self, frequencies, free_slots, filled, errors):
+        try:
+            for index, freq in enumerate(frequencies):
+                slot = self._get(free_slots, "acquisition")
+                tuned_freq, samples = self.daq.scan(freq)
+                n = min(len(samples), self.samples_per_scan)
+                self.ring[slot, :n] = samples[:n]
+                self.ring[slot, n:] = 0
+                filled.put((index, tuned_freq, slot))
+                with self._stats_lock:
+                    self._stats["max_ring_depth"] = max(self._stats["max_ring_depth"], filled.qsize())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for _ in range(self.num_workers):
+                filled.put(_END_OF_PASS)
+
+    def _process(self, sp, free_slots, filled, results, errors):
+        failed = False
+        while True:
+            item = self._get(filled, "dsp")
+            if item is _END_OF_PASS:
+                break
+            index, freq, slot = item
+            try:
+                # After a failure keep draining so the acquisition thread never blocks on a full ring.
+                if not failed:
+                    spectrum = sp.process(self.ring[slot]).copy()
+                    results.put((index, freq, spectrum))
+                    with self._stats_lock:
+                        self._stats["steps"] += 1
+                        self._stats["max_result_depth"] = max(self._stats["max_result_depth"], results.qsize())
+            except Exception as e:
+                errors.append(e)
+                failed = True
+            finally:
+                free_slots.put(slot)
+        results.put(_END_OF_PASS)
+
+    def run_pass(self, frequencies=None):
+        """
+        Scan every frequency (default: daq.frequency_list()) and yield (index, freq, spectrum)
+        as spectra become available. With several workers, results can arrive out of order;
+        index is the position in the frequency list. Errors from the acquisition or DSP
+        threads are re-raised here once the pass has drained.
+        """
+        frequencies = self.daq.frequency_list() if frequencies is None else frequencies
+        free_slots = queue.Queue()
+        for slot in range(self.ring_size):
+            free_slots.put(slot)
+        filled = queue.Queue()
+        # Spectra are small; the result queue is unbounded so a slow consumer never stalls the radio.
+        self.results = queue.Queue()
+        errors = []
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self._acquire, args=(frequencies, free_slots, filled, errors),
+                                    name="scan-acquisition", daemon=True)]
+        threads += [threading.Thread(target=self._process, args=(sp, free_slots, filled, self.results, errors),
+                                     name=f"scan-dsp-{i}", daemon=True)
+                    for i, sp in enumerate(self.processors)]
+        for thread in threads:
+            thread.start()
+
+        finished_workers = 0
+        while finished_workers < self.num_workers:
+            item = self.results.get()
+            if item is _END_OF_PASS:
+                finished_workers += 1
+                continue
+            yield item
+
+        for thread in threads:
+            thread.join()
+        self._count("pass_time", time.perf_counter() - started)
+        if errors:
+            raise errors[0]
+
+    def results_pending(self):
+        """Number of spectra waiting for the consumer; a UI can skip redraws while this is non-zero."""
+        return self.results.qsize()
+
+    def stats(self):
+        """Snapshot of step count, stall counters/time per stage and queue high-water marks."""
+        with self._stats_lock:
+            return dict(self._stats)
@@ -0,0 +1,100 @@
+import bisect
+import contextlib
+import threading
+import time
+
+# Upper bounds (seconds) of the per-stage latency histogram buckets; the last one catches everything.
+BUCKETS = (0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, float("inf"))
+
+class StageStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+class ScanProfiler:
+    def __init__(self):
+        """
+        Low-overhead timing of scan stages (tune, read_samples, fft, reduce, logging, ui, ...).
+        Each stage keeps a count, total, max and a latency histogram for the whole run, plus
+        totals for the current pass that end_pass() returns and clears. Safe to record from
+        pipeline threads; with the pipeline enabled, stage times overlap and can sum to more
+        than the wall time.
+        """
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.pass_totals = {}
+        self.passes = 0
+        self.started = time.perf_counter()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.count += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            stats.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            count, total = self.pass_totals.get(stage, (0, 0.0))
+            self.pass_totals[stage] = (count + 1, total + seconds)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the body of a with-block as one occurrence of stage name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def end_pass(self):
+        """Per-stage {"count", "seconds"} for the pass just finished; starts a new pass."""
+        with self.lock:
+            totals, self.pass_totals = self.pass_totals, {}
+            self.passes += 1
+        return {stage: {"count": count, "seconds": round(total, 6)} for stage, (count, total) in totals.items()}
+
+    def reset(self):
+        with self.lock:
+            self.stages, self.pass_totals, self.passes = {}, {}, 0
+            self.started = time.perf_counter()
+
+    def summary(self):
+        """Table of every stage over the run, slowest total first."""
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1].total)
+            elapsed = time.perf_counter() - self.started
+        lines = [f"{'stage':<16}{'count':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}{'% wall':>8}"]
+        for name, stats in stages:
+            lines.append(f"{name:<16}{stats.count:>8}{stats.total:>10.3f}{stats.total / stats.count * 1e3:>10.3f}"
+                         f"{stats.max * 1e3:>10.3f}{100 * stats.total / max(elapsed, 1e-9):>8.1f}")
+        lines.append(f"{self.passes} pass(es) in {elapsed:.1f} s")
+        return "\n".join(lines)
+
+    def prometheus(self, prefix="rf_scanner"):
+        """Stage histograms in the Prometheus text exposition format."""
+        with self.lock:
+            stages = [(name, stats.count, stats.total, list(stats.buckets)) for name, stats in self.stages.items()]
+            passes = self.passes
+        lines = [f"# HELP {prefix}_passes_total Completed scan passes.",
+                 f"# TYPE {prefix}_passes_total counter",
+                 f"{prefix}_passes_total {passes}",
+                 f"# HELP {prefix}_stage_seconds Time spent per scan stage.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for name, count, total, buckets in sorted(stages):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+# Process-wide profiler the scan modules record into.
+PROFILER = ScanProfiler()
@@ -0,0 +1,133 @@
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# One record per stored sweep; row i of a grid's power matrix belongs to record i.
+INDEX_DTYPE = np.dtype([("timestamp", "<f8"), ("config_hash", "S16")])
+
+def config_hash(config):
+    """Short stable fingerprint of a config dict, used to store each distinct config only once."""
+    return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def parse_timestamp(timestamp):
+    """Convert a scan timestamp (YYYYMMDD_HHMMSS string, datetime or epoch seconds) to epoch seconds."""
+    if isinstance(timestamp, str):
+        return datetime.datetime.strptime(timestamp, "%Y%m%d_%H%M%S").timestamp()
+    if isinstance(timestamp, datetime.datetime):
+        return timestamp.timestamp()
+    return float(timestamp)
+
+class ScanStore:
+    def __init__(self, directory):
+        """
+        Append-only binary store of sweeps, one sub-directory per band/frequency grid:
+          - grid.json: band, units and the grid's frequency count
+          - frequencies.npy: the frequency axis (Hz)
+          - power.f32: float32 matrix, one row per sweep, read back through a memory map
+          - index.bin: INDEX_DTYPE records (timestamp, config hash) in append order
+        Configs are kept once per hash in configs.json at the store root.
+        """
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.configs_path = os.path.join(self.directory, "configs.json")
+        self._configs = None
+
+    def _grid_id(self, band, frequencies, units):
+        digest = hashlib.sha1(np.ascontiguousarray(frequencies, dtype=np.float64).tobytes() + units.encode())
+        return f"{band}_{digest.hexdigest()[:12]}"
+
+    def configs(self):
+        """All stored configs keyed by config hash."""
+        if self._configs is None:
+            if os.path.exists(self.configs_path):
+                with open(self.configs_path, "r") as f:
+                    self._configs = json.load(f)
+            else:
+                self._configs = {}
+        return self._configs
+
+    def _store_config(self, config):
+        key = config_hash(config)
+        configs = self.configs()
+        if key not in configs:
+            configs[key] = config
+            tmp_path = self.configs_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(configs, f, default=str)
+            os.replace(tmp_path, self.configs_path)
+        return key
+
+    def append(self, scan_data, config=None, band=None):
+        """
+        Append one sweep. scan_data needs "timestamp", "frequencies" and "power_levels"
+        (and optionally "units"); band defaults to config["selected_band"].
+        Returns the grid id the sweep was written to.
+        """
+        config = config or {}
+        band = band or config.get("selected_band", "NONE")
+        units = scan_data.get("units", "linear")
+        frequencies = np.asarray(scan_data["frequencies"], dtype=np.float64)
+        power = np.asarray(scan_data["power_levels"], dtype=np.float32)
+        if power.shape != frequencies.shape:
+            raise ValueError(f"power_levels has {power.size} values for {frequencies.size} frequencies")
+
+        grid = self._grid_id(band, frequencies, units)
+        grid_dir = os.path.join(self.directory, grid)
+        if not os.path.exists(os.path.join(grid_dir, "grid.json")):
+            os.makedirs(grid_dir, exist_ok=True)
+            np.save(os.path.join(grid_dir, "frequencies.npy"), frequencies)
+            with open(os.path.join(grid_dir, "grid.json"), "w") as f:
+                json.dump({"band": band, "units": units, "num_frequencies": int(frequencies.size)}, f)
+
+        record = np.array([(parse_timestamp(scan_data["timestamp"]), self._store_config(config))], dtype=INDEX_DTYPE)
+        # Power row first: a reader never sees an index record without its data.
+        with open(os.path.join(grid_dir, "power.f32"), "ab") as f:
+            f.write(power.tobytes())
+        with open(os.path.join(grid_dir, "index.bin"), "ab") as f:
+            f.write(record.tobytes())
+        return grid
+
+    def grids(self, band=None):
+        """Grid ids in the store, optionally only those recorded for band."""
+        found = []
+        for name in sorted(os.listdir(self.directory)):
+            meta_path = os.path.join(self.directory, name, "grid.json")
+            if os.path.exists(meta_path):
+                if band is not None:
+                    with open(meta_path, "r") as f:
+                        if json.load(f)["band"] != band:
+                            continue
+                found.append(name)
+        return found
+
+    def grid_info(self, grid):
+        """The grid.json metadata (band, units, num_frequencies) of a grid."""
+        with open(os.path.join(self.directory, grid, "grid.json"), "r") as f:
+            return json.load(f)
+
+    def read(self, grid, start_time=None, end_time=None, start_freq=None, end_freq=None):
+        """
+        Read sweeps of one grid within [start_time, end_time] (epoch seconds, datetimes or
+        YYYYMMDD_HHMMSS strings) and [start_freq, end_freq] Hz.
+        Returns (index records, frequencies, power) where power is a read-only view of the
+        memory-mapped matrix; nothing beyond the index is loaded until it is accessed.
+        """
+        grid_dir = os.path.join(self.directory, grid)
+        frequencies = np.load(os.path.join(grid_dir, "frequencies.npy"), mmap_mode="r")
+        index = np.fromfile(os.path.join(grid_dir, "index.bin"), dtype=INDEX_DTYPE)
+        power_path = os.path.join(grid_dir, "power.f32")
+        rows = min(len(index), os.path.getsize(power_path) // (4 * len(frequencies)))
+        index = index[:rows]
+        if rows == 0:
+            return index, frequencies, np.empty((0, len(frequencies)), dtype=np.float32)
+        power = np.memmap(power_path, dtype=np.float32, mode="r", shape=(rows, len(frequencies)))
+
+        # Sweeps are appended in time order, so both axes can be sliced with a binary search.
+        row_lo = 0 if start_time is None else np.searchsorted(index["timestamp"], parse_timestamp(start_time), "left")
+        row_hi = rows if end_time is None else np.searchsorted(index["timestamp"], parse_timestamp(end_time), "right")
+        col_lo = 0 if start_freq is None else np.searchsorted(frequencies, start_freq, "left")
+        col_hi = len(frequencies) if end_freq is None else np.searchsorted(frequencies, end_freq, "right")
+        return index[row_lo:row_hi], frequencies[col_lo:col_hi], power[row_lo:row_hi, col_lo:col_hi]
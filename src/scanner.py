@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import numpy as np
+
+from pipeline import ScanPipeline
+from profiling import PROFILER
+from scheduler import SweepScheduler
+from signal_processing import SignalProcessing
+from stitching import SpectrumStitcher
+
+class Scanner:
+    def __init__(self, config, daq):
+        """
+        Runs one live sweep with the acquisition/DSP path selected in config:
+          - "pipeline_workers" > 0: threaded ScanPipeline
+          - "async_acquisition": DataAcquisition.scan_range_async
+          - otherwise: collect every capture, then one batched FFT
+        With "stitch_spectrum" the result is the stitched panorama, else one peak per step.
+        With "adaptive_sweep" a SweepScheduler picks the steps visited each pass; steps skipped
+        this pass contribute their most recent spectrum.
+        """
+        self.config = config
+        self.daq = daq
+        self.sp = SignalProcessing(config)
+        self.stitcher = SpectrumStitcher(config) if config.get("stitch_spectrum", False) else None
+        self.pipeline = ScanPipeline(config, daq) if config.get("pipeline_workers", 0) > 0 else None
+        self.scheduler = SweepScheduler(config, daq.frequency_list()) if config.get("adaptive_sweep", False) else None
+        self.last_spectra = None  # latest spectrum of every grid step, for adaptive sweeps
+        self.verbose = config.get("verbose", False)
+
+    def reduce(self, tuned_freqs, spectra):
+        """Turn per-step spectra into the sweep result: stitched panorama or one peak per step."""
+        with PROFILER.stage("reduce"):
+            if self.stitcher is not None:
+                return self.stitcher.stitch(tuned_freqs, spectra)
+            return np.asarray(tuned_freqs), spectra.max(axis=1)
+
+    def run_pass(self, on_step=None):
+        """
+        Scan the configured range once, calling on_step(freq, progress_percent) as steps complete.
+        Returns (frequencies, power_levels) arrays; power is in dBFS.
+        """
+        on_step = on_step or (lambda freq, progress: None)
+        indices = None
+        if self.scheduler is not None:
+            indices = self.scheduler.plan()
+            frequency_list = self.scheduler.frequencies[indices]
+        else:
+            frequency_list = self.daq.frequency_list()
+        started = time.monotonic()
+
+        if self.pipeline is not None:
+            tuned_freqs, spectra = self._run_pipeline(frequency_list, on_step)
+            return self.complete(indices, tuned_freqs, spectra, started)
+
+        # Collect the whole pass into one stack so the FFT runs as a single batched call.
+        captures = np.empty((len(frequency_list), self.config["samples_per_scan"]), dtype=np.complex64)
+        tuned_freqs = []
+
+        def store(freq, iq_samples):
+            captures[len(tuned_freqs)] = iq_samples
+            tuned_freqs.append(freq)
+            on_step(freq, len(tuned_freqs) / len(frequency_list) * 100)
+
+        if self.config.get("async_acquisition", False):
+            async def read_pass():
+                async for freq, iq_samples in self.daq.scan_range_async(frequency_list):
+                    store(freq, iq_samples)
+            asyncio.run(read_pass())
+        else:
+            for freq, iq_samples in self.daq.scan_range(frequency_list):
+                store(freq, iq_samples)
+
+        return self.complete(indices, tuned_freqs, self.sp.process_batch(captures[:len(tuned_freqs)]), started)
+
+    def complete(self, indices, tuned_freqs, spectra, started):
+        """Reduce a pass; for adaptive sweeps, feed the scheduler and merge in the steps not revisited."""
+        if self.scheduler is None:
+            return self.reduce(tuned_freqs, spectra)
+
+        indices = indices[:len(spectra)]
+        self.scheduler.update(indices, spectra.max(axis=1), time.monotonic() - started)
+        if self.last_spectra is None or self.last_spectra.shape[1] != spectra.shape[1]:
+            self.last_spectra = np.empty((len(self.scheduler.frequencies), spectra.shape[1]), dtype=np.float32)
+        self.last_spectra[indices] = spectra
+        seen = self.scheduler.last_visit >= 0
+        if self.verbose:
+            print(f"🗓️ Adaptive sweep: visited {len(indices)} of {len(seen)} steps")
+        return self.reduce(self.scheduler.frequencies[seen], self.last_spectra[seen])
+
+    def _run_pipeline(self, frequency_list, on_step):
+        spectra = np.empty((len(frequency_list), self.pipeline.fft_size), dtype=np.float32)
+        tuned_freqs = np.array(frequency_list)
+        for index, freq, spectrum in self.pipeline.run_pass(frequency_list):
+            spectra[index] = spectrum
+            tuned_freqs[index] = freq
+            # Only report progress once the consumer has caught up, so the UI never backs up the sweep.
+            if self.pipeline.results_pending() == 0:
+                on_step(freq, (index + 1) / len(frequency_list) * 100)
+
+        if self.verbose:
+            print(f"📊 Pipeline stats: {self.pipeline.stats()}")
+        self.pipeline.reset_stats()
+        return tuned_freqs, spectra
@@ -0,0 +1,75 @@
+import numpy as np
+
+class SweepScheduler:
+    def __init__(self, config, frequencies):
+        """
+        Chooses which steps of the frequency grid to visit on each pass instead of walking it uniformly:
+          - steps never visited yet come first
+          - steps inside "scheduler_priority_ranges" ([start, end] Hz pairs, e.g. our IEM channels),
+            active steps (peak more than "scheduler_activity_db" above the noise floor, the 10th
+            percentile of step peaks) and changing steps (smoothed peak deviation above
+            "scheduler_variance_db") are visited every pass
+          - idle steps are revisited every "scheduler_idle_interval" passes
+        With "scheduler_time_budget" (seconds per pass) only as many steps as fit the budget at the
+        measured time per step are visited, highest priority first; the rest wait for a later pass.
+        """
+        self.frequencies = np.asarray(frequencies)
+        self.idle_interval = max(int(config.get("scheduler_idle_interval", 5)), 1)
+        self.activity_db = config.get("scheduler_activity_db", 10.0)
+        self.variance_db = config.get("scheduler_variance_db", 3.0)
+        self.time_budget = config.get("scheduler_time_budget")
+        self.smoothing = config.get("scheduler_smoothing", 0.3)
+
+        num_steps = len(self.frequencies)
+        self.peak = np.full(num_steps, np.nan)
+        self.mean = np.zeros(num_steps)
+        self.variance = np.zeros(num_steps)
+        self.last_visit = np.full(num_steps, -1, dtype=np.int64)  # pass number, -1 = never
+        self.pass_num = 0
+        self.step_time = None  # smoothed seconds per step, measured by update()
+
+        self.priority = np.zeros(num_steps, dtype=bool)
+        for start, end in config.get("scheduler_priority_ranges", []):
+            self.priority |= (self.frequencies >= start) & (self.frequencies <= end)
+
+    def scores(self):
+        """Per-step (score, due) arrays: due steps want a visit this pass, higher scores go first."""
+        visited = self.last_visit >= 0
+        age = np.where(visited, self.pass_num - self.last_visit, self.idle_interval)
+        floor = np.nanpercentile(self.peak, 10) if visited.any() else 0.0
+        with np.errstate(invalid="ignore"):
+            active = visited & (self.peak - floor > self.activity_db)
+        changing = visited & (np.sqrt(self.variance) > self.variance_db)
+        busy = self.priority | active | changing
+
+        due = ~visited | busy | (age >= self.idle_interval)
+        score = age / self.idle_interval + 100.0 * busy + 1000.0 * self.priority + 10000.0 * ~visited
+        return score, due
+
+    def plan(self):
+        """Indices into frequencies to visit this pass, in ascending frequency order."""
+        score, due = self.scores()
+        indices = np.flatnonzero(due)
+        if self.time_budget and self.step_time:
+            max_steps = max(int(self.time_budget / self.step_time), 1)
+            if len(indices) > max_steps:
+                indices = np.sort(indices[np.argsort(-score[indices], kind="stable")[:max_steps]])
+        return indices
+
+    def update(self, indices, peaks, elapsed):
+        """Record the peak (dB) of each visited step and the time the pass took."""
+        peaks = np.asarray(peaks, dtype=np.float64)
+        first = self.last_visit[indices] < 0
+        delta = peaks - self.mean[indices]
+        # Exponentially weighted mean/variance of each step's peak; a first visit just seeds the mean.
+        self.mean[indices] = np.where(first, peaks, self.mean[indices] + self.smoothing * delta)
+        self.variance[indices] = np.where(
+            first, 0.0, (1 - self.smoothing) * (self.variance[indices] + self.smoothing * delta ** 2))
+        self.peak[indices] = peaks
+        self.last_visit[indices] = self.pass_num
+        self.pass_num += 1
+
+        if len(indices):
+            per_step = elapsed / len(indices)
+            self.step_time = per_step if self.step_time is None else (
+                self.step_time + self.smoothing * (per_step - self.step_time))
@@ -0,0 +1,208 @@
+import json
+import os
+import time
+
+import numpy as np
+
+# Carriers synthesized by SimulatedSDR when config has no "sim_carriers": a few IEM-like
+# transmitters in the PSM 1000 range, two of them close enough to produce visible IM3 products.
+DEFAULT_SIM_CARRIERS = [
+    {"frequency": 474200000, "power_dbfs": -30.0},
+    {"frequency": 474600000, "power_dbfs": -32.0},
+    {"frequency": 518350000, "power_dbfs": -40.0},
+    {"frequency": 575125000, "power_dbfs": -25.0},
+]
+
+# Values accepted by the "sdr_backend" config key.
+BACKENDS = ("rtlsdr", "simulator", "replay")
+
+def iq_to_bytes(samples):
+    """Quantize complex IQ in [-1, 1] to interleaved unsigned 8-bit bytes, as the dongle delivers over USB."""
+    interleaved = np.asarray(samples, dtype=np.complex64).view(np.float32)
+    return np.clip(np.rint(interleaved * 127.5 + 127.5), 0, 255).astype(np.uint8).tobytes()
+
+class SimulatedSDR:
+    def __init__(self, config):
+        """
+        Deterministic stand-in for an RTL-SDR with the pyrtlsdr interface used by DataAcquisition.
+        Uses from config:
+          - "sim_carriers": list of {"frequency", "power_dbfs"} transmitters (default DEFAULT_SIM_CARRIERS)
+          - "sim_noise_floor_dbfs": per-sample noise power (default -60)
+          - "sim_intermod_suppression_db": 3rd-order products 2f1-f2 / 2f2-f1 sit this far below the
+            weaker carrier of each pair (default 40; null disables intermod)
+          - "sim_tune_latency": seconds a retune blocks, like the R820T PLL lock (default 0)
+          - "sim_settle_samples": samples after a retune that carry a decaying DC transient (default 0)
+          - "sim_dc_offset": [I, Q] DC offset added to every sample (default none)
+          - "sim_iq_gain_imbalance" / "sim_iq_phase_deg": Q-channel gain ratio and quadrature error
+            (default 1.0 / 0.0, a perfect mixer)
+          - "sim_seed": noise seed; the same seed and call sequence always produce the same samples
+        """
+        self.sample_rate = config.get("sample_rate", 1024000)
+        self.gain = config.get("gain", 0)
+        self.freq_correction = config.get("freq_correction", 0)
+        self.serial = config.get("sim_serial", "SIMULATOR")
+        self.noise_floor_dbfs = config.get("sim_noise_floor_dbfs", -60.0)
+        self.tune_latency = config.get("sim_tune_latency", 0.0)
+        self.settle_samples = config.get("sim_settle_samples", 0)
+        self.rng = np.random.default_rng(config.get("sim_seed", 0))
+        self.dc_offset = complex(*config.get("sim_dc_offset", (0.0, 0.0)))
+        self.iq_gain = config.get("sim_iq_gain_imbalance", 1.0)
+        self.iq_phase = np.deg2rad(config.get("sim_iq_phase_deg", 0.0))
+
+        carriers = config.get("sim_carriers", DEFAULT_SIM_CARRIERS)
+        frequencies = [c["frequency"] for c in carriers]
+        powers = [c["power_dbfs"] for c in carriers]
+        suppression = config.get("sim_intermod_suppression_db", 40.0)
+        if suppression is not None:
+            for i in range(len(carriers)):
+                for j in range(len(carriers)):
+                    if i != j:
+                        frequencies.append(2 * frequencies[i] - frequencies[j])
+                        powers.append(min(powers[i], powers[j]) - suppression)
+        self.frequencies = np.array(frequencies, dtype=np.float64)
+        self.amplitudes = 10 ** (np.array(powers, dtype=np.float64) / 20)
+        self.phases = self.rng.uniform(0, 2 * np.pi, len(self.frequencies))
+
+        self._center_freq = 0
+        self._sample_clock = 0
+        self._since_tune = 0
+
+    @property
+    def center_freq(self):
+        return self._center_freq
+
+    @center_freq.setter
+    def center_freq(self, frequency):
+        if self.tune_latency:
+            time.sleep(self.tune_latency)
+        self._center_freq = int(frequency)
+        self._since_tune = 0
+
+    def read_samples(self, num_samples):
+        """Synthesize num_samples of complex64 IQ at the current center frequency."""
+        t = (self._sample_clock + np.arange(num_samples)) / self.sample_rate
+        self._sample_clock += num_samples
+
+        offsets = self.frequencies - self._center_freq
+        visible = np.abs(offsets) < self.sample_rate / 2
+        phase = 2 * np.pi * np.outer(t, offsets[visible]) + self.phases[visible]
+        samples = (np.exp(1j * phase) * self.amplitudes[visible]).sum(axis=1)
+
+        sigma = np.sqrt(10 ** (self.noise_floor_dbfs / 10) / 2)
+        samples += sigma * (self.rng.standard_normal(num_samples) + 1j * self.rng.standard_normal(num_samples))
+
+        if self._since_tune < self.settle_samples:
+            n = np.arange(self._since_tune, self._since_tune + num_samples)
+            samples += 0.5 * np.exp(-5.0 * n / self.settle_samples)
+        self._since_tune += num_samples
+
+        if self.iq_gain != 1.0 or self.iq_phase:
+            q = self.iq_gain * (samples.imag * np.cos(self.iq_phase) + samples.real * np.sin(self.iq_phase))
+            samples = samples.real + 1j * q
+        return (samples + self.dc_offset).astype(np.complex64)
+
+    def read_bytes(self, num_bytes):
+        """Synthesize num_bytes of interleaved unsigned 8-bit IQ."""
+        return iq_to_bytes(self.read_samples(num_bytes // 2))
+
+    def stream(self, num_samples_or_bytes=131072, format="samples"):
+        """Async iterator mirroring pyrtlsdr's RtlSdrAio.stream."""
+        async def chunks():
+            while True:
+                if format == "bytes":
+                    yield self.read_bytes(num_samples_or_bytes)
+                else:
+                    yield self.read_samples(num_samples_or_bytes)
+        return chunks()
+
+    async def stop(self):
+        """Stop streaming (nothing to cancel for a simulated device)."""
+
+    def close(self):
+        """Release the device (no-op)."""
+
+class ReplaySDR:
+    def __init__(self, config):
+        """
+        Plays back recorded complex64 IQ from a memory-mapped file ("sdr_replay_path").
+        - Raw .cf32 files are played sequentially, wrapping at the end.
+        - A .sigmf-data file with a .sigmf-meta sidecar whose "captures" carry core:frequency and
+          core:sample_start serves each tune from the capture recorded at that frequency.
+        read_samples returns views into the memory map wherever the request fits in the recording.
+        """
+        self.path = config["sdr_replay_path"]
+        self.sample_rate = config.get("sample_rate", 1024000)
+        self.gain = config.get("gain", 0)
+        self.freq_correction = config.get("freq_correction", 0)
+        self.serial = config.get("sim_serial", "REPLAY")
+        self.center_freq = 0
+        self.data = np.memmap(self.path, dtype=np.complex64, mode="r")
+        self._cursor = 0
+
+        # frequency -> (first sample, sample count) of the recorded capture at that frequency
+        self.captures = {}
+        meta_path = os.path.splitext(self.path)[0] + ".sigmf-meta"
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            self.sample_rate = meta.get("global", {}).get("core:sample_rate", self.sample_rate)
+            captures = sorted(meta.get("captures", []), key=lambda c: c["core:sample_start"])
+            # An IQRecorder recording that was never closed is still padded past its recorded samples.
+            end = min(meta.get("global", {}).get("rfscanner:recorded_samples", len(self.data)), len(self.data))
+            starts = [c["core:sample_start"] for c in captures] + [end]
+            for capture, end in zip(captures, starts[1:]):
+                start = capture["core:sample_start"]
+                self.captures[int(capture["core:frequency"])] = (start, end - start)
+
+    def _slice(self, start, length, num_samples):
+        if num_samples <= length:
+            return self.data[start:start + num_samples]
+        return np.resize(self.data[start:start + length], num_samples)
+
+    def read_samples(self, num_samples):
+        """Return num_samples of recorded IQ for the current center frequency."""
+        if self.captures:
+            nearest = min(self.captures, key=lambda f: abs(f - self.center_freq))
+            start, length = self.captures[nearest]
+            return self._slice(start, length, num_samples)
+
+        if self._cursor + num_samples > len(self.data):
+            self._cursor = 0
+        samples = self._slice(self._cursor, len(self.data) - self._cursor, num_samples)
+        self._cursor += num_samples
+        return samples
+
+    def stream(self, num_samples_or_bytes=131072, format="samples"):
+        """Async iterator mirroring pyrtlsdr's RtlSdrAio.stream."""
+        async def chunks():
+            while True:
+                if format == "bytes":
+                    yield iq_to_bytes(self.read_samples(num_samples_or_bytes // 2))
+                else:
+                    yield self.read_samples(num_samples_or_bytes)
+        return chunks()
+
+    async def stop(self):
+        """Stop streaming (nothing to cancel for a file)."""
+
+    def close(self):
+        """Release the memory map."""
+        self.data = None
+
+def create_sdr(config):
+    """
+    Open the SDR backend named by config "sdr_backend": "rtlsdr" (default, physical dongle),
+    "simulator" (SimulatedSDR) or "replay" (ReplaySDR).
+    A dongle is picked by "sdr_serial" if set, else by "sdr_device_index" (default 0).
+    """
+    backend = config.get("sdr_backend", "rtlsdr")
+    if backend == "simulator":
+        return SimulatedSDR(config)
+    if backend == "replay":
+        return ReplaySDR(config)
+    if backend == "rtlsdr":
+        from rtlsdr import RtlSdr
+        if config.get("sdr_serial") is not None:
+            return RtlSdr(serial_number=config["sdr_serial"])
+        return RtlSdr(device_index=config.get("sdr_device_index", 0))
+    raise ValueError(f"Unknown sdr_backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
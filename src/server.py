@@ -0,0 +1,362 @@
+import base64
+import datetime
+import hashlib
+import json
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from detection import CarrierDetector
+from profiling import PROFILER
+from scanner import Scanner
+
+# Binary spectrum frame, little-endian:
+#   magic, kind (key/delta), channel (spectrum/max-hold), sequence,
+#   start frequency (Hz), frequency step (Hz), point count, floor (dB), quantization step (dB)
+# followed by a zlib-compressed uint8 payload with one value per point.
+# Key frames carry round((power - floor) / step); delta frames carry the per-point change
+# from the previous frame of the same channel, modulo 256, which compresses to almost
+# nothing on a quiet band.
+FRAME_HEADER = struct.Struct("<4sBBIddIff")
+FRAME_MAGIC = b"RFS1"
+FRAME_KEY = 0
+FRAME_DELTA = 1
+CHANNEL_SPECTRUM = 0
+CHANNEL_MAX_HOLD = 1
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+def quantize(power, floor_db, step_db):
+    """Map dB values onto 0..255 in step_db increments above floor_db."""
+    return np.clip(np.rint((np.asarray(power, dtype=np.float32) - floor_db) / step_db), 0, 255).astype(np.uint8)
+
+def encode_frame(kind, channel, sequence, frequencies, quantized, floor_db, step_db, previous=None):
+    """Pack one frame; delta frames need the previous frame's quantized values of the same channel."""
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    step = float(frequencies[1] - frequencies[0]) if len(frequencies) > 1 else 0.0
+    payload = quantized if kind == FRAME_KEY else quantized - previous  # uint8 arithmetic wraps mod 256
+    header = FRAME_HEADER.pack(FRAME_MAGIC, kind, channel, sequence, float(frequencies[0]), step,
+                               len(quantized), floor_db, step_db)
+    return header + zlib.compress(payload.tobytes(), 1)
+
+def decode_frame(frame, previous=None):
+    """
+    Unpack a frame produced by encode_frame. For delta frames pass the previous decoded frame
+    of the same channel. Returns a dict with kind, channel, sequence, frequencies, power (dB)
+    and quantized (needed to apply the next delta).
+    """
+    magic, kind, channel, sequence, start, step, count, floor_db, step_db = FRAME_HEADER.unpack_from(frame)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Not a spectrum frame")
+    payload = np.frombuffer(zlib.decompress(frame[FRAME_HEADER.size:]), dtype=np.uint8)
+    if kind == FRAME_DELTA:
+        if previous is None:
+            raise ValueError("Delta frame received without a previous key frame")
+        payload = previous["quantized"] + payload
+    return {
+        "kind": kind,
+        "channel": channel,
+        "sequence": sequence,
+        "frequencies": start + np.arange(count) * step,
+        "power": floor_db + payload.astype(np.float32) * step_db,
+        "quantized": payload,
+    }
+
+def websocket_frame(payload, opcode=0x2):
+    """Wrap payload in a single unmasked server-to-client WebSocket frame (binary by default)."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+def recv_websocket_frame(sock):
+    """Read one WebSocket frame from sock; returns (opcode, payload). Used by Python clients and tests."""
+    def read_exact(n):
+        data = b""
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("WebSocket closed")
+            data += chunk
+        return data
+
+    first, second = read_exact(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", read_exact(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", read_exact(8))
+    mask = read_exact(4) if second & 0x80 else None
+    payload = read_exact(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+class StreamClient:
+    def __init__(self, queue_size):
+        """One WebSocket subscriber: a small frame queue plus per-channel resync flags."""
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.needs_key = {CHANNEL_SPECTRUM: True, CHANNEL_MAX_HOLD: True}
+
+class SpectrumBroadcaster:
+    def __init__(self, config):
+        """
+        Encodes each sweep once and fans it out to every WebSocket client without blocking.
+        A client whose queue is full misses the frame and is sent a key frame next time.
+        Every channel counts its own sequence numbers and sends a key frame every
+        "stream_keyframe_interval" publishes. Channel state and the fan-out change under one
+        lock, so a client subscribing mid-publish always starts from a key frame.
+        """
+        self.floor_db = config.get("stream_floor_db", -127.5)
+        self.step_db = config.get("stream_step_db", 0.5)
+        self.keyframe_interval = config.get("stream_keyframe_interval", 10)
+        self.queue_size = config.get("stream_client_queue", 4)
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.sequence = {}
+        self.previous = {}
+        self.latest_key = {}
+
+    def subscribe(self):
+        """A new client, its queue seeded with the latest key frame of each channel."""
+        client = StreamClient(self.queue_size)
+        with self.lock:
+            for channel, frame in self.latest_key.items():
+                client.frames.put_nowait(frame)
+                client.needs_key[channel] = False
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def publish(self, channel, frequencies, power):
+        """Encode one sweep (key + delta frame) and queue the right one for each client."""
+        quantized = quantize(power, self.floor_db, self.step_db)
+        with self.lock:
+            sequence = self.sequence[channel] = self.sequence.get(channel, 0) + 1
+            key = encode_frame(FRAME_KEY, channel, sequence, frequencies, quantized, self.floor_db, self.step_db)
+            previous = self.previous.get(channel)
+            delta = None
+            if previous is not None and len(previous) == len(quantized) and sequence % self.keyframe_interval:
+                delta = encode_frame(FRAME_DELTA, channel, sequence, frequencies, quantized,
+                                     self.floor_db, self.step_db, previous)
+            self.previous[channel] = quantized
+            self.latest_key[channel] = key
+
+            for client in self.clients:
+                frame = key if delta is None or client.needs_key[channel] else delta
+                try:
+                    client.frames.put_nowait(frame)
+                    client.needs_key[channel] = False
+                except queue.Full:
+                    client.needs_key[channel] = True
+
+def make_handler(daemon):
+    class ScanRequestHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass  # keep the console for scan output
+
+        def send_body(self, body, content_type="application/json", status=200):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/ws" and self.headers.get("Upgrade", "").lower() == "websocket":
+                self.stream()
+            elif path == "/api/status":
+                self.send_body(json.dumps(daemon.status()).encode())
+            elif path == "/metrics" and daemon.config.get("daemon_metrics", True):
+                self.send_body(PROFILER.prometheus().encode(), "text/plain; version=0.0.4")
+            elif path in ("/api/spectrum", "/api/maxhold", "/api/events", "/api/diff"):
+                body = daemon.cached_json.get(path)
+                if body is None:
+                    self.send_body(b'{"error": "no sweep yet"}', status=503)
+                else:
+                    self.send_body(body)
+            elif path in ("/api/spectrum.bin", "/api/maxhold.bin"):
+                channel = CHANNEL_SPECTRUM if path == "/api/spectrum.bin" else CHANNEL_MAX_HOLD
+                frame = daemon.broadcaster.latest_key.get(channel)
+                if frame is None:
+                    self.send_body(b'{"error": "no sweep yet"}', status=503)
+                else:
+                    self.send_body(frame, "application/octet-stream")
+            else:
+                endpoints = ["/api/status", "/api/spectrum", "/api/maxhold", "/api/events", "/api/diff", "/metrics",
+                             "/api/spectrum.bin", "/api/maxhold.bin", "/ws"]
+                self.send_body(json.dumps({"endpoints": endpoints}).encode(), status=404 if path != "/" else 200)
+
+        def stream(self):
+            key = self.headers.get("Sec-WebSocket-Key", "")
+            accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+            self.send_response(101, "Switching Protocols")
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept)
+            self.end_headers()
+            self.wfile.flush()
+
+            client = daemon.broadcaster.subscribe()
+            try:
+                while not daemon.stop_event.is_set():
+                    try:
+                        frame = client.frames.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    self.wfile.write(websocket_frame(frame))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                daemon.broadcaster.unsubscribe(client)
+                self.close_connection = True
+
+    return ScanRequestHandler
+
+class ScanDaemon:
+    def __init__(self, config, daq, logger=None, scanner=None):
+        """
+        Headless scanner: sweeps continuously on a background thread and serves the latest
+        spectrum, max-hold and status over HTTP ("daemon_host", "daemon_port"), plus a
+        WebSocket stream of binary frames at /ws. HTTP responses are cached per sweep and
+        WebSocket frames are encoded once per sweep, so clients never slow the sweep loop.
+        scanner: anything with Scanner's run_pass (e.g. a MultiDeviceScanner); default Scanner(config, daq).
+        """
+        self.config = config
+        self.daq = daq
+        self.logger = logger
+        self.scanner = scanner or Scanner(config, daq)
+        self.broadcaster = SpectrumBroadcaster(config)
+        self.stop_event = threading.Event()
+        self.cached_json = {}
+        self.max_hold = None
+        # With "detect_carriers", /api/events serves the active carriers and recent appear/disappear events.
+        self.detector = CarrierDetector(config) if config.get("detect_carriers", False) else None
+        self.events = deque(maxlen=config.get("daemon_event_history", 200))
+        # With "diff_mode" (and a logger to learn from), /api/diff serves only what differs from the baseline.
+        self.baseline = logger.load_baseline() if logger is not None and config.get("diff_mode", False) else None
+        self._status = {"passes": 0, "current_frequency": None, "progress": 0.0,
+                        "last_sweep_seconds": None, "last_sweep_time": None, "last_profile": None, "errors": 0}
+        self.httpd = ThreadingHTTPServer((config.get("daemon_host", "0.0.0.0"), config.get("daemon_port", 8080)),
+                                         make_handler(self))
+        self.httpd.daemon_threads = True
+        self.threads = []
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def status(self):
+        return {**self._status, "clients": len(self.broadcaster.clients),
+                "start_frequency": self.config["start_frequency"], "end_frequency": self.config["end_frequency"]}
+
+    def _on_step(self, freq, progress):
+        self._status["current_frequency"] = float(freq)
+        self._status["progress"] = progress
+
+    def run_sweep(self):
+        """Run one pass, publish it to HTTP/WebSocket clients and hand it to the logger."""
+        started = time.perf_counter()
+        frequencies, power = self.scanner.run_pass(self._on_step)
+        power = np.asarray(power, dtype=np.float32)
+        if self.max_hold is None or self.max_hold.shape != power.shape:
+            self.max_hold = power.copy()
+        else:
+            np.fmax(self.max_hold, power, out=self.max_hold)
+
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        for path, values in (("/api/spectrum", power), ("/api/maxhold", self.max_hold)):
+            self.cached_json[path] = json.dumps({
+                "timestamp": timestamp, "units": "dBFS",
+                "frequencies": np.asarray(frequencies).tolist(), "power_levels": values.tolist(),
+            }).encode()
+        if self.detector is not None:
+            with PROFILER.stage("detection"):
+                self.events.extend(self.detector.update(timestamp, frequencies, power))
+            self.cached_json["/api/events"] = json.dumps({
+                "timestamp": timestamp, "units": "dBFS",
+                "active": self.detector.active_carriers(), "events": list(self.events),
+            }).encode()
+        self.broadcaster.publish(CHANNEL_SPECTRUM, frequencies, power)
+        self.broadcaster.publish(CHANNEL_MAX_HOLD, frequencies, self.max_hold)
+
+        if self.logger is not None:
+            scan_data = {"timestamp": timestamp, "frequencies": np.asarray(frequencies).tolist(),
+                         "power_levels": power.tolist(), "units": "dBFS"}
+            regions = None
+            if self.baseline is not None:
+                with PROFILER.stage("baseline"):
+                    power_dbm = self.logger.power_to_dbm(scan_data)
+                    changed = self.baseline.deviations(frequencies, power_dbm,
+                                                       self.config.get("baseline_threshold_sigma", 4.0),
+                                                       self.config.get("baseline_min_db", 6.0))
+                    regions = self.baseline.regions(frequencies, power_dbm, changed)
+                    unknown = int(self.baseline.unknown(frequencies).sum())
+                self.cached_json["/api/diff"] = json.dumps({
+                    "timestamp": timestamp, "units": "dBm", "points": len(power), "unknown_points": unknown,
+                    "regions": regions,
+                }).encode()
+            with PROFILER.stage("logging"):
+                if regions is None:
+                    self.logger.save_log(scan_data)
+                else:
+                    self.logger.save_diff(scan_data, regions)
+                self.logger.update_recent_scan(scan_data)
+        elapsed = time.perf_counter() - started
+        profile = {"timestamp": timestamp, "wall_seconds": round(elapsed, 6), "stages": PROFILER.end_pass()}
+        if self.logger is not None:
+            self.logger.log_profile(profile)
+        self._status.update(passes=self._status["passes"] + 1, last_sweep_time=timestamp,
+                            last_sweep_seconds=elapsed, last_profile=profile["stages"])
+
+    def sweep_forever(self):
+        while not self.stop_event.is_set():
+            try:
+                self.run_sweep()
+            except Exception as e:
+                self._status["errors"] += 1
+                print(f"❌ Error in daemon sweep: {e}")
+                self.stop_event.wait(1.0)
+
+    def start(self):
+        """Start the HTTP server and the sweep loop on background threads."""
+        self.threads = [threading.Thread(target=self.httpd.serve_forever, name="scan-http", daemon=True),
+                        threading.Thread(target=self.sweep_forever, name="scan-sweeps", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+        host, port = self.address[:2]
+        print(f"🌐 Scan daemon serving on http://{host}:{port} (WebSocket at /ws)")
+
+    def stop(self):
+        self.stop_event.set()
+        self.httpd.shutdown()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        """Run until interrupted (Ctrl-C)."""
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                self.stop_event.wait(1.0)
+        except KeyboardInterrupt:
+            print("🔻 Stopping scan daemon.")
+        finally:
+            self.stop()
@@ -1,19 +1,141 @@
+import time
+
 import numpy as np
 
+from profiling import PROFILER
+
+# Window functions available through the "fft_window" config key.
+WINDOWS = {
+    "rectangular": np.ones,
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+}
+
+# Floor applied before taking the log so empty bins don't produce -inf.
+POWER_FLOOR = 1e-20
+
+# How the segments of one capture are combined: "peak" keeps the strongest value per bin
+# (short bursts survive), "welch" averages them (lower noise floor for the same capture time).
+PSD_MODES = ("peak", "welch")
+
 class SignalProcessing:
     def __init__(self, config):
         self.config = config
+        self.psd_mode = config.get("psd_mode", "peak")
+        self.fft_size = int(config.get("fft_size", config.get("samples_per_scan", 4096)))
+        self.overlap = float(config.get("fft_overlap", 0.5 if self.psd_mode == "welch" else 0.0))
+        self.dc_notch_bins = int(config.get("dc_notch_bins", 3))
 
-    def process(self, samples):
-        """Convert IQ samples to a frequency spectrum using FFT and remove DC spike."""
-        print("[SignalProcessing] Processing FFT...")
-        fft_size=16384
+        window_name = config.get("fft_window", "hann")
+        if window_name not in WINDOWS:
+            raise ValueError(f"Unknown FFT window '{window_name}'. Choose one of: {', '.join(WINDOWS)}")
+        if self.psd_mode not in PSD_MODES:
+            raise ValueError(f"Unknown psd_mode '{self.psd_mode}'. Choose one of: {', '.join(PSD_MODES)}")
+        if not 0.0 <= self.overlap < 1.0:
+            raise ValueError(f"fft_overlap must be in [0, 1), got {self.overlap}")
+
+        self.window = WINDOWS[window_name](self.fft_size).astype(np.float32)
+        # Normalise so a full-scale complex tone reads 0 dBFS regardless of window or FFT size.
+        self.window_scale = float(np.sum(self.window) ** 2)
+        self.hop = max(1, int(round(self.fft_size * (1.0 - self.overlap))))
+
+        # Scratch and output arrays, reallocated only when the batch shape changes.
+        # A SignalProcessing instance is therefore not safe to share between threads.
+        self._buffer_shape = None
+        self._segments = None
+        self._power = None
+        self._output = None
+        self._single_output = None
 
-        # Apply FFT to convert IQ samples to frequency domain
-        spectrum = np.abs(np.fft.fftshift(np.fft.fft(samples, n=fft_size)))
+    def segment_starts(self, num_samples):
+        """Return the start index of every FFT segment that fits in a capture of num_samples."""
+        if num_samples <= self.fft_size:
+            return np.array([0])
+        return np.arange(0, num_samples - self.fft_size + 1, self.hop)
 
-        # Remove DC spike (center frequency)
-        center_bin = len(spectrum) // 2
-        spectrum[center_bin - 1:center_bin + 2] = 0  # Zero out the center 3 bins
+    def _buffers(self, num_captures, num_segments):
+        """Return (segments, power, output) scratch arrays sized for this batch, allocating only on shape change."""
+        shape = (num_captures, num_segments)
+        if self._buffer_shape != shape:
+            self._segments = np.empty((num_captures, num_segments, self.fft_size), dtype=np.complex64)
+            self._power = np.empty((num_captures, num_segments, self.fft_size), dtype=np.float32)
+            self._output = np.empty((num_captures, self.fft_size), dtype=np.float32)
+            self._buffer_shape = shape
+        return self._segments, self._power, self._output
+
+    def process_batch(self, captures, out=None):
+        """
+        Convert a 2-D stack of IQ captures (one row per center frequency) into power spectra.
+        - Each capture is split into fft_size segments advanced by the configured overlap;
+          captures shorter than fft_size are zero-padded.
+        - All segments of all captures go through one windowed FFT call.
+        - Segments of the same capture are combined per psd_mode: peak-hold ("peak") or
+          averaged periodogram ("welch").
+        Window, segment and power scratch arrays are reused between calls. Pass `out` to
+        receive the result in a caller-owned (num_captures, fft_size) float32 array.
+        Returns a float32 array of shape (num_captures, fft_size) in dBFS, DC-centred.
+        """
+        started = time.perf_counter()
+        captures = np.atleast_2d(np.asarray(captures, dtype=np.complex64))
+        num_captures, num_samples = captures.shape
+        num_segments = len(self.segment_starts(num_samples))
+        segments, power, output = self._buffers(num_captures, num_segments)
+        if out is None:
+            out = np.empty_like(output)
+
+        if num_samples < self.fft_size:
+            segments[:, 0, :num_samples] = captures
+            segments[:, 0, num_samples:] = 0
+            segments *= self.window
+        else:
+            # Strided view of every segment start; the only copy is the windowed write into scratch.
+            windows = np.lib.stride_tricks.sliding_window_view(captures, self.fft_size, axis=-1)[:, ::self.hop]
+            np.multiply(windows, self.window, out=segments)
+
+        spectra = np.fft.fft(segments, axis=-1)
+        np.multiply(spectra.real, spectra.real, out=power)
+        power += np.square(spectra.imag)
+
+        if self.psd_mode == "welch":
+            np.mean(power, axis=1, out=output)
+        else:
+            np.max(power, axis=1, out=output)
+        output /= self.window_scale
+
+        # fftshift into the output without an intermediate array.
+        half = self.fft_size // 2
+        out[:, half:] = output[:, :self.fft_size - half]
+        out[:, :half] = output[:, self.fft_size - half:]
+        self.remove_dc(out)
+        np.maximum(out, POWER_FLOOR, out=out)
+        np.log10(out, out=out)
+        out *= 10
+        PROFILER.record("fft", time.perf_counter() - started)
+        return out
+
+    def remove_dc(self, power):
+        """Replace the bins around DC (the RTL-SDR LO leakage spike) with the level of their neighbours, in place."""
+        if self.dc_notch_bins <= 0:
+            return power
+        center_bin = power.shape[-1] // 2
+        lo = center_bin - self.dc_notch_bins // 2
+        hi = lo + self.dc_notch_bins
+        neighbours = (power[..., max(lo - 1, 0)] + power[..., min(hi, power.shape[-1] - 1)]) / 2
+        power[..., lo:hi] = neighbours[..., None]
+        return power
+
+    def process(self, samples):
+        """
+        Convert a single capture of IQ samples to a dBFS spectrum with the DC spike removed.
+        The returned array is a preallocated buffer overwritten by the next call; copy it to keep it.
+        """
+        samples = np.asarray(samples)[np.newaxis, :]
+        if self._single_output is None:
+            self._single_output = np.empty((1, self.fft_size), dtype=np.float32)
+        return self.process_batch(samples, out=self._single_output)[0]
 
-        return spectrum
+    def bin_frequencies(self, center_freq, sample_rate=None):
+        """Absolute frequency (Hz) of each bin returned by process/process_batch for a capture at center_freq."""
+        sample_rate = sample_rate or self.config["sample_rate"]
+        return center_freq + np.fft.fftshift(np.fft.fftfreq(self.fft_size, d=1.0 / sample_rate))
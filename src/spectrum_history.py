@@ -0,0 +1,34 @@
+import numpy as np
+
+class SpectrumRingBuffer:
+    def __init__(self, capacity, num_bins, fill=np.nan):
+        """
+        Fixed-size history of rows (sweeps, or pixel-width waterfall rows) in one preallocated
+        float32 array. The ring is stored twice over and filled downwards, so the newest-first
+        history is always the contiguous view data[head:head + capacity]: a push writes two
+        rows and nothing is ever rolled or copied. Rows not yet written hold fill.
+        Memory stays constant however long the scanner runs.
+        """
+        self.capacity = int(capacity)
+        self.num_bins = int(num_bins)
+        self.data = np.full((2 * self.capacity, self.num_bins), fill, dtype=np.float32)
+        self.head = 0  # row of the newest entry once something is pushed
+        self.count = 0
+
+    def push(self, row):
+        """Add one row, overwriting the oldest once the buffer is full."""
+        row = np.asarray(row, dtype=np.float32)
+        if row.shape != (self.num_bins,):
+            raise ValueError(f"Expected {self.num_bins} bins, got {row.shape}")
+        self.head = (self.head - 1) % self.capacity
+        self.data[self.head] = row
+        self.data[self.head + self.capacity] = row
+        self.count = min(self.count + 1, self.capacity)
+
+    def latest(self, n=None):
+        """
+        The n most recent rows (default: all held, at most capacity), newest first, as a view
+        that the next push overwrites. Asking for more than count includes fill rows.
+        """
+        n = self.count if n is None else min(n, self.capacity)
+        return self.data[self.head:self.head + n]
@@ -0,0 +1,86 @@
+import numpy as np
+
+# How overlapping bins from neighbouring captures are combined on the global grid.
+MERGE_MODES = ("max", "mean")
+
+class SpectrumStitcher:
+    def __init__(self, config):
+        """
+        Builds a full-resolution panorama from the per-step spectra of a sweep.
+        Uses from config:
+          - "start_frequency"/"end_frequency", "sample_rate", "frequency_step"
+          - "fft_size" (defaults to "samples_per_scan", as in SignalProcessing)
+          - "stitch_usable_fraction": centre fraction of each capture's bandwidth to keep (default 0.8)
+          - "stitch_resolution_hz": spacing of the global grid (default 25 kHz, never finer than one FFT bin)
+          - "stitch_merge": "max" (peak-hold, default) or "mean" (power average) for overlapping bins
+          - "dc_notch_bins": bins around DC that are dropped rather than stitched (default 3)
+        """
+        self.config = config
+        self.start_freq = config["start_frequency"]
+        self.end_freq = config["end_frequency"]
+        self.sample_rate = config["sample_rate"]
+        self.fft_size = int(config.get("fft_size", config.get("samples_per_scan", 4096)))
+        self.usable_fraction = float(config.get("stitch_usable_fraction", 0.8))
+        self.merge = config.get("stitch_merge", "max")
+        dc_notch_bins = int(config.get("dc_notch_bins", 3))
+
+        if self.merge not in MERGE_MODES:
+            raise ValueError(f"Unknown stitch_merge '{self.merge}'. Choose one of: {', '.join(MERGE_MODES)}")
+        if not 0.0 < self.usable_fraction <= 1.0:
+            raise ValueError(f"stitch_usable_fraction must be in (0, 1], got {self.usable_fraction}")
+
+        bin_width = self.sample_rate / self.fft_size
+        self.resolution = max(float(config.get("stitch_resolution_hz", 25000)), bin_width)
+        self.frequencies = np.arange(self.start_freq, self.end_freq, self.resolution)
+
+        # Bins kept from every capture: inside the usable bandwidth and outside the DC notch.
+        offsets = np.fft.fftshift(np.fft.fftfreq(self.fft_size, d=1.0 / self.sample_rate))
+        usable = np.abs(offsets) <= self.usable_bandwidth / 2
+        if dc_notch_bins > 0:
+            lo = self.fft_size // 2 - dc_notch_bins // 2
+            usable[lo:lo + dc_notch_bins] = False
+        self.usable_bins = np.flatnonzero(usable)
+        self.bin_offsets = offsets[self.usable_bins]
+
+        step = config.get("frequency_step")
+        if step and step > self.usable_bandwidth:
+            print(f"⚠️ Warning: frequency_step {step / 1e3:.0f} kHz exceeds the usable bandwidth "
+                  f"{self.usable_bandwidth / 1e3:.0f} kHz; gaps will be interpolated.")
+
+    @property
+    def usable_bandwidth(self):
+        """Width in Hz of the part of each capture that is stitched into the panorama."""
+        return self.usable_fraction * self.sample_rate
+
+    def stitch(self, center_freqs, spectra):
+        """
+        Place the usable bins of every spectrum on the global grid and merge overlaps.
+        center_freqs: (num_captures,) tune frequencies in Hz.
+        spectra: (num_captures, fft_size) dB spectra as returned by SignalProcessing.process_batch.
+        Returns (frequencies, power) with power in the same dB units; grid cells no capture
+        reached are linearly interpolated from their neighbours.
+        """
+        center_freqs = np.asarray(center_freqs, dtype=np.float64)
+        spectra = np.atleast_2d(spectra)
+        num_points = len(self.frequencies)
+
+        bin_freqs = center_freqs[:, None] + self.bin_offsets[None, :]
+        indices = np.rint((bin_freqs - self.start_freq) / self.resolution).astype(np.int64).ravel()
+        values = spectra[:, self.usable_bins].ravel()
+        in_range = (indices >= 0) & (indices < num_points)
+        indices, values = indices[in_range], values[in_range]
+
+        counts = np.bincount(indices, minlength=num_points)
+        hit = counts > 0
+        if self.merge == "mean":
+            sums = np.bincount(indices, weights=10 ** (values / 10), minlength=num_points)
+            power = np.full(num_points, np.nan)
+            power[hit] = 10 * np.log10(sums[hit] / counts[hit])
+        else:
+            power = np.full(num_points, -np.inf)
+            np.maximum.at(power, indices, values)
+
+        if not hit.all() and hit.any():
+            power[~hit] = np.interp(self.frequencies[~hit], self.frequencies[hit], power[hit])
+
+        return self.frequencies, power.astype(np.float32)
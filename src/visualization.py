@@ -1,10 +1,44 @@
+import time
 import matplotlib.pyplot as plt
 import numpy as np
 
+from profiling import PROFILER
+from spectrum_history import SpectrumRingBuffer
+
+# Recent sweeps drawn in grey behind the current one; the y-limits and max trace cover the same window.
+HISTORY_LENGTH = 10
+
+def decimate_minmax(x, y, num_buckets):
+    """
+    Reduce a trace to at most 2 * num_buckets points, keeping the min and max of each bucket
+    so narrow carriers stay visible when there are more points than screen pixels.
+    """
+    y = np.asarray(y)
+    if num_buckets <= 0 or len(y) <= 2 * num_buckets:
+        return x, y
+    per_bucket = -(-len(y) // num_buckets)
+    pad = per_bucket * num_buckets - len(y)
+    padded = np.pad(y, (0, pad), mode="edge").reshape(num_buckets, per_bucket)
+    bucket_x = np.asarray(x)[::per_bucket][:num_buckets]
+    points = np.empty(2 * len(bucket_x))
+    points[0::2] = padded.min(axis=1)[:len(bucket_x)]
+    points[1::2] = padded.max(axis=1)[:len(bucket_x)]
+    return np.repeat(bucket_x, 2), points
+
+def decimate_max(y, num_buckets):
+    """Reduce a trace to num_buckets points (the max of each bucket), for one waterfall row."""
+    y = np.asarray(y)
+    if num_buckets <= 0 or len(y) <= num_buckets:
+        return y
+    per_bucket = -(-len(y) // num_buckets)
+    pad = per_bucket * num_buckets - len(y)
+    return np.pad(y, (0, pad), mode="edge").reshape(num_buckets, per_bucket).max(axis=1)
+
 class Visualization:
     def __init__(self, config, bands):
         self.config = config
         self.test_mode = config.get("test_mode", False)  # Check if test mode is enabled
+        self.verbose = config.get("verbose", False)  # per-step console output
         self.start_freq = config["start_frequency"]
         self.end_freq = config["end_frequency"]
         self.freq_step = config["frequency_step"]
@@ -16,7 +50,17 @@ class Visualization:
         num_steps = (self.end_freq - self.start_freq) // self.freq_step
         self.freqs = np.linspace(self.start_freq, self.end_freq, num=num_steps)
         
-        self.spectrum_history = []
+        # Recent sweeps live in a small ring (HISTORY_LENGTH); the waterfall keeps waterfall_rows
+        # pixel-width rows of older history in a second ring.
+        self.waterfall_rows = config.get("waterfall_rows", 300)
+        self.history = None
+        self.show_waterfall = config.get("show_waterfall", True)
+        self.waterfall = None
+
+        # Status updates are redrawn at most ui_fps times per second (0 = every step).
+        self.ui_fps = config.get("ui_fps", 10)
+        self.last_status_draw = 0.0
+        self.background = None  # pixels of everything except the animated status artists
 
         # Set up the main figure and adjust layout
         self.fig, self.ax = plt.subplots(figsize=(10, 6))
@@ -26,6 +70,18 @@ class Visualization:
         self.ax.set_ylabel("Signal Strength (dB)", color="white")
         self.ax.tick_params(colors="white")
         self.ax.grid(True, color="gray", linestyle="--", linewidth=0.5)
+        self.ax.set_xlim(self.start_freq / 1e6, self.end_freq / 1e6)
+        xticks = np.linspace(self.start_freq / 1e6, self.end_freq / 1e6, num=10)
+        self.ax.set_xticks(xticks)
+        self.ax.set_xticklabels([f"{x:.1f}" for x in xticks], color="white")
+
+        # Spectrum artists are created once and updated with set_data on every sweep.
+        self.history_lines = [self.ax.plot([], [], color="gray", linewidth=0.5, alpha=0.5)[0]
+                              for _ in range(HISTORY_LENGTH - 1)]
+        self.max_line, = self.ax.plot([], [], color="blue", linewidth=1.0, label="Max Observed Sweep")
+        self.recent_line, = self.ax.plot([], [], color="red", linewidth=0.8, label="Most Recent Sweep")
+        self.ax.legend(loc="upper right")
+        self.title = self.ax.set_title("", color="white", animated=True)
 
         # Mode indicator
         mode_text = "🧪 Test Mode" if self.test_mode else "📡 Live Mode"
@@ -37,6 +93,23 @@ class Visualization:
         # Adjust layout to ensure x-axis labels are visible
         self.fig.subplots_adjust(bottom=0.25, top=0.85)
 
+        # Waterfall (newest sweep on top) under the spectrum, sharing its frequency axis
+        self.waterfall_ax = None
+        self.waterfall_image = None
+        if self.show_waterfall:
+            self.ax.set_position([0.1, 0.52, 0.8, 0.33])
+            self.ax.tick_params(labelbottom=False)
+            self.ax.set_xlabel("")
+            self.waterfall_ax = self.fig.add_axes([0.1, 0.27, 0.8, 0.23], sharex=self.ax)
+            self.waterfall_ax.set_facecolor("black")
+            self.waterfall_ax.tick_params(colors="white")
+            self.waterfall_ax.set_xlabel("Frequency (MHz)", color="white")
+            self.waterfall_ax.set_ylabel("Sweeps ago", color="white")
+            self.waterfall_image = self.waterfall_ax.imshow(
+                np.zeros((1, 1)), aspect="auto", cmap="viridis", interpolation="nearest",
+                extent=(self.start_freq / 1e6, self.end_freq / 1e6, self.waterfall_rows, 0)
+            )
+
         # Progress Bar (Top)
         self.progress_ax = self.fig.add_axes([0.1, 0.87, 0.8, 0.03])
         self.progress_ax.set_xlim(0, 100)
@@ -44,7 +117,7 @@ class Visualization:
         self.progress_ax.set_xticks([])
         self.progress_ax.set_yticks([])
         self.progress_ax.set_facecolor("black")
-        self.progress_bar, = self.progress_ax.plot([0, 0], [0.5, 0.5], color="cyan", linewidth=8)
+        self.progress_bar, = self.progress_ax.plot([0, 0], [0.5, 0.5], color="cyan", linewidth=8, animated=True)
 
         # Info Box (Bottom)
         self.info_ax = self.fig.add_axes([0.1, 0.05, 0.8, 0.15])
@@ -54,15 +127,20 @@ class Visualization:
 
         self.current_freq_text = self.info_ax.text(
             0.5, 0.65, "", transform=self.info_ax.transAxes,
-            fontsize=20, fontweight="bold", color="cyan", ha="center", va="center"
+            fontsize=20, fontweight="bold", color="cyan", ha="center", va="center", animated=True
         )
         self.details_text = self.info_ax.text(
             0.5, 0.25, self.get_band_text(), transform=self.info_ax.transAxes,
             fontsize=10, color="white", ha="center", va="center"
         )
 
+        # Open the window without blocking; redraws are driven by redraw()/draw_status().
+        plt.show(block=False)
+
     def get_band_info(self, selected_band_name):
         """Retrieve band info based on selected band name."""
+        if hasattr(self.bands, "get"):
+            return self.bands.get(selected_band_name)  # config.BandRegistry
         return next((b for b in self.bands if b["band"] == selected_band_name), None)
 
     def get_band_text(self):
@@ -76,61 +154,104 @@ class Visualization:
                 f"Regions: {', '.join(band['regions_allowed'])} | "
                 f"RF Power: {', '.join(band['rf_output_power_options'])}")
 
+    def redraw(self):
+        """Full redraw of the static figure, then cache it as the blitting background."""
+        self.fig.canvas.draw()
+        if self.fig.canvas.supports_blit:
+            self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_status()
+
+    def draw_status(self):
+        """Draw only the animated status artists (title, progress bar, frequency readout)."""
+        canvas = self.fig.canvas
+        if self.background is None:
+            canvas.draw_idle()
+        else:
+            canvas.restore_region(self.background)
+            for artist in (self.title, self.progress_bar, self.current_freq_text):
+                artist.axes.draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
     def update_status(self, current_freq, progress):
-        """Update the current frequency display, progress bar, and mode label."""
-        if self.test_mode:
+        """Update the current frequency display and progress bar, throttled to ui_fps."""
+        if self.test_mode and self.verbose:
             print(f"🧪 Test Mode: Simulating scan at {current_freq / 1e6:.3f} MHz, Progress: {progress:.2f}%")
 
-        mode_text = "🧪 Test Mode" if self.test_mode else "📡 Live Mode"
-        self.mode_label.set_text(mode_text)
+        now = time.monotonic()
+        if self.ui_fps and now - self.last_status_draw < 1.0 / self.ui_fps and progress < 100:
+            return
+        self.last_status_draw = now
 
-        self.ax.set_title(f"Scanning: {current_freq / 1e6:.3f} MHz", color="white")
-        self.progress_bar.set_data([0, progress], [0.5, 0.5])
-        self.current_freq_text.set_text(f"{current_freq / 1e6:.3f} MHz")
-        self.details_text.set_text(self.get_band_text())
-        plt.pause(0.01)
+        with PROFILER.stage("ui_status"):
+            self.title.set_text(f"Scanning: {current_freq / 1e6:.3f} MHz")
+            self.progress_bar.set_data([0, progress], [0.5, 0.5])
+            self.current_freq_text.set_text(f"{current_freq / 1e6:.3f} MHz")
+            if self.background is None:
+                self.redraw()
+            else:
+                self.draw_status()
 
-    def update_spectrum(self, spectrum):
-        """Update the main spectrum plot with a new full sweep."""
-        if self.test_mode:
+    def update_spectrum(self, spectrum, frequencies=None):
+        """Update the main spectrum plot with a new full sweep (frequencies: its axis in Hz, if known)."""
+        if self.test_mode and self.verbose:
             print(f"🧪 Test Mode: Updating spectrum visualization with simulated data.")
-        self.ax.clear()
-        self.ax.set_facecolor("black")
-        self.ax.set_xlabel("Frequency (MHz)", color="white")
-        self.ax.set_ylabel("Signal Strength (dB)", color="white")
-        self.ax.tick_params(colors="white")
-        self.ax.grid(True, color="gray", linestyle="--", linewidth=0.5)
 
         # Ensure frequency axis length matches spectrum length
-        if len(self.freqs) != len(spectrum):
+        if frequencies is not None:
+            self.freqs = np.asarray(frequencies, dtype=np.float64)
+        elif len(self.freqs) != len(spectrum):
             print(f"⚠️ Dimension Mismatch: freqs={len(self.freqs)}, spectrum={len(spectrum)}. Adjusting...")
             self.freqs = np.linspace(self.start_freq, self.end_freq, num=len(spectrum))
-        
-        # Set x-ticks to show frequency labels at the bottom
-        xticks = np.linspace(self.start_freq / 1e6, self.end_freq / 1e6, num=10)
-        self.ax.set_xticks(xticks)
-        self.ax.set_xticklabels([f"{x:.1f}" for x in xticks], color="white")
 
-        # Store the new sweep in history (keep last 10 sweeps)
-        self.spectrum_history.append(spectrum)
-        if len(self.spectrum_history) > 10:
-            self.spectrum_history.pop(0)
+        # Store the new sweep in the history ring of the last HISTORY_LENGTH sweeps
+        spectrum = np.asarray(spectrum, dtype=np.float32)
+        if self.history is None or self.history.num_bins != len(spectrum):
+            self.history = SpectrumRingBuffer(HISTORY_LENGTH, len(spectrum))
+            self.waterfall = None
+        self.history.push(spectrum)
+        recent = self.history.latest()  # newest first, a view into the ring
+
+        # Auto-scale y-axis based on the recent sweeps
+        low, high = float(recent.min()), float(recent.max())
+        margin = 0.1 * max(high - low, 1.0)  # dB sweeps are negative, so pad by range
+        self.ax.set_ylim(low - margin, high + margin)
+
+        # Traces are min/max-decimated to the axes' pixel width before drawing.
+        width_px = int(self.ax.get_window_extent().width)
+        freqs_mhz = self.freqs / 1e6
+
+        # Previous sweeps in grey
+        for line, sweep in zip(self.history_lines, recent[1:]):
+            line.set_data(*decimate_minmax(freqs_mhz, sweep, width_px))
+        for line in self.history_lines[len(recent) - 1:]:
+            line.set_data([], [])
 
-        # Auto-scale y-axis based on all sweep values
-        all_vals = np.concatenate(self.spectrum_history)
-        self.ax.set_ylim(np.min(all_vals) * 0.9, np.max(all_vals) * 1.1)
+        # Max sweep in blue if available
+        if self.history.count > 1:
+            self.max_line.set_data(*decimate_minmax(freqs_mhz, recent.max(axis=0), width_px))
+        else:
+            self.max_line.set_data([], [])
 
-        # Plot previous sweeps in grey
-        for sweep in self.spectrum_history[:-1]:
-            self.ax.plot(self.freqs / 1e6, sweep, color="gray", linewidth=0.5, alpha=0.5)
+        # Most recent sweep in red
+        self.recent_line.set_data(*decimate_minmax(freqs_mhz, spectrum, width_px))
 
-        # Plot max sweep in blue if available
-        if len(self.spectrum_history) > 1:
-            max_spectrum = np.max(self.spectrum_history, axis=0)
-            self.ax.plot(self.freqs / 1e6, max_spectrum, color="blue", linewidth=1.0, label="Max Observed Sweep")
+        if self.waterfall_image is not None:
+            self.update_waterfall(spectrum, width_px, low, high)
+        self.redraw()
 
-        # Plot most recent sweep in red with a thinner line
-        self.ax.plot(self.freqs / 1e6, self.spectrum_history[-1], color="red", linewidth=0.8, label="Most Recent Sweep")
+    def mark_frequencies(self, frequencies, label="IEM channel"):
+        """Dashed markers at frequencies (Hz), e.g. the channels watched in dwell mode."""
+        for i, freq in enumerate(frequencies):
+            self.ax.axvline(freq / 1e6, color="cyan", linestyle="--", linewidth=0.6, alpha=0.6,
+                            label=label if i == 0 else None)
+        self.ax.legend(loc="upper right")
 
-        self.ax.legend()
-        #plt.pause(0.01)
+    def update_waterfall(self, spectrum, width_px, low, high):
+        """Push one pixel-width row into the waterfall ring and show it, newest first (unfilled rows are NaN)."""
+        row = decimate_max(spectrum, width_px)
+        if self.waterfall is None or self.waterfall.num_bins != len(row):
+            self.waterfall = SpectrumRingBuffer(self.waterfall_rows, len(row))
+        self.waterfall.push(row)
+        self.waterfall_image.set_data(self.waterfall.latest(self.waterfall_rows))
+        self.waterfall_image.set_clim(low, high)
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from baseline import NoiseBaseline
+
+
+def test_noise_baseline_reports_only_changed_regions(tmp_path):
+    rng = np.random.default_rng(0)
+    frequencies = np.arange(470000000, 471000000, 25000)
+    quiet = lambda: rng.normal(-100, 1, len(frequencies))
+    history = []
+    for _ in range(20):
+        sweep = quiet()
+        sweep[10] = -40  # a carrier that is always there belongs to the baseline
+        history.append((frequencies, sweep))
+
+    baseline = NoiseBaseline(470000000, 471000000, resolution=25000)
+    assert baseline.learn(history) == 20
+    assert abs(baseline.median[10] - -40) < 1e-3 and abs(np.nanmedian(baseline.spread) - 1) < 0.3
+
+    live = quiet()
+    live[10] = -40
+    live[20:23] = -50  # new carrier
+    changed = baseline.deviations(frequencies, live)
+    assert np.flatnonzero(changed).tolist() == [20, 21, 22]
+    regions = baseline.regions(frequencies, live, changed)
+    assert len(regions) == 1 and regions[0]["start_frequency"] == 470500000
+    assert regions[0]["power_levels"] == [-50.0, -50.0, -50.0]
+
+    # Points off the learned grid are unknown: reported separately, never as changed.
+    assert baseline.deviations([480000000], [-100]).tolist() == [False]
+    assert baseline.unknown([480000000, 470500000]).tolist() == [True, False]
+
+    baseline.save(str(tmp_path / "baseline.npz"))
+    loaded = NoiseBaseline.load(str(tmp_path / "baseline.npz"))
+    np.testing.assert_array_equal(loaded.median, baseline.median)
+    assert loaded.deviations(frequencies, live).tolist() == changed.tolist()
+
+
+def test_noise_baseline_holds_coarse_sweeps_across_their_step():
+    rng = np.random.default_rng(1)
+    frequencies = np.arange(470100000, 472000000, 200000)  # one point per 200 kHz tuning step
+    history = [(frequencies, rng.normal(-100, 1, len(frequencies))) for _ in range(10)]
+
+    baseline = NoiseBaseline(470000000, 472000000, resolution=1000)
+    baseline.learn(history)
+    assert baseline.coverage() > 0.99
+    assert baseline.coverage(470000000, 480000000) < 0.25
+
+    # A finer live sweep lands between the learned points: known, and quiet.
+    live = np.arange(470000000, 472000000, 25000)
+    assert not baseline.unknown(live).any()
+    assert not baseline.deviations(live, rng.normal(-100, 1, len(live))).any()
@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import benchmark
+from benchmark import bench_logger, compare
+
+
+def results(**seconds):
+    return {"results": {name: {"seconds": value} for name, value in seconds.items()}}
+
+
+def test_compare_flags_slowdowns_beyond_the_tolerance_and_skips_new_benchmarks():
+    rows = compare(results(fft=1.2, sweep=1.3, new=5.0), results(fft=1.0, sweep=1.0, gone=1.0), tolerance=0.25)
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [("fft", False), ("sweep", True)]
+
+
+def test_main_exit_status(tmp_path, monkeypatch):
+    current = results(fft=1.5)
+    monkeypatch.setattr(benchmark, "run", lambda suites, repeats, recording=None: current)
+    args = ["--output", str(tmp_path / "results.json"), "--baseline", str(tmp_path / "baseline.json")]
+
+    assert benchmark.main(args) == 0  # no baseline yet
+    (tmp_path / "baseline.json").write_text(json.dumps(results(fft=1.0)))
+    assert benchmark.main(args) == 1  # 50% slower than the baseline
+    assert benchmark.main(args + ["--tolerance", "0.6"]) == 0
+    (tmp_path / "baseline.json").write_text(json.dumps(results(other=1.0)))
+    assert benchmark.main(args) == 0  # nothing in common with the baseline
+    assert json.loads((tmp_path / "results.json").read_text()) == current
+
+
+def test_logger_benchmark_leaves_the_working_directory_alone(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    def no_chdir(path):
+        raise AssertionError("bench_logger must not change the process working directory")
+    monkeypatch.setattr(os, "chdir", no_chdir)
+    timings = bench_logger(1, passes=4)
+    assert os.getcwd() == str(tmp_path) and os.listdir(tmp_path) == []
+    assert set(timings) == {"logger_json_first_passes", "logger_json_after_4_passes",
+                            "logger_store_first_passes", "logger_store_after_4_passes"}
@@ -0,0 +1,90 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from calibration import CalibrationCache, DeviceCalibration, reject_outliers
+
+SIM_CONFIG = {
+    "sample_rate": 1024000,
+    "samples_per_scan": 2048,
+    "fft_size": 1024,
+    "start_frequency": 470000000,
+    "end_frequency": 472000000,
+    "frequency_step": 200000,
+    "gain": 20,
+    "freq_correction": 0,
+    "sdr_backend": "simulator",
+}
+
+
+def test_calibration_is_cached_and_removes_dc_and_iq_image(tmp_path):
+    from data_acquisition import DataAcquisition
+    from signal_processing import SignalProcessing
+
+    config = {**SIM_CONFIG, "start_frequency": 470400000, "end_frequency": 470600000,
+              "sim_carriers": [{"frequency": 470600000, "power_dbfs": -20.0}],
+              "sim_dc_offset": [0.05, -0.03], "sim_iq_gain_imbalance": 1.1, "sim_iq_phase_deg": 5.0,
+              "sim_settle_samples": 4096, "dc_notch_bins": 0,
+              "calibration_cache": str(tmp_path / "calibration.json")}
+    sp = SignalProcessing(config)
+
+    def image_and_dc(daq):
+        freq, samples = daq.scan(470400000)
+        spectrum = sp.process(samples)
+        bins = sp.bin_frequencies(freq)
+        return spectrum[np.argmin(np.abs(bins - 470200000))], spectrum[np.argmin(np.abs(bins - 470400000))]
+
+    raw_image, raw_dc = image_and_dc(DataAcquisition(config))
+    calibrated = DataAcquisition({**config, "use_calibration": True})
+    image, dc = image_and_dc(calibrated)
+
+    assert calibrated.calibration.settle(470400000) >= 4096
+    assert image < raw_image - 20 and dc < raw_dc - 20
+    cached = CalibrationCache(config["calibration_cache"]).get("SIMULATOR", config)
+    np.testing.assert_array_equal(cached.settle_samples, calibrated.calibration.settle_samples)
+    assert CalibrationCache(config["calibration_cache"]).get("SIMULATOR", {**config, "gain": 30}) is None
+
+
+def test_carriers_during_calibration_do_not_read_as_gain_ripple(tmp_path):
+    from data_acquisition import DataAcquisition
+    from signal_processing import SignalProcessing
+
+    config = {**SIM_CONFIG, "sim_carriers": [{"frequency": 471000000, "power_dbfs": -20.0}],
+              "use_calibration": True, "calibration_cache": str(tmp_path / "calibration.json")}
+    daq = DataAcquisition(config)
+
+    assert np.abs(daq.calibration.gain_offset_db).max() < 1.0
+    freq, samples = daq.scan(470600000)
+    sp = SignalProcessing(config)
+    bins = sp.bin_frequencies(freq)
+    assert sp.process(samples)[np.argmin(np.abs(bins - 471000000))] > -25  # carrier not cut by the correction
+
+
+def test_gain_offsets_far_from_the_median_are_interpolated_over():
+    frequencies = np.arange(10) * 1e6
+    offsets = np.array([0.1, 0.0, -0.1, 0.2, 9.0, 0.0, -0.2, 0.1, 0.0, 0.1])
+    cleaned, rejected = reject_outliers(frequencies, offsets)
+    assert np.flatnonzero(rejected).tolist() == [4]
+    assert cleaned[4] == 0.1 and cleaned[3] == 0.2  # midway between its neighbours; the rest untouched
+
+
+class WidebandOnAirSDR:
+    """Flat noise everywhere, but a wideband signal lifts the whole capture at one frequency."""
+
+    def __init__(self, loud_frequency):
+        self.loud_frequency = loud_frequency
+        self.center_freq = 0
+        self.rng = np.random.default_rng(0)
+
+    def read_samples(self, num_samples):
+        scale = 10.0 if self.center_freq == self.loud_frequency else 1.0
+        return (scale * 0.01 * (self.rng.standard_normal(num_samples) + 1j * self.rng.standard_normal(num_samples))).astype(np.complex64)
+
+
+def test_a_signal_on_the_air_is_not_baked_into_the_gain_flatness():
+    frequencies = 470e6 + np.arange(8) * 2e6
+    calibration = DeviceCalibration.measure(WidebandOnAirSDR(frequencies[3]), {"calibration_samples": 16384}, frequencies)
+    assert np.abs(calibration.gain_offset_db).max() < 0.5
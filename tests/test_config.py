@@ -0,0 +1,20 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import BandRegistry
+
+BANDS_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "data", "psm1000_bands.json")
+
+
+def test_band_registry_looks_up_bands_by_name_and_frequency():
+    with open(BANDS_PATH, "r") as f:
+        bands = BandRegistry(json.load(f))
+
+    covering = {b["band"] for b in bands.covering(560e6)}
+    expected = {b["band"] for b in bands if b["frequency_range_hz"]["start"] <= 560e6 <= b["frequency_range_hz"]["end"]}
+    assert covering == expected and "H22" in covering and "G10" not in covering
+    assert bands.get("X1")["frequency_range_hz"]["end"] == 952000000
+    assert bands.covering(100e6) == [] and bands.get("nope") is None
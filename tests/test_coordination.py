@@ -0,0 +1,24 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from coordination import IntermodCoordinator
+
+
+def test_coordinator_avoids_intermod_and_occupied_bins():
+    coordinator = IntermodCoordinator({"coord_attempts": 3})
+    assert [hit["kind"] for hit in coordinator.check([470000000, 470500000, 471000000])].count("im3") == 2
+
+    frequencies = np.arange(470000000, 620000000, 25000)
+    power = np.full(len(frequencies), -100.0)
+    power[(frequencies >= 500000000) & (frequencies < 506000000)] = -60  # a TV channel
+    sets = coordinator.coordinate(24, 470000000, 620000000, frequencies, power)
+
+    channels = np.array(sets[0])
+    assert len(channels) == 24
+    assert coordinator.check(channels) == []
+    assert not ((channels > 499900000) & (channels < 506100000)).any()
+    assert np.all(channels % 25000 == 0)
@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pipeline import ScanPipeline
+
+CONFIG = {
+    "sample_rate": 1024000,
+    "samples_per_scan": 2048,
+    "fft_size": 1024,
+    "start_frequency": 470000000,
+    "end_frequency": 472000000,
+    "frequency_step": 200000,
+}
+
+
+class FakeDAQ:
+    """Stands in for DataAcquisition: a tone at a fixed offset from every tuned frequency."""
+
+    def __init__(self, config, tune_delay=0.0, fail_at=None):
+        self.config = config
+        self.tune_delay = tune_delay
+        self.fail_at = fail_at
+
+    def frequency_list(self):
+        return np.arange(self.config["start_frequency"], self.config["end_frequency"], self.config["frequency_step"])
+
+    def scan(self, frequency):
+        if frequency == self.fail_at:
+            raise RuntimeError("USB gone")
+        time.sleep(self.tune_delay)
+        t = np.arange(self.config["samples_per_scan"]) / self.config["sample_rate"]
+        return frequency, (0.5 * np.exp(2j * np.pi * 100000 * t)).astype(np.complex64)
+
+
+def test_pipeline_returns_every_step_with_stats():
+    daq = FakeDAQ(CONFIG, tune_delay=0.001)
+    pipeline = ScanPipeline(CONFIG, daq, num_workers=2, ring_size=3)
+
+    results = list(pipeline.run_pass())
+
+    assert sorted(index for index, _, _ in results) == list(range(10))
+    for index, freq, spectrum in results:
+        assert freq == daq.frequency_list()[index]
+        assert spectrum.shape == (1024,)
+        assert np.argmax(spectrum) == 512 + 100
+    stats = pipeline.stats()
+    assert stats["steps"] == 10
+    assert stats["max_ring_depth"] <= 3
+    assert stats["pass_time"] > 0
+
+
+def test_pipeline_reraises_acquisition_errors_after_draining():
+    pipeline = ScanPipeline(CONFIG, FakeDAQ(CONFIG, fail_at=470600000), num_workers=2, ring_size=2)
+
+    received = []
+    with pytest.raises(RuntimeError):
+        for item in pipeline.run_pass():
+            received.append(item)
+    assert len(received) == 3
+
+
+class ReplayStreamingSDR:
+    """Fake pyrtlsdr device whose stream() replays recorded 8-bit IQ in a loop."""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.center_freq = 0
+        self.tune_history = []
+        self.stopped = False
+        self.chunks_served = 0
+
+    def __setattr__(self, name, value):
+        if name == "center_freq" and hasattr(self, "tune_history"):
+            self.tune_history.append(value)
+        super().__setattr__(name, value)
+
+    def stream(self, num_bytes, format="bytes"):
+        assert format == "bytes"
+
+        async def chunks():
+            offset = 0
+            while True:
+                chunk = np.roll(self.recording, -offset)[:num_bytes]
+                offset += num_bytes
+                self.chunks_served += 1
+                yield chunk.tobytes()
+
+        return chunks()
+
+    async def stop(self):
+        self.stopped = True
+
+
+def test_bytes_to_iq_scales_unsigned_samples():
+    from data_acquisition import DataAcquisition
+
+    iq = DataAcquisition.bytes_to_iq(bytes([255, 0, 127, 128]))
+    assert iq.dtype == np.complex64
+    np.testing.assert_allclose(iq, [1 - 1j, -1 / 255 + 1j / 255], atol=1e-6)
+
+
+def test_async_scan_discards_settling_chunks_and_reuses_buffer():
+    import asyncio
+    from data_acquisition import DataAcquisition
+
+    rng = np.random.default_rng(0)
+    sdr = ReplayStreamingSDR(rng.integers(0, 256, size=65536, dtype=np.uint8))
+    daq = DataAcquisition({**CONFIG, "gain": 20, "freq_correction": 0, "settle_samples": 4096}, sdr=sdr)
+
+    async def collect():
+        received = []
+        async for freq, samples in daq.scan_range_async():
+            received.append((freq, samples))
+        return received
+
+    received = asyncio.run(collect())
+
+    assert [freq for freq, _ in received] == list(daq.frequency_list())
+    assert sdr.tune_history == list(daq.frequency_list())
+    assert all(samples is received[0][1] for _, samples in received)
+    assert received[0][1].shape == (2048,)
+    assert sdr.chunks_served == 10 * 3  # two settling chunks dropped per step
+    assert sdr.stopped
+
+
+SIM_CONFIG = {
+    **CONFIG,
+    "gain": 20,
+    "freq_correction": 0,
+    "sdr_backend": "simulator",
+    "sim_carriers": [{"frequency": 470500000, "power_dbfs": -20.0}, {"frequency": 470700000, "power_dbfs": -20.0}],
+    "sim_intermod_suppression_db": 30.0,
+}
+
+
+def test_simulator_backend_is_deterministic_and_synthesizes_intermod():
+    from data_acquisition import DataAcquisition
+    from signal_processing import SignalProcessing
+
+    first = DataAcquisition(SIM_CONFIG)
+    second = DataAcquisition(SIM_CONFIG)
+    freq, samples = first.scan(470600000)
+    _, repeat = second.scan(470600000)
+    np.testing.assert_array_equal(samples, repeat)
+
+    sp = SignalProcessing(SIM_CONFIG)
+    spectrum = sp.process(samples)
+    bins = sp.bin_frequencies(freq)
+    level = {f: spectrum[np.argmin(np.abs(bins - f))] for f in (470500000, 470700000, 470300000, 470900000)}
+    assert level[470500000] > -25 and level[470700000] > -25
+    # IM3 products 2f1-f2 and 2f2-f1 show up ~30 dB down
+    assert -60 < level[470300000] < -45 and -60 < level[470900000] < -45
+
+
+def test_replay_backend_serves_capture_recorded_at_each_frequency(tmp_path):
+    import json
+    from data_acquisition import DataAcquisition
+
+    recording = np.arange(3 * 2048, dtype=np.float32).astype(np.complex64)
+    data_path = tmp_path / "sweep.sigmf-data"
+    recording.tofile(data_path)
+    captures = [{"core:sample_start": i * 2048, "core:frequency": 470000000 + i * 200000} for i in range(3)]
+    (tmp_path / "sweep.sigmf-meta").write_text(json.dumps({"global": {}, "captures": captures}))
+
+    daq = DataAcquisition({**CONFIG, "gain": 20, "freq_correction": 0,
+                           "sdr_backend": "replay", "sdr_replay_path": str(data_path)})
+    _, samples = daq.scan(470400000)
+
+    np.testing.assert_array_equal(samples, recording[4096:6144])
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from detection import CarrierDetector
+
+
+def test_cfar_detection_clusters_carriers():
+    rng = np.random.default_rng(0)
+    freqs = 470e6 + np.arange(2000) * 25e3
+    power = rng.normal(-90, 1, 2000)
+    power[500:508] = -40.0  # 200 kHz wide carrier
+    power[1500] = -60.0
+
+    carriers = CarrierDetector({}).detect(freqs, power)
+
+    assert len(carriers) == 2
+    assert abs(carriers[0]["frequency"] - freqs[500:508].mean()) < 1e3
+    assert carriers[0]["bandwidth"] == 200e3 and carriers[0]["power_db"] == -40.0
+    assert abs(carriers[1]["frequency"] - freqs[1500]) < 1e3 and carriers[1]["snr_db"] > 25
+
+
+def test_carrier_tracking_uses_confirmation_hysteresis_and_drop_out():
+    detector = CarrierDetector({"cfar_offset_db": 10.0, "detect_hysteresis_db": 4.0})
+    freqs = 470e6 + np.arange(200) * 25e3
+    levels = [-70, -70, -82, -82, -95, -95, -95]  # noise at -90: strong, then in the hold band, then gone
+    history = []
+    for sweep, level in enumerate(levels):
+        power = np.full(200, -90.0)
+        power[100] = level
+        history.append([(e["type"], e["id"]) for e in detector.update(sweep, freqs, power)])
+
+    assert history == [[], [("appear", 1)], [], [], [], [], [("disappear", 1)]]
+    assert detector.active_carriers() == []
@@ -0,0 +1,81 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dwell import DwellScanner, dwell_config, plan_centers
+
+SIM_CONFIG = {
+    "sample_rate": 1024000,
+    "samples_per_scan": 2048,
+    "fft_size": 1024,
+    "start_frequency": 470000000,
+    "end_frequency": 472000000,
+    "frequency_step": 200000,
+    "gain": 20,
+    "freq_correction": 0,
+    "sdr_backend": "simulator",
+    "sim_carriers": [{"frequency": 470500000, "power_dbfs": -20.0}, {"frequency": 470700000, "power_dbfs": -20.0}],
+}
+
+
+def test_dwell_scanner_parks_on_the_channels_and_zooms_in():
+    from data_acquisition import DataAcquisition
+    from profiling import PROFILER
+
+    # Channels that fit one 800 kHz window share a centre; a distant one gets its own.
+    np.testing.assert_array_equal(plan_centers([470.5e6, 470.7e6, 474.0e6], 800000, 100000), [470.6e6, 474.0e6])
+
+    config = dwell_config({**SIM_CONFIG, "dwell_fft_size": 16384, "dwell_rate_hz": 0})
+    daq = DataAcquisition(config)
+    scanner = DwellScanner(config, daq, [470500000, 470700000])
+    assert scanner.centers.tolist() == [470600000]
+    PROFILER.reset()
+    for _ in range(3):
+        frequencies, power = scanner.run_pass()
+    assert PROFILER.stages["tune"].count == 1  # parked: later updates never retune
+
+    assert frequencies[0] >= 470100000 and frequencies[-1] <= 471100000
+    assert np.allclose(np.diff(frequencies), scanner.resolution) and scanner.resolution == 1000
+    for carrier in (470500000, 470700000):
+        assert power[np.argmin(np.abs(frequencies - carrier))] > -25
+    assert np.median(power) < -80
+
+
+class KilohertzTuner:
+    """Wraps an SDR so center_freq reads back rounded to the kHz, as pyrtlsdr reports it; counts tunes."""
+
+    def __init__(self, sdr):
+        self.sdr = sdr
+        self.tunes = 0
+
+    @property
+    def center_freq(self):
+        return round(self.sdr.center_freq, -3)
+
+    @center_freq.setter
+    def center_freq(self, frequency):
+        self.tunes += 1
+        self.sdr.center_freq = frequency
+
+    def read_samples(self, num_samples):
+        return self.sdr.read_samples(num_samples)
+
+
+def test_dwell_stays_parked_when_the_tuner_rounds_its_readback():
+    from data_acquisition import DataAcquisition
+
+    config = dwell_config({**SIM_CONFIG, "dwell_fft_size": 4096, "dwell_rate_hz": 0})
+    daq = DataAcquisition(config)
+    daq.sdr = tuner = KilohertzTuner(daq.sdr)
+    scanner = DwellScanner(config, daq, [470512500, 470700000])
+    assert scanner.centers.tolist() == [470606000]  # midpoint 470.60625 MHz, on the kHz grid
+    for _ in range(3):
+        scanner.run_pass()
+    assert tuner.tunes == 1
+
+    daq.scan(470606250)  # an off-grid request is remembered as requested, not as read back
+    daq.scan(470606250)
+    assert tuner.tunes == 2
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from history import ScanHistory
+
+
+def test_scan_history_records_and_queries_sweeps(tmp_path):
+    history = ScanHistory(str(tmp_path / "scans.db"), channel_width=200000)
+    frequencies = np.arange(470000000, 471000000, 25000)
+    power = np.full(len(frequencies), -90.0)
+    power[10] = -30.0  # 470.25 MHz, channel 470.2 MHz
+
+    first = history.record("20250320_145048", frequencies, power, {"selected_band": "G10"},
+                           {"venue": "Red Rocks"}, "logs/scan_20250320_145048.json")
+    history.record("20250320_150000", frequencies, power - 5, {"selected_band": "H22"}, {}, "logs/scan_20250320_150000.json")
+    assert first is not None and history.count() == 2
+    assert history.contains("logs/scan_20250320_145048.json") and not history.contains("logs/other.json")
+    assert history.record("20250320_145048", frequencies, power, source="logs/scan_20250320_145048.json") is None
+
+    sweeps = history.sweeps()
+    assert [s["band"] for s in sweeps] == ["H22", "G10"]  # newest first
+    assert sweeps[1]["venue"] == "Red Rocks" and sweeps[1]["num_points"] == len(frequencies)
+    assert [s["band"] for s in history.sweeps(band="G10")] == ["G10"]
+    assert len(history.sweeps(limit=1)) == 1
+
+    channels, maxes = history.max_power_per_channel(band="G10")
+    assert channels.tolist() == [470000000, 470200000, 470400000, 470600000, 470800000]
+    assert maxes[1] == -30.0 and maxes[0] == -90.0
+    history.close()
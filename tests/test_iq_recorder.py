@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from iq_recorder import IQRecorder, IQRecording
+
+SIM_CONFIG = {
+    "sample_rate": 1024000,
+    "samples_per_scan": 2048,
+    "fft_size": 1024,
+    "start_frequency": 470000000,
+    "end_frequency": 472000000,
+    "frequency_step": 200000,
+    "gain": 20,
+    "freq_correction": 0,
+    "sdr_backend": "simulator",
+    "sim_carriers": [{"frequency": 470500000, "power_dbfs": -20.0}, {"frequency": 470700000, "power_dbfs": -20.0}],
+}
+
+
+def test_iq_recording_round_trips_through_reader_and_replay(tmp_path):
+    from data_acquisition import DataAcquisition
+
+    config = {**SIM_CONFIG, "start_frequency": 470000000, "end_frequency": 471000000,
+              "iq_record_directory": str(tmp_path)}
+    daq = DataAcquisition(config)
+    first = [(freq, samples.copy()) for freq, samples in daq.scan_range()]
+    second = [(freq, samples.copy()) for freq, samples in daq.scan_range()]  # outgrows the one-pass preallocation
+    daq.close()
+
+    recording = IQRecording(daq.recorder.path)
+    assert len(recording) == len(first) + len(second) and recording.sample_rate == config["sample_rate"]
+    freq, samples = recording[1]
+    assert freq == first[1][0] and np.shares_memory(samples, recording.data)
+    np.testing.assert_array_equal(samples, first[1][1])
+    batch = recording.stack()
+    assert batch.shape == (len(recording), config["samples_per_scan"]) and np.shares_memory(batch, recording.data)
+    assert recording.steps(first[0][0]).tolist() == [0, len(first)]
+
+    replay = DataAcquisition({**config, "iq_record_directory": None, "sdr_backend": "replay",
+                              "sdr_replay_path": recording.path})
+    np.testing.assert_array_equal(replay.scan(second[2][0])[1], second[2][1])
+
+
+def test_unclosed_recording_keeps_its_sidecar(tmp_path):
+    recorder = IQRecorder(str(tmp_path / "iq.sigmf-data"), 256, 1024000, capacity_steps=8, meta_interval=0)
+    assert len(IQRecording(recorder.path)) == 0  # readable from the start
+
+    steps = [np.full(256, k + 1j, dtype=np.complex64) for k in range(3)]
+    for k, samples in enumerate(steps):
+        recorder.record(470000000 + k * 200000, samples)
+    # No close(): as after a crash or Ctrl-C.
+    recording = IQRecording(recorder.path)
+    assert len(recording) == 3 and recording.lengths.tolist() == [256, 256, 256]
+    np.testing.assert_array_equal(recording[2][1], steps[2])
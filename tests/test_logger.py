@@ -0,0 +1,136 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import logger as logger_module
+from logger import Logger, MaxHold, ScanAccumulator, write_wwb_csv
+
+
+def test_scan_accumulator_matches_batch_statistics(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    frequencies = np.arange(470000000, 471000000, 25000)
+    sweeps = rng.normal(-90, 4, (200, len(frequencies)))
+
+    acc = ScanAccumulator(470000000, 471000000, resolution=25000, percentiles=[50, 90])
+    for sweep in sweeps:
+        acc.update(frequencies, sweep)
+    seen = acc.observed()
+    assert seen.sum() == len(frequencies) and acc.passes == 200
+    np.testing.assert_allclose(acc.mean[seen], sweeps.mean(axis=0), rtol=1e-5)  # sweeps are folded in as float32
+    np.testing.assert_allclose(acc.variance()[seen], sweeps.var(axis=0, ddof=1), rtol=1e-5)
+    np.testing.assert_allclose(acc.max[seen], sweeps.max(axis=0), rtol=1e-6)
+    np.testing.assert_allclose(acc.percentile(90)[seen], np.percentile(sweeps, 90, axis=0), atol=1.0)
+    np.testing.assert_array_equal(acc.percentile(90, chunk_cells=7), acc.percentile(90))
+
+    monkeypatch.chdir(tmp_path)
+    logger = Logger({"start_frequency": 470000000, "end_frequency": 471000000, "history_db": None,
+                     "max_hold_resolution_hz": 25000, "average_percentiles": [90]})
+    for sweep in sweeps[:5]:
+        logger.update_recent_scan({"frequencies": frequencies.tolist(), "power_levels": sweep.tolist(), "units": "dBFS"})
+    logger.update_average_scan()
+    average = np.loadtxt(tmp_path / "data" / "average_scan.csv", delimiter=",")
+    np.testing.assert_allclose(average[:, 1], np.round(sweeps[:5].mean(axis=0) - 45, 3), atol=1e-3)
+    assert (tmp_path / "data" / "p90_scan.csv").exists() and (tmp_path / "data" / "average_spectrum.json").exists()
+
+    # Percentiles (and their per-cell histogram) are opt-in.
+    default = Logger({"start_frequency": 470000000, "end_frequency": 471000000, "history_db": None})
+    default.update_average({"frequencies": frequencies.tolist(), "power_levels": sweeps[0].tolist(), "units": "dBFS"})
+    assert default.accumulator.histogram is None
+
+
+def write_log(log_dir, timestamp, power, units="dBFS"):
+    path = log_dir / f"scan_{timestamp}.json"
+    data = {"timestamp": timestamp, "frequencies": [470000000.0, 470200000.0], "power_levels": power}
+    if units is not None:
+        data["units"] = units
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_logger_backfills_the_history_index_from_existing_logs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    for i in range(3):
+        write_log(tmp_path / "logs", f"20250320_14500{i}", [-60.0 - i, -70.0])
+
+    logger = Logger({"log_directory": "logs", "history_db": str(tmp_path / "scans.db")})
+    assert logger.history.count() == 3
+    assert logger.index_logs() == 0  # already indexed
+    recent = logger.load_recent_logs(limit=2)
+    assert [data["timestamp"] for data in recent] == ["20250320_145002", "20250320_145001"]
+
+
+def test_load_recent_logs_reads_store_sweeps_and_falls_back_to_the_log_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger = Logger({"log_directory": "logs", "history_db": str(tmp_path / "scans.db"), "log_format": "store",
+                     "selected_band": "G10"})
+    logger.save_log({"timestamp": "20250320_145000", "frequencies": [470000000.0, 470200000.0],
+                     "power_levels": [-60.0, -70.0], "units": "dBFS"})
+    recent = logger.load_recent_logs()
+    assert len(recent) == 1 and recent[0]["power_levels"] == [-60.0, -70.0] and recent[0]["units"] == "dBFS"
+
+    # Logs the index does not know about are still found when the index yields nothing.
+    unindexed = Logger({"log_directory": "other_logs", "history_db": str(tmp_path / "other.db")})
+    write_log(tmp_path / "other_logs", "20250320_145000", [-60.0, -70.0])
+    assert unindexed.history.count() == 0 and len(unindexed.load_recent_logs()) == 1
+
+
+def test_baseline_is_learned_from_one_units_scale_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    for i in range(4):
+        write_log(tmp_path / "logs", f"20250320_14500{i}", [-60.0, -61.0])
+        write_log(tmp_path / "logs", f"20250320_14510{i}", [0.5, 0.6], units=None)  # legacy linear magnitudes
+
+    logger = Logger({"log_directory": "logs", "history_db": str(tmp_path / "scans.db"),
+                     "start_frequency": 470000000, "end_frequency": 470200000, "baseline_resolution_hz": 200000})
+    sweeps = list(logger.history_sweeps(limit=8))
+    assert len(sweeps) == 4
+    baseline = logger.build_baseline(limit=8)
+    np.testing.assert_allclose(baseline.median, [-105.0, -106.0])
+    np.testing.assert_allclose(baseline.spread, [0.0, 0.0])
+
+
+def test_max_hold_merges_overlapping_sweeps_on_the_grid(tmp_path):
+    hold = MaxHold(470000000, 470010000, resolution=1000)
+    hold.update([470000000, 470001000, 470002000], [-80.0, -70.0, -90.0])
+    hold.update([470001000.4, 470002000, 470003000, 480000000], [-75.0, -60.0, -85.0, 0.0])  # rounded to the grid
+    frequencies, power = hold.observed()
+    assert frequencies.tolist() == [470000000, 470001000, 470002000, 470003000]
+    assert power.tolist() == [-80.0, -70.0, -60.0, -85.0]
+
+    hold.save(str(tmp_path / "max_hold.npz"))
+    coarser = MaxHold(470000000, 470010000, resolution=2000)
+    coarser.load(str(tmp_path / "max_hold.npz"))
+    frequencies, power = coarser.observed()  # reloaded onto a 2 kHz grid, each cell keeps its max
+    assert frequencies.tolist() == [470000000, 470002000, 470004000] and power.tolist() == [-70.0, -60.0, -85.0]
+
+
+def test_wwb_csv_is_headerless_mhz_and_dbm(tmp_path):
+    path = str(tmp_path / "max_scan.csv")
+    write_wwb_csv(path, [470000000.0, 470025000.0, 614999500.0], [-80.12345, -70.0, -99.5])
+    assert open(path).read().splitlines() == ["470.000,-80.123", "470.025,-70.000", "615.000,-99.500"]
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_max_scan_export_is_throttled_to_the_interval(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(logger_module.time, "monotonic", lambda: clock[0])
+    monkeypatch.chdir(tmp_path)
+    logger = Logger({"start_frequency": 470000000, "end_frequency": 470100000, "history_db": None,
+                     "wwb_export_interval": 60})
+    scan = {"frequencies": [470000000.0, 470050000.0], "power_levels": [-40.0, -50.0], "units": "dBFS"}
+    csv_path = tmp_path / "data" / "max_scan.csv"
+
+    logger.update_max_scan(scan)
+    assert csv_path.read_text().splitlines() == ["470.000,-85.000", "470.050,-95.000"]
+    clock[0] += 30
+    logger.update_max_scan({**scan, "power_levels": [-20.0, -50.0]})
+    assert csv_path.read_text().splitlines()[0] == "470.000,-85.000"  # within the interval: not exported
+    clock[0] += 30
+    logger.update_max_scan(scan)
+    assert csv_path.read_text().splitlines()[0] == "470.000,-65.000"
@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from migrate_logs import bounded_imap, migrate, regrid
+from scan_store import ScanStore
+
+
+def test_migrate_logs_dedupes_regrids_and_aggregates(tmp_path):
+    axis = np.arange(470000000, 471000001, 25000, dtype=np.float64)
+    coarse = regrid(axis, np.array([470100000.0, 470300000.0]), np.array([-80.0, -60.0], dtype=np.float32))
+    assert coarse[0] == coarse[7] == -80 and coarse[8] == coarse[15] == -60 and np.isnan(coarse[16:]).all()
+
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    fine = np.arange(470000000, 471000000, 5000)
+    for i, level in enumerate((-50.0, -30.0)):
+        sweep = {"timestamp": f"20250320_14500{i}", "config": {"gain": i}, "units": "dBFS",
+                 "frequencies": fine.tolist(), "power_levels": np.full(len(fine), level).tolist()}
+        (logs / f"scan_20250320_14500{i}.json").write_text(json.dumps(sweep))
+    (logs / "scan_20250320_145009.json").write_text((logs / "scan_20250320_145000.json").read_text())
+    (logs / "scan_broken.json").write_text('{"timestamp": "20250320_150000", "frequencies": [1, 2]}')
+
+    manifest = migrate(sorted(str(p) for p in logs.iterdir()), str(tmp_path / "out"), 470000000, 471000000,
+                       25000, band="TEST", workers=2, percentiles=[50])
+    assert manifest["migrated"] == 2
+    assert [os.path.basename(p) for p in manifest["duplicates"]] == ["scan_20250320_145009.json"]
+    assert list(manifest["rejected"]) == [str(logs / "scan_broken.json")]
+
+    index, frequencies, power = ScanStore(str(tmp_path / "out" / "store")).read(manifest["grid"])
+    assert power.shape == (2, len(axis)) and index["timestamp"][0] < index["timestamp"][1]
+    np.testing.assert_allclose(power[1, :-1], -75.0)
+    maximum = np.loadtxt(tmp_path / "out" / "max_scan.csv", delimiter=",")
+    average = np.loadtxt(tmp_path / "out" / "average_scan.csv", delimiter=",")
+    assert np.all(maximum[:, 1] == -75.0) and np.all(average[:, 1] == -85.0)
+
+
+class CountingPool:
+    """Synchronous stand-in for multiprocessing.Pool that tracks how many results are outstanding."""
+
+    def __init__(self):
+        self.outstanding = 0
+        self.most_outstanding = 0
+
+    def apply_async(self, function, args):
+        self.outstanding += 1
+        self.most_outstanding = max(self.most_outstanding, self.outstanding)
+        pool, value = self, function(*args)
+
+        class Result:
+            def get(self):
+                pool.outstanding -= 1
+                return value
+        return Result()
+
+
+def test_bounded_imap_keeps_order_and_limits_tasks_in_flight():
+    pool = CountingPool()
+    assert list(bounded_imap(pool, lambda x: x * x, range(20), window=3)) == [x * x for x in range(20)]
+    assert pool.most_outstanding == 3 and pool.outstanding == 0
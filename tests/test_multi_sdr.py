@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from multi_sdr import MultiDeviceScanner, merge_sweeps, partition_range
+
+CONFIG = {
+    "sample_rate": 1024000,
+    "samples_per_scan": 2048,
+    "fft_size": 1024,
+    "start_frequency": 470000000,
+    "end_frequency": 472000000,
+    "frequency_step": 200000,
+}
+SIM_CONFIG = {
+    **CONFIG,
+    "gain": 20,
+    "freq_correction": 0,
+    "sdr_backend": "simulator",
+    "sim_carriers": [{"frequency": 470500000, "power_dbfs": -20.0}, {"frequency": 470700000, "power_dbfs": -20.0}],
+    "sim_intermod_suppression_db": 30.0,
+}
+
+
+def test_partition_and_merge_cover_the_range_once():
+    ranges = partition_range(CONFIG, 3)
+    assert ranges == [(470000000, 470800000), (470800000, 471400000), (471400000, 472000000)]
+
+    sweeps = [(np.arange(lo, hi, 200000), np.full(len(np.arange(lo, hi, 200000)), -50.0)) for lo, hi in ranges]
+    freqs, power = merge_sweeps(sweeps[::-1], calibration_db=[1.0, 0.0, -1.0])
+    np.testing.assert_array_equal(freqs, np.arange(470000000, 472000000, 200000))
+    np.testing.assert_array_equal(power[:4], -51.0)
+    np.testing.assert_array_equal(power[-3:], -49.0)
+
+
+def test_multi_device_scanner_merges_simulated_devices():
+    from data_acquisition import DataAcquisition
+    from scanner import Scanner
+
+    devices = [{"serial": "SIM0"}, {"serial": "SIM1", "calibration_db": 3.0}, {"serial": "SIM2"}]
+    scanner = MultiDeviceScanner(SIM_CONFIG, devices).start()
+    try:
+        progress = []
+        freqs, power = scanner.run_pass(lambda freq, percent: progress.append(percent))
+    finally:
+        scanner.close()
+
+    single_freqs, single_power = Scanner(SIM_CONFIG, DataAcquisition(SIM_CONFIG)).run_pass()
+    np.testing.assert_array_equal(freqs, single_freqs)
+    offsets = np.where((freqs >= 470800000) & (freqs < 471400000), 3.0, 0.0)
+    np.testing.assert_allclose(power, single_power + offsets, atol=3.0)  # noise-only steps vary by a dB or so
+    assert progress[-1] == 100
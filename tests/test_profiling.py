@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from profiling import ScanProfiler
+
+
+def test_profiler_records_pass_totals_and_histograms():
+    profiler = ScanProfiler()
+    for seconds in (0.002, 0.02, 0.2):
+        profiler.record("fft", seconds)
+    with profiler.stage("tune"):
+        pass
+
+    record = profiler.end_pass()
+    assert record["fft"] == {"count": 3, "seconds": 0.222}
+    assert record["tune"]["count"] == 1
+    assert profiler.end_pass() == {}
+
+    metrics = profiler.prometheus()
+    assert 'rf_scanner_stage_seconds_bucket{stage="fft",le="0.01"} 1' in metrics
+    assert 'rf_scanner_stage_seconds_bucket{stage="fft",le="+Inf"} 3' in metrics
+    assert 'rf_scanner_stage_seconds_count{stage="fft"} 3' in metrics
+    assert "rf_scanner_passes_total 2" in metrics
+    assert "fft" in profiler.summary().splitlines()[1]
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from scan_store import ScanStore, config_hash, parse_timestamp
+
+
+def sweep(timestamp, frequencies, offset):
+    return {"timestamp": timestamp, "frequencies": frequencies.tolist(),
+            "power_levels": (np.arange(len(frequencies)) + offset).tolist(), "units": "dBFS"}
+
+
+def test_scan_store_slices_time_and_frequency_and_reopens(tmp_path):
+    frequencies = np.arange(470000000, 471000000, 100000, dtype=np.float64)
+    config = {"selected_band": "G10", "gain": 20}
+    store = ScanStore(str(tmp_path / "store"))
+    grid = None
+    for minute in range(5):
+        grid = store.append(sweep(f"20250320_14{minute:02d}00", frequencies, minute * 100), config)
+    assert store.grids() == [grid] and store.grid_info(grid) == {"band": "G10", "units": "dBFS", "num_frequencies": 10}
+
+    index, freqs, power = store.read(grid, start_time="20250320_140100", end_time="20250320_140300",
+                                     start_freq=470200000, end_freq=470400000)
+    assert freqs.tolist() == [470200000, 470300000, 470400000]
+    assert power.shape == (3, 3) and power[:, 0].tolist() == [102, 202, 302]
+    assert index["timestamp"].tolist() == [parse_timestamp(f"20250320_14{m:02d}00") for m in (1, 2, 3)]
+    assert set(index["config_hash"].astype(str)) == {config_hash(config)}
+
+    # A different grid (a finer step) gets its own id; existing rows are untouched.
+    finer = np.arange(470000000, 471000000, 50000, dtype=np.float64)
+    other = store.append(sweep("20250320_140500", finer, 0), config)
+    assert other != grid and other.startswith("G10_") and len(store.grids(band="G10")) == 2
+    assert store.grids(band="H22") == []
+
+    reopened = ScanStore(str(tmp_path / "store"))
+    assert reopened.configs() == {config_hash(config): config}
+    reopened.append(sweep("20250320_140600", frequencies, 500), config)
+    index, _, power = reopened.read(grid)
+    assert len(index) == 6 and power[-1, 0] == 500 and power[0, 0] == 0
+    assert len(reopened.read(other)[0]) == 1
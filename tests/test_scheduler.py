@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from scheduler import SweepScheduler
+
+SIM_CONFIG = {
+    "sample_rate": 1024000,
+    "samples_per_scan": 2048,
+    "fft_size": 1024,
+    "start_frequency": 470000000,
+    "end_frequency": 472000000,
+    "frequency_step": 200000,
+    "gain": 20,
+    "freq_correction": 0,
+    "sdr_backend": "simulator",
+    "sim_carriers": [{"frequency": 470500000, "power_dbfs": -20.0}, {"frequency": 470700000, "power_dbfs": -20.0}],
+    "sim_intermod_suppression_db": 30.0,
+}
+
+
+def test_adaptive_sweep_revisits_busy_steps_every_pass():
+    from data_acquisition import DataAcquisition
+    from scanner import Scanner
+
+    config = {**SIM_CONFIG, "adaptive_sweep": True, "scheduler_idle_interval": 3,
+              "scheduler_priority_ranges": [[471800000, 471900000]]}
+    scanner = Scanner(config, DataAcquisition(config))
+    visited = []
+    for _ in range(4):
+        tuned = []
+        freqs, power = scanner.run_pass(lambda freq, progress: tuned.append(freq))
+        visited.append(tuned)
+        assert len(freqs) == 10 and len(power) == 10
+
+    # Every step once, then only steps that see the carriers plus the priority range, then all again.
+    assert len(visited[0]) == 10
+    assert 471600000 not in visited[1] and 471800000 in visited[1] and 470600000 in visited[1]
+    assert visited[1] == visited[2]
+    assert len(visited[3]) == 10
+
+
+def test_scheduler_time_budget_keeps_highest_priority_steps():
+    scheduler = SweepScheduler({"scheduler_time_budget": 0.35, "scheduler_priority_ranges": [[5, 5]]}, np.arange(10))
+    scheduler.update(np.arange(10), np.full(10, -80.0), elapsed=1.0)  # 0.1 s per step
+    scheduler.pass_num += 10  # everything is overdue
+
+    plan = scheduler.plan()
+    assert len(plan) == 3 and 5 in plan
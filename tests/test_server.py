@@ -0,0 +1,150 @@
+import base64
+import json
+import os
+import socket
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from server import (CHANNEL_MAX_HOLD, CHANNEL_SPECTRUM, FRAME_DELTA, FRAME_KEY, ScanDaemon, SpectrumBroadcaster,
+                    decode_frame, encode_frame, quantize, recv_websocket_frame)
+
+CONFIG = {
+    "start_frequency": 470000000,
+    "end_frequency": 472000000,
+    "frequency_step": 200000,
+    "selected_band": "ALL",
+    "sample_rate": 1024000,
+    "samples_per_scan": 1024,
+    "gain": 0,
+    "freq_correction": 0,
+    "daemon_host": "127.0.0.1",
+    "daemon_port": 0,
+    "stream_keyframe_interval": 3,
+}
+
+
+class CannedSDR:
+    """In-process fake SDR that replays the same canned capture at every frequency."""
+
+    def __init__(self, capture):
+        self.capture = capture
+        self.center_freq = 0
+
+    def read_samples(self, num_samples):
+        return self.capture[:num_samples]
+
+    def close(self):
+        pass
+
+
+def start_daemon(logger=None, **overrides):
+    from data_acquisition import DataAcquisition
+
+    config = {**CONFIG, **overrides}
+    t = np.arange(1024) / 1024000
+    capture = (0.1 * np.exp(2j * np.pi * 50000 * t)).astype(np.complex64)
+    daemon = ScanDaemon(config, DataAcquisition(config, sdr=CannedSDR(capture)), logger)
+    daemon.start()
+    return daemon
+
+
+def wait_for_passes(daemon, passes=1, timeout=10):
+    deadline = time.time() + timeout
+    while daemon.status()["passes"] < passes and time.time() < deadline:
+        time.sleep(0.05)
+
+
+def test_frame_encoding_round_trips_key_and_delta():
+    freqs = 470e6 + np.arange(500) * 25e3
+    first = quantize(np.linspace(-100, -20, 500), -127.5, 0.5)
+    second = first.copy()
+    second[100] = 250
+
+    key = decode_frame(encode_frame(FRAME_KEY, 0, 1, freqs, first, -127.5, 0.5))
+    delta_bytes = encode_frame(FRAME_DELTA, 0, 2, freqs, second, -127.5, 0.5, previous=first)
+    delta = decode_frame(delta_bytes, previous=key)
+
+    np.testing.assert_allclose(key["frequencies"], freqs)
+    np.testing.assert_allclose(key["power"], np.linspace(-100, -20, 500), atol=0.25)
+    np.testing.assert_array_equal(delta["quantized"], second)
+    assert len(delta_bytes) < 100
+
+
+def test_broadcaster_sends_a_key_frame_every_interval_on_each_channel():
+    broadcaster = SpectrumBroadcaster({"stream_keyframe_interval": 4, "stream_client_queue": 100})
+    freqs = 470e6 + np.arange(50) * 25e3
+    client = broadcaster.subscribe()
+    for i in range(8):
+        broadcaster.publish(CHANNEL_SPECTRUM, freqs, np.full(50, -90.0 + i))
+        broadcaster.publish(CHANNEL_MAX_HOLD, freqs, np.full(50, -80.0 + i))
+    decoded, frames = {}, []
+    for _ in range(16):
+        payload = client.frames.get_nowait()
+        frame = decode_frame(payload, previous=decoded.get(payload[5]))  # byte 5 is the channel
+        decoded[frame["channel"]] = frame
+        frames.append(frame)
+    np.testing.assert_allclose(decoded[CHANNEL_SPECTRUM]["power"], -83.0)
+    for channel in (CHANNEL_SPECTRUM, CHANNEL_MAX_HOLD):
+        sent = [(f["sequence"], f["kind"]) for f in frames if f["channel"] == channel]
+        assert [seq for seq, _ in sent] == list(range(1, 9))
+        assert [seq for seq, kind in sent if kind == FRAME_KEY] == [1, 4, 8]
+
+    # A late subscriber starts from the latest key frame of each channel.
+    late = broadcaster.subscribe()
+    assert sorted(decode_frame(late.frames.get_nowait())["kind"] for _ in range(2)) == [FRAME_KEY, FRAME_KEY]
+
+
+def test_daemon_serves_http_and_websocket_frames():
+    daemon = start_daemon()
+    try:
+        host, port = daemon.address[:2]
+        wait_for_passes(daemon)
+
+        status = json.loads(urllib.request.urlopen(f"http://{host}:{port}/api/status").read())
+        spectrum = json.loads(urllib.request.urlopen(f"http://{host}:{port}/api/spectrum").read())
+        assert status["passes"] >= 1
+        assert len(spectrum["frequencies"]) == len(spectrum["power_levels"]) == 10
+        metrics = urllib.request.urlopen(f"http://{host}:{port}/metrics").read().decode()
+        assert "rf_scanner_passes_total" in metrics
+
+        sock = socket.create_connection((host, port), timeout=10)
+        key = base64.b64encode(b"0123456789abcdef").decode()
+        sock.sendall((f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        response = b""
+        while b"\r\n\r\n" not in response:
+            response += sock.recv(1)
+        assert b"101" in response.split(b"\r\n")[0]
+
+        decoded = {}
+        for _ in range(6):
+            opcode, payload = recv_websocket_frame(sock)
+            frame = decode_frame(payload, previous=decoded.get(payload[5]))  # byte 5 is the channel
+            decoded[frame["channel"]] = frame
+        assert len(decoded[0]["power"]) == 10
+        sock.close()
+    finally:
+        daemon.stop()
+
+
+def test_daemon_logs_and_indexes_sweeps_from_its_sweep_thread(tmp_path, monkeypatch):
+    from logger import Logger
+
+    monkeypatch.chdir(tmp_path)
+    config = {**CONFIG, "history_db": str(tmp_path / "scans.db")}
+    logger = Logger(config)  # history connection opened here, on the main thread
+    daemon = start_daemon(logger, **config)
+    try:
+        wait_for_passes(daemon, 2)
+    finally:
+        daemon.stop()
+
+    assert daemon.status()["passes"] >= 2 and daemon.status()["errors"] == 0
+    sweeps = logger.history.sweeps()
+    assert sweeps and sweeps[0]["num_points"] == 10
+    assert os.path.exists(sweeps[0]["source"])
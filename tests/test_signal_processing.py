@@ -0,0 +1,110 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from signal_processing import SignalProcessing
+
+CONFIG = {"sample_rate": 1024000, "samples_per_scan": 4096, "fft_size": 1024}
+
+
+def tone(freq_offset, num_samples=4096, sample_rate=1024000, amplitude=0.5):
+    t = np.arange(num_samples) / sample_rate
+    return (amplitude * np.exp(2j * np.pi * freq_offset * t)).astype(np.complex64)
+
+
+def test_process_batch_shape_and_peak_location():
+    sp = SignalProcessing(CONFIG)
+    offsets = [100000, -250000, 300000]
+    stack = np.stack([tone(f) for f in offsets])
+
+    spectra = sp.process_batch(stack)
+
+    assert spectra.shape == (3, 1024)
+    assert spectra.dtype == np.float32
+    bin_freqs = sp.bin_frequencies(0)
+    for row, offset in zip(spectra, offsets):
+        assert abs(bin_freqs[np.argmax(row)] - offset) <= CONFIG["sample_rate"] / 1024
+
+
+def test_full_scale_tone_reads_zero_dbfs():
+    sp = SignalProcessing({**CONFIG, "fft_window": "rectangular"})
+    spectrum = sp.process(tone(128000, amplitude=1.0))
+    assert np.max(spectrum) == pytest.approx(0.0, abs=0.1)
+
+
+def test_batch_matches_single_capture_processing():
+    sp = SignalProcessing({**CONFIG, "fft_overlap": 0.5})
+    rng = np.random.default_rng(0)
+    stack = (rng.normal(size=(4, 4096)) + 1j * rng.normal(size=(4, 4096))).astype(np.complex64)
+
+    batched = sp.process_batch(stack)
+    for i in range(4):
+        np.testing.assert_allclose(batched[i], sp.process(stack[i]), rtol=1e-5)
+
+
+def test_short_capture_is_zero_padded():
+    sp = SignalProcessing({**CONFIG, "fft_size": 8192})
+    assert sp.process(tone(50000)).shape == (8192,)
+
+
+def test_dc_notch_removes_lo_spike():
+    sp = SignalProcessing(CONFIG)
+    samples = tone(200000, amplitude=0.01) + np.complex64(0.5)
+    spectrum = sp.process(samples)
+    assert np.argmax(spectrum) != 512
+
+
+def test_unknown_window_rejected():
+    with pytest.raises(ValueError):
+        SignalProcessing({**CONFIG, "fft_window": "kaiser"})
+
+
+def test_welch_mode_lowers_noise_variance():
+    rng = np.random.default_rng(1)
+    noise = (rng.normal(size=16384) + 1j * rng.normal(size=16384)).astype(np.complex64) * 0.01
+    single_shot = SignalProcessing(CONFIG)
+    welch = SignalProcessing({**CONFIG, "psd_mode": "welch"})
+
+    assert welch.overlap == 0.5
+    assert np.std(welch.process(noise)) < np.std(single_shot.process(noise[:1024])) / 2
+
+
+def test_scratch_buffers_are_reused_between_calls():
+    sp = SignalProcessing({**CONFIG, "psd_mode": "welch"})
+    stack = np.stack([tone(1000), tone(2000)])
+    sp.process_batch(stack)
+    segments, power = sp._segments, sp._power
+
+    out = np.empty((2, 1024), dtype=np.float32)
+    result = sp.process_batch(stack, out=out)
+
+    assert result is out
+    assert sp._segments is segments and sp._power is power
+
+
+def test_unknown_psd_mode_rejected():
+    with pytest.raises(ValueError):
+        SignalProcessing({**CONFIG, "psd_mode": "median"})
+
+
+def test_stitched_sweep_places_carrier_on_global_grid():
+    from stitching import SpectrumStitcher
+
+    config = {**CONFIG, "start_frequency": 470000000, "end_frequency": 474000000,
+              "frequency_step": 800000, "stitch_resolution_hz": 5000}
+    sp = SignalProcessing(config)
+    stitcher = SpectrumStitcher(config)
+    centers = np.arange(470400000, 474400000, 800000)
+    carrier = 471735000
+    stack = np.stack([tone(carrier - c, amplitude=0.5 if abs(carrier - c) < 400000 else 0.0) + 1e-4
+                      for c in centers])
+
+    freqs, power = stitcher.stitch(centers, sp.process_batch(stack))
+
+    assert len(freqs) == len(power) == 800
+    assert np.all(np.isfinite(power))
+    assert abs(freqs[np.argmax(power)] - carrier) <= 5000
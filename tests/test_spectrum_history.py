@@ -0,0 +1,23 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from spectrum_history import SpectrumRingBuffer
+
+
+def test_ring_buffer_keeps_the_latest_rows_newest_first():
+    rng = np.random.default_rng(1)
+    sweeps = rng.normal(-80, 5, (25, 64)).astype(np.float32)
+    ring = SpectrumRingBuffer(10, 64)
+    ring.push(sweeps[0])
+    assert ring.count == 1 and np.isnan(ring.latest(3)[1:]).all()  # unwritten rows hold the fill value
+
+    for sweep in sweeps[1:]:
+        ring.push(sweep)
+    assert ring.count == 10
+    np.testing.assert_array_equal(ring.latest(), sweeps[-10:][::-1])
+    np.testing.assert_array_equal(ring.latest(2), sweeps[-2:][::-1])
+    assert np.shares_memory(ring.latest(), ring.data)  # a view, never a copy
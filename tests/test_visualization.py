@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from visualization import Visualization, decimate_minmax
+
+BANDS_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "data", "psm1000_bands.json")
+CONFIG = {
+    "start_frequency": 470000000,
+    "end_frequency": 620000000,
+    "frequency_step": 200000,
+    "selected_band": "ALL",
+}
+
+
+def make_visualization(**overrides):
+    with open(BANDS_PATH, "r") as f:
+        bands = json.load(f)
+    return Visualization({**CONFIG, **overrides}, bands)
+
+
+def test_decimate_minmax_keeps_narrow_peaks():
+    x = np.arange(100000)
+    y = np.full(100000, -90.0)
+    y[54321] = -20.0
+
+    dx, dy = decimate_minmax(x, y, 800)
+
+    assert len(dy) <= 1600
+    assert dy.max() == -20.0
+    assert dy.min() == -90.0
+    assert abs(dx[np.argmax(dy)] - 54321) < 100000 / 800
+
+
+def test_decimate_minmax_passes_short_traces_through():
+    x, y = np.arange(10), np.arange(10.0)
+    dx, dy = decimate_minmax(x, y, 800)
+    assert dx is x and dy is y
+
+
+def test_update_spectrum_reuses_line_artists():
+    vis = make_visualization()
+    lines = list(vis.ax.lines)
+
+    for _ in range(3):
+        vis.update_spectrum(np.random.default_rng(0).normal(-80, 3, 50000))
+
+    assert list(vis.ax.lines) == lines
+    assert len(vis.recent_line.get_ydata()) <= 2 * vis.ax.get_window_extent().width
+    assert vis.ax.get_ylim()[0] < -80 < vis.ax.get_ylim()[1]
+
+
+def test_update_status_is_throttled():
+    vis = make_visualization(ui_fps=1)
+    vis.update_status(470000000, 0.0)
+    vis.update_status(480000000, 10.0)
+    assert vis.current_freq_text.get_text() == "470.000 MHz"
+
+    vis.update_status(620000000, 100.0)
+    assert vis.current_freq_text.get_text() == "620.000 MHz"
+
+
+def test_waterfall_holds_a_fixed_number_of_rows():
+    vis = make_visualization(waterfall_rows=5)
+    for level in range(8):
+        vis.update_spectrum(np.full(2000, -90.0 + level))
+
+    image = vis.waterfall_image.get_array()
+    assert image.shape[0] == 5
+    assert image[0, 0] == -83.0 and image[-1, 0] == -87.0
+
+
+def test_y_limits_and_max_trace_follow_the_recent_sweeps():
+    from visualization import HISTORY_LENGTH
+
+    vis = make_visualization(waterfall_rows=50)
+    burst = np.full(2000, -90.0)
+    burst[1000] = -20.0
+    vis.update_spectrum(burst)
+    for _ in range(HISTORY_LENGTH):
+        vis.update_spectrum(np.full(2000, -90.0))
+
+    assert vis.history.capacity == HISTORY_LENGTH
+    assert vis.max_line.get_ydata().max() == -90.0  # the burst left the window
+    assert vis.ax.get_ylim()[1] < -80
+    assert vis.waterfall_image.get_array()[HISTORY_LENGTH].max() == -20.0  # but is still in the waterfall